@@ -0,0 +1,45 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import pytest
+
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.async_runner import AsyncSearchRunner
+
+SEARCH_LATENCY = 0.05
+
+
+class FakeAsyncDB(Test):
+    """Serves as many searches at once as the connections opened by ainit(), like a connection pool"""
+
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        self.connections = asyncio.Semaphore(concurrency)
+        yield
+        self.connections = None
+
+    async def asearch_embedding(self, query: list[float], k: int = 100, filters: dict | None = None) -> list[int]:
+        async with self.connections:
+            await asyncio.sleep(SEARCH_LATENCY)
+        return list(range(k))
+
+
+class TestAsyncSearch:
+    def test_sync_client_rejected(self):
+        with pytest.raises(NotImplementedError, match="doesn't implement asearch_embedding"):
+            AsyncSearchRunner(Test(4, {}, None), [[0.0] * 4])
+
+    def test_concurrent_searches_in_flight(self):
+        runner = AsyncSearchRunner(
+            FakeAsyncDB(4, {}, None), [[0.0] * 4, [1.0] * 4], k=10, concurrencies=[1, 8], duration=1
+        )
+        assert runner._coroutines_per_process() == 8
+        results = runner.run()
+        conc_qps_list = results["conc_qps_list"]
+
+        assert results["conc_num_list"] == [1, 8]
+        # the 8 coroutines overlap on the event loop, with a connection each
+        assert conc_qps_list[0] < 1 / SEARCH_LATENCY
+        assert conc_qps_list[1] > 4 * conc_qps_list[0]
+        assert results["qps"] == conc_qps_list[1]
@@ -0,0 +1,70 @@
+import numpy as np
+
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.batch_runner import BatchSearchRunner
+
+TRAIN = np.random.default_rng(0).random((200, 4), dtype=np.float32)
+QUERIES = np.random.default_rng(1).random((7, 4), dtype=np.float32)
+K = 5
+
+
+def exact_top_k(query: np.ndarray, k: int) -> list[int]:
+    return np.argsort(((TRAIN - query) ** 2).sum(axis=1))[:k].tolist()
+
+
+class ExactDB(Test):
+    """Searches one query at a time by brute force, batched by the default search_embeddings"""
+
+    def search_embedding(self, query: list[float], k: int = 100, filters: dict | None = None, **kwargs) -> list[int]:
+        assert isinstance(query, list)
+        return exact_top_k(np.asarray(query, dtype=np.float32), k)
+
+
+class BatchDB(ExactDB):
+    """Records the number of queries of each batched request, the last query gets one wrong id"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def search_embeddings(self, queries: np.ndarray, k: int = 100, filters: dict | None = None) -> list[list[int]]:
+        self.requests.append(len(queries))
+        results = [exact_top_k(query, k) for query in queries]
+        if np.array_equal(queries[-1], QUERIES[-1]):
+            results[-1][-1] = -1
+        return results
+
+
+class TestBatchSearch:
+    def test_default_search_embeddings(self):
+        db = ExactDB(4, {}, None)
+        assert db.search_embeddings(QUERIES, K) == [exact_top_k(query, K) for query in QUERIES]
+
+    def test_requests_of_each_batch_size(self):
+        db = BatchDB(4, {}, None)
+        runner = BatchSearchRunner(db, QUERIES, ground_truth=None, batch_sizes=[1, 3, 10], k=K)
+        for batch_size, requests in [(1, [1] * 7), (3, [3, 3, 1]), (10, [7])]:
+            db.requests.clear()
+            got, latencies = runner._search_batches(batch_size)
+            assert db.requests == requests
+            assert latencies.count == len(requests)
+            assert got.tolist() == [exact_top_k(query, K) for query in QUERIES[:-1]] + [
+                [*exact_top_k(QUERIES[-1], K)[:-1], -1]
+            ]
+
+    def test_recall_against_ground_truth(self):
+        gt = np.array([exact_top_k(query, K) for query in QUERIES])
+        batch_size_list, vps_list, p50_list, p99_list, recall_list = BatchSearchRunner(
+            BatchDB(4, {}, None), QUERIES, ground_truth=gt, batch_sizes=[1, 7], k=K
+        ).search()
+
+        assert batch_size_list == [1, 7]
+        assert all(vps > 0 for vps in vps_list)
+        assert all(p50 <= p99 for p50, p99 in zip(p50_list, p99_list, strict=True))
+        # 1 wrong id out of the K of 1 query out of 7
+        assert recall_list == [round(1 - 1 / K / len(QUERIES), 4)] * 2
+
+        (_, _, _, _, recall_list), _ = BatchSearchRunner(
+            ExactDB(4, {}, None), QUERIES, ground_truth=gt, batch_sizes=[3], k=K
+        ).run()
+        assert recall_list == [1.0]
@@ -1,5 +1,15 @@
-from vectordb_bench.backend.dataset import Dataset
+from vectordb_bench.backend.cases import DeletePattern, PerformanceCustomDataset
+from vectordb_bench.backend import dataset
+from vectordb_bench import config
+from vectordb_bench.backend.dataset import DataSetIterator, Dataset, DatasetManager, record_batch_to_arrays
+from vectordb_bench.backend.dataset_cache import NpyCache, files_fingerprint
 import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 import pytest
 from pydantic import ValidationError
 from vectordb_bench.backend.data_source import DatasetSource
@@ -75,3 +85,154 @@ class TestDataSet:
             local_ds_root=openai_50k.data_dir,
         )
 
+
+class TestNpyCache:
+    def test_build_and_invalidate(self, tmp_path: Path):
+        source = tmp_path / "test.parquet"
+        source.write_bytes(b"v1")
+        cache = NpyCache(tmp_path / "cache", "test", [source])
+        assert not cache.exists()
+
+        with cache.build() as tmp_dir:
+            np.save(tmp_dir / "emb.npy", np.ones((2, 4), dtype=np.float32))
+        assert cache.exists()
+        assert isinstance(cache.load("emb"), np.memmap)
+        assert NpyCache(tmp_path / "cache", "test", [source]).exists()
+
+        source.write_bytes(b"v2 changed")
+        assert not NpyCache(tmp_path / "cache", "test", [source]).exists()
+
+    def test_parquet_fingerprint(self, tmp_path: Path):
+        source = tmp_path / "train.parquet"
+        pd.DataFrame({"id": np.arange(100), "emb": list(np.zeros((100, 4), dtype=np.float32))}).to_parquet(source)
+        fingerprint = files_fingerprint([source])
+
+        # the same content again, only newer
+        os.utime(source, ns=(0, 0))
+        assert files_fingerprint([source]) == fingerprint
+
+        # other values of the same size change the column statistics in the footer
+        size = source.stat().st_size
+        pd.DataFrame({"id": np.arange(100), "emb": list(np.ones((100, 4), dtype=np.float32))}).to_parquet(source)
+        assert source.stat().st_size == size
+        assert files_fingerprint([source]) != fingerprint
+
+    def test_failed_build_leaves_no_cache(self, tmp_path: Path):
+        source = tmp_path / "train.parquet"
+        source.write_bytes(b"v1")
+        cache = NpyCache(tmp_path / "cache", "train", [source])
+        with pytest.raises(RuntimeError), cache.build():
+            raise RuntimeError
+        assert not cache.exists()
+
+
+class TestArrayDataSetIterator:
+    @staticmethod
+    def dataset(tmp_path: Path) -> tuple[DatasetManager, np.ndarray]:
+        """1000 train rows in 2 files of 700 and 300 rows"""
+        emb = np.random.default_rng(0).random((1000, 8), dtype=np.float32)
+        for i, rows in enumerate([slice(0, 700), slice(700, 1000)]):
+            pd.DataFrame({"id": np.arange(1000)[rows], "emb": list(emb[rows])}).to_parquet(
+                tmp_path / f"train-0{i}-of-02.parquet"
+            )
+        dataset_config = {
+            "name": "arrays",
+            "dir": str(tmp_path),
+            "size": 1000,
+            "dim": 8,
+            "metric_type": "L2",
+            "file_count": 2,
+            "use_shuffled": False,
+            "with_gt": False,
+        }
+        ca = PerformanceCustomDataset("arrays", "", 3600, 3600, dataset_config)
+        ca.dataset.prepare()
+        return ca.dataset, emb
+
+    def test_record_batch_to_arrays(self):
+        emb = np.arange(12, dtype=np.float32).reshape(3, 4)
+        batch = pa.RecordBatch.from_pandas(pd.DataFrame({"id": [7, 8, 9], "emb": list(emb)}))
+        ids, vectors = record_batch_to_arrays(batch)
+        assert ids.tolist() == [7, 8, 9]
+        assert vectors.dtype == np.float32
+        assert np.array_equal(vectors, emb)
+        # a view of the Arrow values buffer, not a copy
+        assert not vectors.flags.owndata
+
+        batch = pa.RecordBatch.from_pydict({"id": [1, 2], "emb": [[0.0, 1.0], None]})
+        with pytest.raises(ValueError, match="null values"):
+            record_batch_to_arrays(batch)
+
+    @pytest.mark.parametrize("use_cache", [False, True], ids=["parquet", "cache"])
+    def test_iter_arrays(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_cache: bool):
+        monkeypatch.setattr(config, "USE_DATASET_CACHE", use_cache)
+        monkeypatch.setattr(config, "DATASET_CACHE_DIR", tmp_path / "cache")
+        manager, emb = self.dataset(tmp_path)
+        assert (manager.train_cache is not None) == use_cache
+
+        batches = list(manager.iter_arrays(256))
+        assert all(0 < len(ids) <= 256 for ids, _ in batches)
+        ids = np.concatenate([ids for ids, _ in batches])
+        vectors = np.concatenate([vectors for _, vectors in batches])
+        assert ids.tolist() == list(range(1000))
+        assert vectors.dtype == np.float32
+        assert np.array_equal(vectors, emb)
+
+        # the DataFrame iterator reads the same rows
+        frames = list(DataSetIterator(manager, 256))
+        assert np.array_equal(np.stack(pd.concat(frames)["emb"]), emb)
+
+        assert manager.train_ids().tolist() == list(range(1000))
+
+
+class TestDeleteCase:
+    @staticmethod
+    def case(tmp_path: Path, metric_type: str = "L2", **kwargs) -> PerformanceCustomDataset:
+        rng = np.random.default_rng(0)
+        pd.DataFrame({"id": np.arange(1000), "emb": list(rng.random((1000, 8), dtype=np.float32))}).to_parquet(
+            tmp_path / "train.parquet"
+        )
+        dataset_config = {
+            "name": "delete",
+            "dir": str(tmp_path),
+            "size": 1000,
+            "dim": 8,
+            "metric_type": metric_type,
+            "file_count": 1,
+            "use_shuffled": False,
+            "with_gt": False,
+        }
+        ca = PerformanceCustomDataset("delete", "", 3600, 3600, dataset_config, **kwargs)
+        ca.dataset.prepare()
+        return ca
+
+    def test_delete_ids(self, tmp_path: Path):
+        ca = self.case(tmp_path, delete_rate=0.1)
+        ids = ca.delete_ids()
+        assert len(ids) == len(np.unique(ids)) == 100
+        assert np.array_equal(ids, ca.delete_ids())
+
+        ca.delete_pattern = DeletePattern.RANGE
+        ids = ca.delete_ids()
+        assert ids.tolist() == [i * 100 + j for i in range(10) for j in range(10)]
+
+    @pytest.mark.parametrize("metric_type", ["L2", "COSINE", "IP"], ids=["l2", "cosine", "ip"])  # dirs are lowercased
+    def test_compute_ground_truth(self, tmp_path: Path, metric_type: str, monkeypatch: pytest.MonkeyPatch):
+        # several train and query batches, the top k is merged across them
+        monkeypatch.setattr(dataset, "GROUND_TRUTH_BATCH_SIZE", 300)
+        monkeypatch.setattr(dataset, "GROUND_TRUTH_QUERY_BATCH_SIZE", 2)
+        ca = self.case(tmp_path, metric_type)
+        train = np.stack(pd.read_parquet(tmp_path / "train.parquet")["emb"])
+        queries = np.random.default_rng(1).random((5, 8), dtype=np.float32)
+        excluded = np.arange(0, 1000, 3)
+
+        gt = ca.dataset.compute_ground_truth(queries, 10, excluded_ids=excluded, min_id=200)
+        if metric_type == "L2":
+            dist = ((queries[:, np.newaxis] - train) ** 2).sum(axis=2)
+        elif metric_type == "COSINE":
+            dist = -(queries @ train.T) / np.linalg.norm(queries, axis=1)[:, np.newaxis] / np.linalg.norm(train, axis=1)
+        else:
+            dist = -(queries @ train.T)
+        dist[:, excluded] = np.inf
+        dist[:, :200] = np.inf
+        assert gt.tolist() == np.argsort(dist, axis=1)[:, :10].tolist()
@@ -0,0 +1,50 @@
+import threading
+from multiprocessing.connection import Listener
+
+import pytest
+
+from vectordb_bench import config
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.distributed_runner import (
+    DistributedSearchRunner,
+    _serve_coordinator,
+    serve_agent,
+)
+from vectordb_bench.backend.runner.mp_runner import MultiProcessingSearchRunner
+
+
+class TestDistributedSearch:
+    def test_authkey_required(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(config, "AGENT_AUTHKEY", None)
+        runner = MultiProcessingSearchRunner(Test(4, {}, None), [[0.0] * 4])
+        with pytest.raises(ValueError, match="AGENT_AUTHKEY is not set"):
+            serve_agent(port=0)
+        with pytest.raises(ValueError, match="AGENT_AUTHKEY is not set"):
+            DistributedSearchRunner(runner, agents=["127.0.0.1:9123"])
+
+    def test_coordinator_and_agents(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(config, "AGENT_AUTHKEY", "test-key")
+        monkeypatch.setattr(config, "AGENT_START_DELAY", 0.1)
+
+        listeners = [Listener(("127.0.0.1", 0), authkey=b"test-key") for _ in range(2)]
+
+        def serve(listener: Listener):
+            with listener, listener.accept() as conn:
+                _serve_coordinator(conn)
+
+        agents = [threading.Thread(target=serve, args=(listener,), daemon=True) for listener in listeners]
+        for agent in agents:
+            agent.start()
+
+        runner = MultiProcessingSearchRunner(
+            Test(4, {}, None), [[0.0] * 4, [1.0] * 4], k=10, concurrencies=[1, 2], duration=1
+        )
+        addresses = [f"{host}:{port}" for host, port in (listener.address for listener in listeners)]
+        results = DistributedSearchRunner(runner, agents=addresses).run()
+        for agent in agents:
+            agent.join(timeout=30)
+            assert not agent.is_alive()
+
+        assert results["conc_num_list"] == [1, 2]
+        assert all(qps > 0 for qps in results["conc_qps_list"])
+        assert results["qps"] == max(results["conc_qps_list"])
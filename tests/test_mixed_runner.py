@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.mixed_runner import MixedWorkloadRunner
+from vectordb_bench.backend.runner.util import SharedArray
+from vectordb_bench.models import WorkloadOp
+
+
+class Dataset:
+    def iter_arrays(self):
+        ids = np.arange(10)
+        yield ids, np.stack([ids, ids]).T.astype(np.float32)
+
+
+class FailAfterDeleteDB(Test):
+    """Logs its writes to a file shared by the worker processes, and fails the first search after a delete"""
+
+    def __init__(self, log_file: Path):
+        super().__init__(2, {}, None)
+        self.log_file = log_file
+        self.deleted = False
+
+    def _log(self, op: str, ids: list[int]):
+        with self.log_file.open("a") as f:
+            f.writelines(f"{op} {i}\n" for i in ids)
+
+    def upsert_embeddings(self, embeddings: list[list[float]], metadata: list[int], **kwargs):
+        self._log("upsert", metadata)
+        return len(metadata), None
+
+    def delete_embeddings(self, ids: list[int], **kwargs):
+        self._log("delete", ids)
+        self.deleted = True
+        return len(ids), None
+
+    def search_embedding(self, query: list[float], k: int = 100, filters: dict | None = None, **kwargs):
+        if self.deleted:
+            msg = "search after delete"
+            raise RuntimeError(msg)
+        return list(range(k))
+
+
+class FailRestoreDB(FailAfterDeleteDB):
+    def upsert_embeddings(self, embeddings: list[list[float]], metadata: list[int], **kwargs):
+        msg = "upsert failed"
+        raise RuntimeError(msg)
+
+
+class TestMixedWorkload:
+    def test_parse_ratios(self):
+        ratios = WorkloadOp.parse_ratios("search=8, upsert=1.5,delete=0.5,")
+        assert ratios == pytest.approx({WorkloadOp.SEARCH: 0.8, WorkloadOp.UPSERT: 0.15, WorkloadOp.DELETE: 0.05})
+        assert WorkloadOp.parse_ratios("search=1,delete=0") == {WorkloadOp.SEARCH: 1.0}
+        for spec in ["insert=1", "search=x", "search=0", "search=1,delete=-1"]:
+            with pytest.raises(ValueError, match="workload ratio"):
+                WorkloadOp.parse_ratios(spec)
+
+    def test_live_recall(self):
+        ground_truth = np.array([[3, 1, 4, 9], [5, 9, 2, 6]])
+        runner = MixedWorkloadRunner(
+            Test(2, {}, None), [[0.0, 0.0], [1.0, 1.0]], ground_truth, Dataset(), {WorkloadOp.SEARCH: 1.0}, k=2
+        )
+        assert runner.pool_ids.tolist() == [1, 3, 5, 9]
+
+        deleted = SharedArray(np.zeros(len(runner.pool_ids)), dtype=np.bool_)
+        try:
+            assert runner._live_recall(0, [3, 4], deleted) == 0.5
+            deleted.array[runner._pool_pos[1]] = True
+            assert runner._live_recall(0, [3, 4], deleted) == 1.0
+            deleted.array[runner._pool_pos[3]] = True
+            assert runner._live_recall(0, [4, 9], deleted) == 1.0
+        finally:
+            deleted.close()
+
+    def test_workers_own_rows(self):
+        ground_truth = np.array([[3, 1, 4, 9], [5, 9, 2, 6]])
+        test_data = [[0.0, 0.0], [1.0, 1.0]]
+        ratios = {WorkloadOp.SEARCH: 0.5, WorkloadOp.DELETE: 0.5}
+        with pytest.raises(ValueError, match="can't own a row each of the 4 rows"):
+            MixedWorkloadRunner(Test(2, {}, None), test_data, ground_truth, Dataset(), ratios, num_workers=5, k=2)
+
+        runner = MixedWorkloadRunner(Test(2, {}, None), test_data, ground_truth, Dataset(), ratios, num_workers=4, k=2)
+        assert runner.num_workers == len(runner.pool_ids)
+
+    @staticmethod
+    def failing_runner(db: FailAfterDeleteDB) -> MixedWorkloadRunner:
+        return MixedWorkloadRunner(
+            db,
+            [[0.0, 0.0], [1.0, 1.0]],
+            np.array([[3, 1, 4, 9], [5, 9, 2, 6]]),
+            Dataset(),
+            {WorkloadOp.SEARCH: 0.5, WorkloadOp.DELETE: 0.5},
+            rate=100,
+            num_workers=2,
+            duration=10,
+            k=2,
+        )
+
+    def test_restore_after_failure(self, tmp_path: Path):
+        log_file = tmp_path / "writes.log"
+        with pytest.raises(RuntimeError, match="search after delete"):
+            self.failing_runner(FailAfterDeleteDB(log_file)).run()
+
+        writes = [line.split() for line in log_file.read_text().splitlines()]
+        deleted = {row_id for op, row_id in writes if op == "delete"}
+        assert deleted
+        assert {row_id for op, row_id in writes if op == "upsert"} == deleted
+
+    def test_failed_restore_keeps_the_error(self, tmp_path: Path):
+        with pytest.raises(RuntimeError, match="search after delete"):
+            self.failing_runner(FailRestoreDB(tmp_path / "writes.log")).run()
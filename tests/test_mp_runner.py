@@ -0,0 +1,173 @@
+import contextlib
+import multiprocessing as mp
+import time
+
+import pytest
+
+from vectordb_bench.backend.clients.api import SearchPhase
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.mp_runner import MultiProcessingSearchRunner, SearchWorkerPool
+from vectordb_bench.metric import Metric
+from vectordb_bench.models import ConcurrencySlotTimeoutError, LatencySLO
+
+
+class TestAdaptiveConcurrency:
+    @staticmethod
+    def sweep(runner: MultiProcessingSearchRunner) -> tuple[list[int], int]:
+        """qps saturates at concurrency 24, p99 grows 1ms per concurrency"""
+        measured, order = {}, []
+        for conc in runner._adaptive_concurrencies(measured):
+            order.append(conc)
+            measured[conc] = (min(conc, 24) * 100.0, conc * 0.001)
+        return order, runner._saturation_concurrency(measured)
+
+    def test_refine_around_knee(self):
+        runner = MultiProcessingSearchRunner(Test(16, {}, None), [[0.0] * 16], concurrencies=[1, 100], adaptive=True)
+        order, saturation = self.sweep(runner)
+        assert order == [1, 2, 4, 8, 16, 32, 64, 24, 48, 20, 28]
+        assert saturation == 24
+
+    def test_latency_limit(self):
+        runner = MultiProcessingSearchRunner(
+            Test(16, {}, None),
+            [[0.0] * 16],
+            concurrencies=[1, 100],
+            adaptive=True,
+            saturation_latency_limit=0.01,
+        )
+        order, saturation = self.sweep(runner)
+        assert order[:5] == [1, 2, 4, 8, 16]
+        assert saturation == 10
+
+
+class PhasedDB(Test):
+    def search_embedding(self, query: list[float], k: int = 100, filters: dict | None = None, **kwargs) -> list[int]:
+        with self.phase(SearchPhase.WAIT):
+            time.sleep(0.001)
+        return list(range(k))
+
+
+class TestResultsByName:
+    @pytest.fixture(scope="class")
+    def metric(self) -> Metric:
+        runner = MultiProcessingSearchRunner(
+            PhasedDB(4, {}, None),
+            [[0.0] * 4, [1.0] * 4],
+            k=10,
+            concurrencies=[1, 2],
+            duration=1,
+            warmup_duration=1,
+            latency_slos=[LatencySLO.parse("p99<=10s")],
+        )
+        m = Metric()
+        m.update(runner.run())
+        return m
+
+    def test_latencies(self, metric: Metric):
+        assert metric.conc_num_list == [1, 2]
+        assert metric.qps == max(metric.conc_qps_list)
+        for p50, p90, p95, p99, p999, latency_max in zip(
+            metric.conc_latency_p50_list,
+            metric.conc_latency_p90_list,
+            metric.conc_latency_p95_list,
+            metric.conc_latency_p99_list,
+            metric.conc_latency_p999_list,
+            metric.conc_latency_max_list,
+            strict=True,
+        ):
+            assert p50 <= p90 <= p95 <= p99 <= p999 <= latency_max
+        assert len(metric.conc_latency_avg_list) == 2
+
+    def test_warm_up(self, metric: Metric):
+        assert len(metric.conc_warmup_qps_list) == len(metric.conc_warmup_latency_p99_list) == 2
+        assert all(qps > 0 for qps in metric.conc_warmup_qps_list)
+
+    def test_qps_timeline(self, metric: Metric):
+        assert len(metric.conc_qps_timeline_list) == 2
+        assert all(sum(timeline) > 0 for timeline in metric.conc_qps_timeline_list)
+
+    def test_saturation_concurrency(self, metric: Metric):
+        assert metric.saturation_concurrency == metric.conc_num_list[metric.conc_qps_list.index(metric.qps)]
+
+    def test_slo_qps(self, metric: Metric):
+        # every concurrency is far within the slo
+        assert metric.slo_qps_list == [metric.qps]
+
+    def test_client_usage(self, metric: Metric):
+        assert len(metric.conc_client_cpu_list) == len(metric.conc_client_ctx_switch_list) == 2
+        assert all(cpu >= 0 for cpu in metric.conc_client_cpu_list)
+        assert isinstance(metric.client_bound, bool)
+
+    def test_phase_latencies(self, metric: Metric):
+        encode, wait, decode = metric.conc_phase_latency_list
+        assert encode == decode == 0.0
+        assert wait >= 0.001
+
+
+class FailingInitDB(Test):
+    @contextlib.contextmanager
+    def init(self):
+        msg = "init failed"
+        raise RuntimeError(msg)
+        yield
+
+
+class SlowInitDB(Test):
+    @contextlib.contextmanager
+    def init(self):
+        time.sleep(3600)
+        yield
+
+
+class TestSearchWorkerPool:
+    @pytest.mark.parametrize(
+        ("db_cls", "timeout", "error"),
+        [(FailingInitDB, 60, RuntimeError), (SlowInitDB, 2, ConcurrencySlotTimeoutError)],
+        ids=["init_error", "init_timeout"],
+    )
+    def test_failed_start_tears_down(self, db_cls: type[Test], timeout: int, error: type[Exception]):
+        runner = MultiProcessingSearchRunner(db_cls(4, {}, None), [[0.0] * 4], concurrencies=[2])
+        pool = SearchWorkerPool(runner, size=2, timeout=timeout)
+        with pytest.raises(error), pool:
+            pass
+        runner.stop()
+
+        assert pool._executor is None
+        assert pool._manager is None
+        assert mp.active_children() == []
+
+
+COLD_SEARCHES, COLD_LATENCY = 10, 0.05
+
+
+class ColdDB(Test):
+    """The first COLD_SEARCHES searches of each connection are slow, like a cold cache"""
+
+    @contextlib.contextmanager
+    def init(self):
+        self.searches = 0
+        yield
+
+    def search_embedding(self, query: list[float], k: int = 100, filters: dict | None = None, **kwargs) -> list[int]:
+        self.searches += 1
+        time.sleep(COLD_LATENCY if self.searches <= COLD_SEARCHES else 0.001)
+        return list(range(k))
+
+
+class TestWarmUp:
+    @pytest.mark.parametrize("warmup_duration", [0, 1], ids=["cold", "warm"])
+    def test_warm_up_excluded(self, warmup_duration: int):
+        runner = MultiProcessingSearchRunner(
+            ColdDB(4, {}, None), [[0.0] * 4], concurrencies=[1], duration=1, warmup_duration=warmup_duration
+        )
+        results = runner.run()
+
+        if warmup_duration == 0:
+            assert results["conc_warmup_qps_list"] == []
+            assert results["conc_latency_max_list"][0] >= COLD_LATENCY
+            return
+        # the cold searches all fall into the warm-up, of the same worker connections
+        assert len(results["conc_warmup_qps_list"]) == len(results["conc_warmup_latency_p99_list"]) == 1
+        assert results["conc_warmup_latency_p99_list"][0] >= COLD_LATENCY
+        assert results["conc_latency_p99_list"][0] < COLD_LATENCY
+        assert results["conc_qps_list"][0] > results["conc_warmup_qps_list"][0]
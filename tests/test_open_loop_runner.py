@@ -0,0 +1,79 @@
+import random
+import time
+
+import pytest
+
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.open_loop_runner import OpenLoopSearchRunner
+from vectordb_bench.models import ArrivalDistribution
+
+SLOW_SEARCH_LATENCY = 0.02
+
+
+class SlowDB(Test):
+    def search_embedding(self, query: list[float], k: int = 100, filters: dict | None = None, **kwargs) -> list[int]:
+        time.sleep(SLOW_SEARCH_LATENCY)
+        return list(range(k))
+
+
+def open_loop_runner(db: Test, distribution: ArrivalDistribution = ArrivalDistribution.CONSTANT, **kwargs):
+    return OpenLoopSearchRunner(db, [[0.0] * 4, [1.0] * 4], k=10, distribution=distribution, **kwargs)
+
+
+class TestOpenLoopScheduler:
+    def test_every_arrival_sent_or_dropped(self):
+        runner = open_loop_runner(Test(4, {}, None), target_qps=[200], num_workers=1)
+        count, dur, latencies, late, dropped, series = runner.search_open_loop(
+            runner.test_data, 0, rate=200, duration=0.5
+        )
+
+        # 0.5s at 200 qps is 100 arrivals, give or take the one at the very end, each sent or dropped
+        assert abs(count + dropped - 100) <= 1
+        assert count >= 90
+        assert dur >= 0.45
+        assert latencies.count == sum(series.counts) == count
+        assert late < count
+
+    def test_queueing_counted_in_latency(self):
+        runner = open_loop_runner(SlowDB(4, {}, None), target_qps=[100], num_workers=1)
+        count, _, latencies, late, dropped, _ = runner.search_open_loop(runner.test_data, 0, rate=100, duration=0.5)
+
+        # an arrival every 0.01s, a search every 0.02s: the queries fall behind their schedule
+        assert abs(count + dropped - 50) <= 1
+        assert count <= 26
+        assert late >= count - 2
+        # the wait behind the previous queries is part of the latency, not just the 0.02s of the search
+        (p99,) = latencies.percentiles([99])
+        assert p99 > 5 * SLOW_SEARCH_LATENCY
+
+    def test_workers_share_the_rate(self):
+        runner = open_loop_runner(Test(4, {}, None), target_qps=[200], num_workers=4)
+        results = [
+            runner.search_open_loop(runner.test_data, worker_id, rate=200, duration=0.5) for worker_id in range(4)
+        ]
+        # each worker sends a quarter of the arrivals, offset within one interval
+        assert all(abs(r[0] + r[4] - 25) <= 1 for r in results)
+
+    def test_poisson_mean_rate(self):
+        random.seed(0)
+        runner = open_loop_runner(Test(4, {}, None), ArrivalDistribution.POISSON, target_qps=[1000], num_workers=1)
+        count, _, _, _, dropped, _ = runner.search_open_loop(runner.test_data, 0, rate=1000, duration=0.5)
+        assert 400 < count + dropped < 600
+
+
+class TestOpenLoopSearch:
+    @pytest.mark.parametrize("distribution", list(ArrivalDistribution))
+    def test_target_rates(self, distribution: ArrivalDistribution):
+        runner = open_loop_runner(Test(4, {}, None), distribution, target_qps=[20, 50], num_workers=2, duration=1)
+        results = runner.run()
+
+        assert results["open_loop_target_qps_list"] == [20, 50]
+        assert len(results["open_loop_qps_list"]) == len(results["open_loop_dropped_list"]) == 2
+        assert len(results["open_loop_qps_timeline_list"]) == 2
+        # nowhere near saturation, the achieved qps follows the target
+        for target, qps in zip([20, 50], results["open_loop_qps_list"], strict=True):
+            assert 0.5 * target < qps <= 1.5 * target
+        for p50, p999 in zip(
+            results["open_loop_latency_p50_list"], results["open_loop_latency_p999_list"], strict=True
+        ):
+            assert p50 <= p999
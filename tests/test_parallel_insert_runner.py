@@ -0,0 +1,102 @@
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vectordb_bench import config
+from vectordb_bench.backend.cases import PerformanceCustomDataset
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.dataset import DatasetManager
+from vectordb_bench.backend.runner.parallel_insert_runner import ParallelInsertRunner
+from vectordb_bench.models import PerformanceTimeoutError
+
+SLOW_INSERT_LATENCY = 5
+
+
+class SlowInsertDB(Test):
+    def insert_embeddings_array(self, ids: np.ndarray, vectors: np.ndarray, **kwargs) -> tuple[int, Exception | None]:
+        time.sleep(SLOW_INSERT_LATENCY)
+        return len(ids), None
+
+
+def train_dataset(tmp_path: Path, size: int = 800) -> DatasetManager:
+    """`size` train rows in 2 files of row groups of 100 rows, 4 each by default"""
+    emb = np.random.default_rng(0).random((size, 4), dtype=np.float32)
+    for i in range(2):
+        rows = slice(i * size // 2, (i + 1) * size // 2)
+        pd.DataFrame({"id": np.arange(size)[rows], "emb": list(emb[rows])}).to_parquet(
+            tmp_path / f"train-0{i}-of-02.parquet",
+            row_group_size=100,
+        )
+    dataset_config = {
+        "name": "parallel",
+        "dir": str(tmp_path),
+        "size": size,
+        "dim": 4,
+        "metric_type": "L2",
+        "file_count": 2,
+        "use_shuffled": False,
+        "with_gt": False,
+    }
+    ca = PerformanceCustomDataset("parallel", "", 3600, 3600, dataset_config)
+    ca.dataset.prepare()
+    return ca.dataset
+
+
+class TestSplitShards:
+    def test_row_groups(self, tmp_path: Path):
+        runner = ParallelInsertRunner(Test(4, {}, None), train_dataset(tmp_path), False, concurrency=4)
+        assert runner._split_shards() == [
+            [("train-00-of-02.parquet", [0, 1])],
+            [("train-00-of-02.parquet", [2, 3])],
+            [("train-01-of-02.parquet", [0, 1])],
+            [("train-01-of-02.parquet", [2, 3])],
+        ]
+
+        # a shard may span two files
+        runner.concurrency = 3
+        assert runner._split_shards() == [
+            [("train-00-of-02.parquet", [0, 1, 2])],
+            [("train-00-of-02.parquet", [3]), ("train-01-of-02.parquet", [0, 1])],
+            [("train-01-of-02.parquet", [2, 3])],
+        ]
+
+    def test_more_processes_than_row_groups(self, tmp_path: Path):
+        runner = ParallelInsertRunner(Test(4, {}, None), train_dataset(tmp_path), False, concurrency=10)
+        shards = runner._split_shards()
+        assert len(shards) == 8
+        assert all(len(rgs) == 1 for shard in shards for _, rgs in shard)
+
+    def test_cached_rows(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(config, "USE_DATASET_CACHE", True)
+        monkeypatch.setattr(config, "DATASET_CACHE_DIR", tmp_path / "cache")
+        runner = ParallelInsertRunner(Test(4, {}, None), train_dataset(tmp_path), False, concurrency=3)
+        assert runner._split_shards() == [(0, 266), (266, 533), (533, 800)]
+
+    @pytest.mark.parametrize("use_cache", [False, True], ids=["parquet", "cache"])
+    def test_no_rows(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_cache: bool):
+        monkeypatch.setattr(config, "USE_DATASET_CACHE", use_cache)
+        monkeypatch.setattr(config, "DATASET_CACHE_DIR", tmp_path / "cache")
+        runner = ParallelInsertRunner(Test(4, {}, None), train_dataset(tmp_path, size=0), False, concurrency=3)
+        with pytest.raises(ValueError, match="No train rows to load"):
+            runner._split_shards()
+
+
+class TestParallelInsert:
+    def test_insert_all_shards(self, tmp_path: Path):
+        runner = ParallelInsertRunner(Test(4, {}, None), train_dataset(tmp_path), False, concurrency=2, batch_size=64)
+        assert runner.run() == 800
+        _, rows_per_sec_list, _, _ = runner.timeline.to_tuple()
+        assert sum(rows_per_sec_list) > 0
+
+    def test_timeout_kills_the_shards(self, tmp_path: Path):
+        runner = ParallelInsertRunner(
+            SlowInsertDB(4, {}, None), train_dataset(tmp_path), False, concurrency=2, timeout=1, batch_size=50
+        )
+        start = time.perf_counter()
+        with pytest.raises(PerformanceTimeoutError):
+            runner.run()
+        # the shards are killed, not waited for through their 8 batches of SLOW_INSERT_LATENCY each
+        assert time.perf_counter() - start < 4 * SLOW_INSERT_LATENCY
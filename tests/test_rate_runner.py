@@ -1,9 +1,19 @@
 from typing import Iterable
 import argparse
+import contextlib
+import queue
+import threading
+import time
+
+import pandas as pd
+import pytest
 from vectordb_bench.backend.dataset import Dataset, DatasetSource
 from vectordb_bench.backend.runner.rate_runner import RatedMultiThreadingInsertRunner
 from vectordb_bench.backend.runner.read_write_runner import ReadWriteRunner
+from vectordb_bench.backend.runner import util
+from vectordb_bench.backend.runner.util import TokenBucket
 from vectordb_bench.backend.clients import DB, VectorDB
+from vectordb_bench.backend.clients.test.test import Test
 from vectordb_bench.backend.clients.milvus.config import FLATConfig
 from vectordb_bench.backend.clients.zilliz_cloud.config import AutoIndexConfig
 
@@ -59,6 +69,88 @@ def get_db(db: str, config: dict) -> VectorDB:
         raise ValueError(f"unknown db: {db}")
 
 
+class FakeClock:
+    """Stands in for the time module of the TokenBucket, sleeping only moves the clock forward"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class TestRatedInsert:
+    def test_token_bucket(self, monkeypatch: pytest.MonkeyPatch):
+        clock = FakeClock()
+        monkeypatch.setattr(util, "time", clock)
+
+        bucket = TokenBucket(rate=1000, capacity=100)
+        waits = [bucket.acquire(100) for _ in range(5)]
+        # the first batch is in the full bucket, the next ones every 0.1s
+        assert waits == pytest.approx([0, 0.1, 0.1, 0.1, 0.1])
+        assert clock.now == pytest.approx(0.4)
+
+        # idle time refills up to the capacity only
+        clock.sleep(10)
+        assert bucket.acquire(100) == 0
+        assert bucket.acquire(100) == pytest.approx(0.1)
+
+        # a batch larger than the capacity waits for the tokens it lacks
+        bucket = TokenBucket(rate=100, capacity=10)
+        assert bucket.acquire(10) == 0
+        assert bucket.acquire(20) == pytest.approx(0.2)
+
+    def test_run_with_rate(self):
+        batches = [pd.DataFrame({"id": range(i * 50, i * 50 + 50), "emb": [[0.0, 1.0]] * 50}) for i in range(12)]
+        runner = RatedMultiThreadingInsertRunner(rate=500, db=Test(2, {}, None), dataset_iter=batches, batch_size=50)
+        q = queue.Queue()
+        results, dur = runner.run_with_rate(q)
+
+        assert results["insert_target_rows_per_sec"] == 500
+        # the first batch is in the full bucket, the next ones at least 0.1s apart, so never faster than the rate
+        assert dur >= 1.1
+        assert 0 < results["insert_rows_per_sec"] <= 600 / 1.1
+        assert results["insert_latency_p50"] <= results["insert_latency_p99"]
+        backlog_time_list = results["insert_backlog_time_list"]
+        assert backlog_time_list == sorted(backlog_time_list)
+        assert len(backlog_time_list) == len(results["insert_backlog_list"]) >= 1
+        assert [q.get() for _ in range(q.qsize())] == [False, True]
+
+    def test_connection_per_thread(self):
+        class ThreadDB(Test):
+            opened, closed = [], []
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.session = {}
+
+            @contextlib.contextmanager
+            def init(self):
+                self.session["thread"] = threading.get_ident()
+                self.opened.append(self)
+                yield
+                self.closed.append(self)
+
+            def insert_embeddings(self, embeddings: list[list[float]], metadata: list[int], **kwargs):
+                assert self.session["thread"] == threading.get_ident()
+                time.sleep(0.01)
+                return len(metadata), None
+
+        db = ThreadDB(2, {}, None)
+        batches = [pd.DataFrame({"id": [i], "emb": [[0.0, 1.0]]}) for i in range(50)]
+        runner = RatedMultiThreadingInsertRunner(
+            rate=10_000, db=db, dataset_iter=batches, batch_size=1, num_threads=4
+        )
+        runner.run_with_rate(queue.Queue())
+
+        assert db not in ThreadDB.opened
+        assert 1 < len(ThreadDB.opened) <= 4
+        assert ThreadDB.closed == ThreadDB.opened[::-1]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-r", "--insert_rate", type=int, default="1000", help="insert entity row count per seconds, cps")
@@ -0,0 +1,53 @@
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+
+from vectordb_bench.backend.clients.api import DBCaseConfig
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.threaded_runner import ThreadedSearchRunner
+
+
+class SessionDB(Test):
+    """Keeps the connection of init() in a mutable session, like the clients holding a session object"""
+
+    def __init__(self, dim: int, db_config: dict, db_case_config: DBCaseConfig, **kwargs):
+        super().__init__(dim, db_config, db_case_config, **kwargs)
+        self.session = {}
+
+    @contextmanager
+    def init(self) -> Generator[None, None, None]:
+        self.session["thread"] = threading.get_ident()
+        yield
+        self.session.clear()
+
+    def search_embedding(self, query: list[float], k: int = 100, filters: dict | None = None, **kwargs) -> list[int]:
+        if self.session.get("thread") != threading.get_ident():
+            msg = "searched on the connection of another thread"
+            raise RuntimeError(msg)
+        time.sleep(0.001)
+        return list(range(k))
+
+
+class TestThreadedSearch:
+    def test_thread_copy_shares_nothing(self):
+        db = SessionDB(4, {}, None)
+        copied = db.thread_copy()
+        assert type(copied) is SessionDB
+        assert copied.session is not db.session
+
+    def test_connection_per_thread(self):
+        runner = ThreadedSearchRunner(
+            SessionDB(4, {}, None),
+            [[0.0] * 4, [1.0] * 4],
+            k=10,
+            concurrencies=[1, 4],
+            duration=1,
+            threads_per_process=4,
+        )
+        assert runner._pool_size() == 1
+
+        results = runner.run()
+        assert results["conc_num_list"] == [1, 4]
+        assert all(qps > 0 for qps in results["conc_qps_list"])
+        assert results["qps"] == max(results["conc_qps_list"])
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.trace_runner import TraceReplayRunner
+
+
+class TestTraceReplay:
+    def test_read_trace(self, tmp_path: Path):
+        trace_file = tmp_path / "trace.parquet"
+        pd.DataFrame(
+            {
+                "timestamp": [12.5, 10.0, 11.0],
+                "query": [[0.0, 1.0], [2.0, 3.0], [4.0, 5.0]],
+                "filter": pd.array([None, 100, None], dtype="Int64"),
+            }
+        ).to_parquet(trace_file)
+
+        trace = TraceReplayRunner._read_trace(str(trace_file), [], k=10)
+        assert trace["offsets"].tolist() == [0.0, 1.0, 2.5]
+        assert trace["vectors"].tolist() == [[2.0, 3.0], [4.0, 5.0], [0.0, 1.0]]
+        assert trace["ks"].tolist() == [10, 10, 10]
+        assert trace["filter_ids"].tolist() == [100, -1, -1]
+
+    def test_query_index_out_of_range(self, tmp_path: Path):
+        trace_file = tmp_path / "trace.parquet"
+        pd.DataFrame({"timestamp": [0.0, 1.0], "query_index": [0, 2]}).to_parquet(trace_file)
+        with pytest.raises(ValueError, match="out of the 2 test queries"):
+            TraceReplayRunner._read_trace(str(trace_file), [[0.0], [1.0]], k=10)
+
+    def test_normalize_trace_queries(self, tmp_path: Path):
+        trace_file = tmp_path / "trace.parquet"
+        pd.DataFrame({"timestamp": [0.0, 1.0], "query": [[3.0, 4.0], [0.0, 2.0]]}).to_parquet(trace_file)
+
+        # the trace is read raw, the runner normalizes it like the test data of the cosine metric
+        assert TraceReplayRunner._read_trace(str(trace_file), [], k=10)["vectors"].tolist() == [[3.0, 4.0], [0.0, 2.0]]
+        runner = TraceReplayRunner(Test(2, {}, None), [], str(trace_file), normalize=True)
+        assert np.allclose(runner.test_data, [[0.6, 0.8], [0.0, 1.0]])
+        runner = TraceReplayRunner(Test(2, {}, None), [], str(trace_file))
+        assert runner.test_data.tolist() == [[3.0, 4.0], [0.0, 2.0]]
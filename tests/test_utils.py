@@ -1,8 +1,37 @@
 import pytest
 import logging
+import multiprocessing as mp
+import pickle
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
 
 from vectordb_bench.backend import utils
-from vectordb_bench.metric import calc_recall
+from vectordb_bench.backend.clients.api import PhaseTimer, SearchPhase
+from vectordb_bench.backend.clients.test.test import Test
+from vectordb_bench.backend.runner.histogram import LatencyHistogram
+from vectordb_bench.backend.runner.mp_runner import MultiProcessingSearchRunner
+from vectordb_bench.backend.runner import util
+from vectordb_bench.backend.runner.util import (
+    ArrayBatcher,
+    InsertTimeline,
+    ProcessUsage,
+    SharedArray,
+    ThroughputSeries,
+)
+from vectordb_bench.models import LatencySLO
+from vectordb_bench.metric import (
+    Metric,
+    calc_mrr_batch,
+    calc_qps_under_latency,
+    calc_ndcg,
+    calc_ndcg_batch,
+    calc_recall,
+    calc_recall_batch,
+    get_ideal_dcg,
+    ground_truth_array,
+)
 
 log = logging.getLogger(__name__)
 
@@ -38,6 +67,266 @@ class TestUtils:
         assert res == expected
 
 
+class TestBatchMetrics:
+    def test_batch_matches_per_query(self):
+        k, nq = 10, 200
+        rng = np.random.default_rng(0)
+        gt = np.stack([rng.choice(50, size=k, replace=False) for _ in range(nq)])
+        got = np.stack([rng.choice(50, size=k, replace=False) for _ in range(nq)])
+        got[::7, 5:] = -1  # fewer results than k
+        ideal_dcg = get_ideal_dcg(k)
+
+        recalls = calc_recall_batch(k, gt, got)
+        ndcgs = calc_ndcg_batch(gt, got, ideal_dcg)
+        for i in range(nq):
+            results = [r for r in got[i].tolist() if r >= 0]
+            assert recalls[i] == pytest.approx(calc_recall(k, gt[i].tolist(), results))
+            assert ndcgs[i] == pytest.approx(calc_ndcg(gt[i].tolist(), results, ideal_dcg))
+
+    def test_mrr(self):
+        gt = ground_truth_array([[1, 2, 3], [4, 5, 6], [7, 8]], k=3)
+        got = np.array([[1, 9, 9], [9, 9, 4], [9, 9, -1]])
+        assert calc_mrr_batch(gt, got).tolist() == pytest.approx([1.0, 1 / 3, 0.0])
+
+    def test_ground_truth_padding(self):
+        gt = ground_truth_array([[1, 2, 3, 4], [5]], k=3)
+        assert gt.tolist() == [[1, 2, 3], [5, -1, -1]]
+        # padding never counts as a hit
+        assert calc_recall_batch(3, gt, np.full((2, 3), -1)).tolist() == [0.0, 0.0]
+
+
+class TestMetric:
+    def test_update_by_name(self):
+        m = Metric(load_duration=1.0)
+        m.update({"qps": 10.0, "conc_num_list": [1, 5]})
+        assert (m.qps, m.conc_num_list, m.load_duration) == (10.0, [1, 5], 1.0)
+
+        with pytest.raises(ValueError, match="unknown metric fields: \\['qsp'\\]"):
+            m.update({"qsp": 1.0})
+        assert m.qps == 10.0
+
+
+class TestArrayBatcher:
+    def test_rebatch(self):
+        ids = np.arange(25)
+        vectors = np.arange(50, dtype=np.float32).reshape(25, 2)
+        arrays = iter([(ids[i : i + 10], vectors[i : i + 10]) for i in range(0, 25, 10)])
+        batcher = ArrayBatcher(arrays)
+
+        first_ids, first_vectors = batcher.take(3)
+        assert first_ids.tolist() == [0, 1, 2]
+        assert first_vectors.shape == (3, 2)
+
+        sizes = [len(b_ids) for b_ids, _ in batcher.batches(8)]
+        assert sizes == [8, 8, 6]
+        assert batcher.take(8) is None
+
+
+def double_shared(shared: SharedArray):
+    shared.array *= 2
+    shared.close()
+
+
+class TestSharedArray:
+    def test_attach_by_name(self):
+        data = np.arange(12, dtype=np.float64).reshape(3, 4)
+        shared = SharedArray(data)
+        name = shared.name
+        try:
+            assert shared.dtype == np.float32
+            assert len(shared) == 3
+            attached = pickle.loads(pickle.dumps(shared))  # noqa: S301
+            assert attached.name == name
+            assert np.array_equal(attached[2], data[2])
+
+            # a process writes through to the same block
+            process = mp.get_context("spawn").Process(target=double_shared, args=(shared,))
+            process.start()
+            process.join(timeout=60)
+            assert process.exitcode == 0
+            attached.close()
+            assert np.array_equal(shared[1], data[1] * 2)
+        finally:
+            shared.close()
+        # the creator released the block
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
+
+    def test_runner_ships_no_test_data(self):
+        runner = MultiProcessingSearchRunner(Test(4, {}, None), np.ones((10_000, 4)))
+        size = len(pickle.dumps(runner))
+        runner._share_test_data()
+        try:
+            assert len(pickle.dumps(runner)) < size - 100_000
+        finally:
+            runner._release_test_data()
+        assert runner._shared_test_data is None
+
+
+class FakeClock:
+    """Stands in for the time module of runner.util, the tests move it forward by hand"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+class TestInsertTimeline:
+    def test_windows(self, monkeypatch: pytest.MonkeyPatch):
+        clock = FakeClock()
+        monkeypatch.setattr(util, "time", clock)
+        timeline = InsertTimeline(interval=1)
+
+        # 2 batches in the first second, none in the second one, then half a window until the end
+        for rows, latency in [(100, 0.1), (300, 0.3)]:
+            clock.now += 0.5
+            timeline.record(rows, latency)
+        clock.now += 1
+        timeline.tick()
+        clock.now += 0.5
+        timeline.record(50, 0.2)
+        timeline.finish()
+
+        time_list, rows_per_sec_list, p50_list, p99_list = timeline.to_tuple()
+        assert time_list == [1.0, 2.0, 2.5]
+        assert rows_per_sec_list == [400.0, 0.0, 100.0]
+        assert p50_list[0] == pytest.approx(0.1, rel=0.01)
+        assert p99_list[0] == pytest.approx(0.3, rel=0.01)
+        assert p50_list[2] == p99_list[2] == pytest.approx(0.2, rel=0.01)
+
+    def test_nothing_left_to_finish(self, monkeypatch: pytest.MonkeyPatch):
+        clock = FakeClock()
+        monkeypatch.setattr(util, "time", clock)
+        timeline = InsertTimeline(interval=1)
+        clock.now += 1
+        timeline.record(10, 0.1)
+        timeline.finish()
+        assert timeline.time_list == [1.0]
+
+
+class TestLatencyHistogram:
+    def test_percentiles_within_precision(self):
+        latencies = np.random.default_rng(0).lognormal(mean=-6, sigma=1, size=10_000)
+        hist = LatencyHistogram()
+        for lat in latencies:
+            hist.record(lat)
+
+        assert hist.count == len(latencies)
+        assert hist.max == latencies.max()
+        assert abs(hist.mean - latencies.mean()) < 1e-9
+        for q in [50, 90, 99, 99.9]:
+            expected = np.percentile(latencies, q, method="inverted_cdf")
+            assert abs(hist.percentile(q) - expected) / expected <= hist.precision
+
+    def test_merge(self):
+        h1, h2 = LatencyHistogram(), LatencyHistogram()
+        for lat in [0.001, 0.002, 0.003]:
+            h1.record(lat)
+        for lat in [0.1, 0.2]:
+            h2.record(lat)
+
+        merged = LatencyHistogram.merge_all([h1, h2])
+        assert merged.count == 5
+        assert merged.min == 0.001
+        assert merged.max == 0.2
+        assert abs(merged.percentile(50) - 0.003) / 0.003 <= merged.precision
+
+    def test_empty(self):
+        assert LatencyHistogram().percentile(99) == 0.0
+        assert LatencyHistogram().mean == 0.0
+
+
+class TestThroughputSeries:
+    def test_merge_aligns_seconds(self):
+        s1, s2 = ThroughputSeries(), ThroughputSeries()
+        for t in [100.1, 100.9, 101.5, 103.2]:
+            s1.record(t)
+        for t in [99.5, 101.0, 101.9]:
+            s2.record(t)
+
+        merged = ThroughputSeries.merge_all([s1, s2, ThroughputSeries()])
+        assert merged.start == 99
+        assert merged.counts == [1, 2, 3, 0, 1]
+
+    def test_steady_qps(self):
+        series = ThroughputSeries()
+        for t in [10.9, 11.1, 11.5, 12.2, 12.4, 13.0]:
+            series.record(t)
+
+        assert series.counts == [1, 2, 2, 1]
+        assert series.steady_qps() == 2.0
+        assert ThroughputSeries().steady_qps() is None
+
+        # the cost is only the fallback of the series too short for the whole seconds
+        assert series.qps(cost=60.0) == 2.0
+        short = ThroughputSeries()
+        for t in [10.9, 11.1, 11.5]:
+            short.record(t)
+        assert short.qps(cost=2.0) == 1.5
+
+
+class TestProcessUsage:
+    def test_busy_and_idle(self):
+        with ProcessUsage.measure() as busy:
+            end = time.perf_counter() + 0.3
+            while time.perf_counter() < end:
+                pass
+        with ProcessUsage.measure() as idle:
+            time.sleep(0.3)
+
+        assert busy.cpu_percent > 50
+        assert idle.cpu_percent < 50
+        assert idle.ctx_switches >= 0
+        assert ProcessUsage().cpu_percent == 0.0
+
+
+class TestPhaseTimer:
+    def test_marked_phases(self):
+        db = Test(dim=4, db_config={}, db_case_config=None)
+        with db.phase(SearchPhase.WAIT):
+            pass
+        other = Test(dim=4, db_config={}, db_case_config=None)
+        other.phase_timer = PhaseTimer()
+        assert not hasattr(db, "phase_timer")
+        timers = []
+        for _ in range(2):
+            db.phase_timer = PhaseTimer()
+            with db.phase(SearchPhase.WAIT):
+                time.sleep(0.01)
+            timers.append(db.phase_timer)
+
+        encode, wait, decode = PhaseTimer.merge_all(timers).mean_latencies(2)
+        assert encode == decode == 0.0
+        assert wait >= 0.01
+        assert PhaseTimer().mean_latencies(2) == []
+
+
+class TestLatencySLO:
+    @pytest.mark.parametrize(("spec", "percentile", "max_latency"), [
+        ("p99<=10ms", 99, 0.01),
+        ("p95 <= 5ms", 95, 0.005),
+        ("p99.9<=1s", 99.9, 1.0),
+        ("p50<=500us", 50, 0.0005),
+    ])
+    def test_parse(self, spec: str, percentile: float, max_latency: float):
+        slo = LatencySLO.parse(spec)
+        assert slo.percentile == percentile
+        assert abs(slo.max_latency - max_latency) < 1e-12
+
+    def test_parse_invalid(self):
+        with pytest.raises(ValueError, match="invalid latency slo"):
+            LatencySLO.parse("p99<10ms")
+
+    def test_qps_under_latency(self):
+        conc_list, qps_list, latency_list = [10, 1, 5], [900.0, 100.0, 500.0], [0.02, 0.002, 0.006]
+        # interpolated between concurrency 5 (6ms) and 10 (20ms)
+        assert calc_qps_under_latency(conc_list, qps_list, latency_list, 0.013) == 700.0
+        assert calc_qps_under_latency(conc_list, qps_list, latency_list, 0.05) == 900.0
+        assert calc_qps_under_latency(conc_list, qps_list, latency_list, 0.001) == 0.0
+
+
 class TestGetFiles:
     @pytest.mark.parametrize("train_count", [
         1,
@@ -17,7 +17,16 @@ class config:
 
     DEFAULT_DATASET_URL = env.str("DEFAULT_DATASET_URL", AWS_S3_URL)
     DATASET_LOCAL_DIR = env.path("DATASET_LOCAL_DIR", "/tmp/vectordb_bench/dataset")
+    # convert the datasets once into memory-mapped .npy arrays, keyed by a checksum of the source files
+    USE_DATASET_CACHE = env.bool("USE_DATASET_CACHE", False)
+    DATASET_CACHE_DIR = env.path("DATASET_CACHE_DIR", "/tmp/vectordb_bench/dataset_cache")
     NUM_PER_BATCH = env.int("NUM_PER_BATCH", 100)
+    LOAD_CONCURRENCY = env.int("LOAD_CONCURRENCY", 1)
+    # insert batch sizes probed by --auto-tune-batch-size, and the max latency of one insert batch
+    LOAD_BATCH_SIZE_CANDIDATES = env.list("LOAD_BATCH_SIZE_CANDIDATES", [100, 500, 1000, 5000], subcast=int)
+    LOAD_BATCH_LATENCY_CAP = env.float("LOAD_BATCH_LATENCY_CAP", 1.0)
+    LOAD_TIMELINE_INTERVAL = env.float("LOAD_TIMELINE_INTERVAL", 10.0)  # seconds between two ingest samples
+    DELETE_RANGE_COUNT = env.int("DELETE_RANGE_COUNT", 10)  # contiguous id ranges deleted by the range delete cases
 
     DROP_OLD = env.bool("DROP_OLD", True)
     USE_SHUFFLED_DATA = env.bool("USE_SHUFFLED_DATA", True)
@@ -53,6 +62,20 @@ class config:
     CONCURRENCY_DURATION = 30
 
     CONCURRENCY_TIMEOUT = 3600
+    CONCURRENCY_WARMUP_DURATION = env.int("CONCURRENCY_WARMUP_DURATION", 0)  # seconds before measuring each level
+    SATURATION_QPS_GAIN = env.float("SATURATION_QPS_GAIN", 0.05)  # adaptive search stops below this qps gain
+    TRACE_WINDOW = env.float("TRACE_WINDOW", 10.0)  # seconds of each latency window of the trace replay
+    MIXED_WORKLOAD_RATE = env.int("MIXED_WORKLOAD_RATE", 1000)  # total ops/s of the mixed workload
+    MIXED_WORKLOAD_POOL_SIZE = env.int("MIXED_WORKLOAD_POOL_SIZE", 10_000)  # rows the upserts and deletes pick from
+    MIXED_WORKLOAD_RECALL_WINDOW = env.float("MIXED_WORKLOAD_RECALL_WINDOW", 10.0)  # seconds of each recall sample
+    CLIENT_BOUND_CPU_PERCENT = env.float("CLIENT_BOUND_CPU_PERCENT", 90.0)  # mean cpu% of busy search workers
+
+    # multi-host concurrent search, `vectordbbench agent` listens on AGENT_PORT for the coordinator
+    AGENT_PORT = env.int("AGENT_PORT", 9123)
+    AGENT_AUTHKEY = env.str("AGENT_AUTHKEY", None)  # shared secret of the agents and the coordinator, required
+    AGENT_START_DELAY = env.float("AGENT_START_DELAY", 1.0)  # seconds between scheduling and starting a level
+
+    BATCH_SEARCH_SIZES = env.list("BATCH_SEARCH_SIZES", [1, 10, 100], subcast=int)  # nq of each batched search
 
     RESULTS_LOCAL_DIR = env.path(
         "RESULTS_LOCAL_DIR",
@@ -1,5 +1,7 @@
 import logging
-from enum import Enum, auto
+from enum import Enum, StrEnum, auto
+
+import numpy as np
 
 from vectordb_bench import config
 from vectordb_bench.backend.clients.api import MetricType
@@ -12,6 +14,8 @@ from .dataset import CustomDataset, Dataset, DatasetManager
 
 log = logging.getLogger(__name__)
 
+DELETE_SEED = 42  # every run of a delete case deletes the same ids
+
 
 class CaseType(Enum):
     """
@@ -42,6 +46,11 @@ class CaseType(Enum):
     Performance1536D500K99P = 14
     Performance1536D5M99P = 15
 
+    Performance768D1MDelete10P = 16
+    Performance768D1MRangeDelete10P = 17
+    Performance1536D500KDelete10P = 18
+    Performance1536D500KRangeDelete10P = 19
+
     Performance1536D50K = 50
 
     Custom = 100
@@ -70,6 +79,13 @@ class CaseLabel(Enum):
     Performance = auto()
 
 
+class DeletePattern(StrEnum):
+    """Ids deleted by the delete cases"""
+
+    RANDOM = auto()  # spread over the whole dataset
+    RANGE = auto()  # config.DELETE_RANGE_COUNT contiguous id ranges, evenly spaced
+
+
 class Case(BaseModel):
     """Undefined case
 
@@ -79,6 +95,9 @@ class Case(BaseModel):
         dataset(DataSet): dataset for this case runner.
         filter_rate(float | None): one of 99% | 1% | None
         filters(dict | None): filters for search
+        delete_rate(float | None): share of the loaded rows deleted before searching, None to keep all
+        delete_pattern(DeletePattern): which rows are deleted
+        optimize_after_delete(bool): call optimize() again after the deletes
     """
 
     case_id: CaseType
@@ -92,6 +111,10 @@ class Case(BaseModel):
 
     filter_rate: float | None = None
 
+    delete_rate: float | None = None
+    delete_pattern: DeletePattern = DeletePattern.RANDOM
+    optimize_after_delete: bool = True
+
     @property
     def filters(self) -> dict | None:
         if self.filter_rate is not None:
@@ -103,6 +126,19 @@ class Case(BaseModel):
 
         return None
 
+    def delete_ids(self) -> np.ndarray:
+        """Ids of the delete_rate of the dataset to delete after loading, the same on every run"""
+        if not self.delete_rate:
+            return np.empty(0, dtype=np.int64)
+
+        ids = np.sort(self.dataset.train_ids())
+        count = round(len(ids) * self.delete_rate)
+        if self.delete_pattern == DeletePattern.RANGE:
+            spacing = len(ids) // config.DELETE_RANGE_COUNT
+            lengths = [len(r) for r in np.array_split(np.arange(count), config.DELETE_RANGE_COUNT)]
+            return np.concatenate([ids[i * spacing : i * spacing + n] for i, n in enumerate(lengths)])
+        return np.sort(np.random.default_rng(DELETE_SEED).choice(ids, count, replace=False))
+
 
 class CapacityCase(Case, BaseModel):
     label: CaseLabel = CaseLabel.Load
@@ -118,6 +154,13 @@ class PerformanceCase(Case, BaseModel):
     optimize_timeout: float | int | None = config.OPTIMIZE_TIMEOUT_DEFAULT
 
 
+class DeletePerformanceCase(PerformanceCase):
+    """Load the dataset, delete part of it in batches, then search the remaining rows,
+    the recall is against the ground truth recomputed without the deleted rows"""
+
+    delete_rate: float | None = 0.1
+
+
 class CapacityDim960(CapacityCase):
     case_id: CaseType = CaseType.CapacityDim960
     dataset: DatasetManager = Dataset.GIST.manager(100_000)
@@ -302,6 +345,52 @@ class Performance1536D50K(PerformanceCase):
     optimize_timeout: float | int | None = config.OPTIMIZE_TIMEOUT_DEFAULT
 
 
+class Performance768D1MDelete10P(DeletePerformanceCase):
+    case_id: CaseType = CaseType.Performance768D1MDelete10P
+    dataset: DatasetManager = Dataset.COHERE.manager(1_000_000)
+    name: str = "Delete Performance Test (1M Dataset, 768 Dim, Delete 10%)"
+    description: str = """This case tests the delete and search performance of a vector database with a medium
+    dataset (<b>Cohere 1M vectors</b>, 768 dimensions), after deleting <b>10% random vectors</b>.
+    Results will show delete throughput, recall against the remaining vectors, and maximum QPS."""
+    load_timeout: float | int = config.LOAD_TIMEOUT_768D_1M
+    optimize_timeout: float | int | None = config.OPTIMIZE_TIMEOUT_768D_1M
+
+
+class Performance768D1MRangeDelete10P(DeletePerformanceCase):
+    case_id: CaseType = CaseType.Performance768D1MRangeDelete10P
+    delete_pattern: DeletePattern = DeletePattern.RANGE
+    dataset: DatasetManager = Dataset.COHERE.manager(1_000_000)
+    name: str = "Delete Performance Test (1M Dataset, 768 Dim, Delete 10% in Ranges)"
+    description: str = """This case tests the delete and search performance of a vector database with a medium
+    dataset (<b>Cohere 1M vectors</b>, 768 dimensions), after deleting <b>10% vectors in contiguous id ranges</b>.
+    Results will show delete throughput, recall against the remaining vectors, and maximum QPS."""
+    load_timeout: float | int = config.LOAD_TIMEOUT_768D_1M
+    optimize_timeout: float | int | None = config.OPTIMIZE_TIMEOUT_768D_1M
+
+
+class Performance1536D500KDelete10P(DeletePerformanceCase):
+    case_id: CaseType = CaseType.Performance1536D500KDelete10P
+    dataset: DatasetManager = Dataset.OPENAI.manager(500_000)
+    name: str = "Delete Performance Test (500K Dataset, 1536 Dim, Delete 10%)"
+    description: str = """This case tests the delete and search performance of a vector database with a medium
+    dataset (<b>OpenAI 500K vectors</b>, 1536 dimensions), after deleting <b>10% random vectors</b>.
+    Results will show delete throughput, recall against the remaining vectors, and maximum QPS."""
+    load_timeout: float | int = config.LOAD_TIMEOUT_1536D_500K
+    optimize_timeout: float | int | None = config.OPTIMIZE_TIMEOUT_1536D_500K
+
+
+class Performance1536D500KRangeDelete10P(DeletePerformanceCase):
+    case_id: CaseType = CaseType.Performance1536D500KRangeDelete10P
+    delete_pattern: DeletePattern = DeletePattern.RANGE
+    dataset: DatasetManager = Dataset.OPENAI.manager(500_000)
+    name: str = "Delete Performance Test (500K Dataset, 1536 Dim, Delete 10% in Ranges)"
+    description: str = """This case tests the delete and search performance of a vector database with a medium
+    dataset (<b>OpenAI 500K vectors</b>, 1536 dimensions), after deleting <b>10% vectors in contiguous id ranges</b>.
+    Results will show delete throughput, recall against the remaining vectors, and maximum QPS."""
+    load_timeout: float | int = config.LOAD_TIMEOUT_1536D_500K
+    optimize_timeout: float | int | None = config.OPTIMIZE_TIMEOUT_1536D_500K
+
+
 def metric_type_map(s: str) -> MetricType:
     if s.lower() == "cosine":
         return MetricType.COSINE
@@ -346,6 +435,7 @@ class PerformanceCustomDataset(PerformanceCase):
             load_timeout=load_timeout,
             optimize_timeout=optimize_timeout,
             dataset=DatasetManager(data=dataset),
+            **kwargs,
         )
 
 
@@ -366,5 +456,9 @@ type2case = {
     CaseType.Performance1536D500K99P: Performance1536D500K99P,
     CaseType.Performance1536D5M99P: Performance1536D5M99P,
     CaseType.Performance1536D50K: Performance1536D50K,
+    CaseType.Performance768D1MDelete10P: Performance768D1MDelete10P,
+    CaseType.Performance768D1MRangeDelete10P: Performance768D1MRangeDelete10P,
+    CaseType.Performance1536D500KDelete10P: Performance1536D500KDelete10P,
+    CaseType.Performance1536D500KRangeDelete10P: Performance1536D500KRangeDelete10P,
     CaseType.PerformanceCustomDataset: PerformanceCustomDataset,
 }
@@ -1,7 +1,12 @@
+import copy
+import time
 from abc import ABC, abstractmethod
-from contextlib import contextmanager
-from enum import Enum
+from collections.abc import AsyncIterator, Iterable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from enum import Enum, StrEnum
+from typing import Self
 
+import numpy as np
 from pydantic import BaseModel, SecretStr, validator
 
 
@@ -45,6 +50,44 @@ class SQType(str, Enum):
     FP32 = "FP32"
 
 
+class SearchPhase(StrEnum):
+    """Phases of one search call, marked by the clients with VectorDB.phase()"""
+
+    ENCODE = "encode"  # build the request from the query
+    WAIT = "wait"  # send the request and wait for the response of the server
+    DECODE = "decode"  # parse the response into ids
+
+
+class PhaseTimer:
+    """Seconds spent in each SearchPhase, summed over the search calls of one stage.
+
+    The unmarked rest of the search latency is the client overhead outside of any phase.
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(SearchPhase, 0.0)
+
+    def add(self, phase: SearchPhase, seconds: float):
+        self.seconds[phase] += seconds
+
+    def merge(self, other: Self):
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] += seconds
+
+    @classmethod
+    def merge_all(cls, timers: Iterable[Self]) -> Self:
+        merged = cls()
+        for t in timers:
+            merged.merge(t)
+        return merged
+
+    def mean_latencies(self, count: int) -> list[float]:
+        """Mean seconds of each phase per search call in SearchPhase order, empty if no phase is marked"""
+        if count == 0 or not any(self.seconds.values()):
+            return []
+        return [seconds / count for seconds in self.seconds.values()]
+
+
 class DBConfig(ABC, BaseModel):
     """DBConfig contains the connection info of vector database
 
@@ -123,6 +166,9 @@ class VectorDB(ABC):
         >>> with milvus.init():
         >>>     milvus.insert_embeddings()
         >>>     milvus.search_embedding()
+
+    The search runners set a new `phase_timer` on the instance searching at the start of each
+    stage, and unset it at the end, no timer is shared between instances or copies.
     """
 
     @abstractmethod
@@ -166,6 +212,70 @@ class VectorDB(ABC):
         """
         raise NotImplementedError
 
+    def thread_copy(self) -> Self:
+        """Copy of this client for another search or insert thread, which opens its own init() on it.
+
+        Nothing is shared with this client, like in the copy unpickled by each search process, so the
+        connections and sessions set up in init() stay per thread. Called outside of init(), override it
+        if the client holds anything that can't be deep-copied there.
+        """
+        return copy.deepcopy(self)
+
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        """create and destory the async connections used by asearch_embedding, optional.
+
+        It's entered inside the event loop of each AsyncSearchRunner process, after init().
+        Up to `concurrency` coroutines then search at once: size the connection pools to it,
+        as a connection usually serves one request at a time.
+
+        Examples:
+            >>> async with self.ainit():
+            >>>     await self.asearch_embedding()
+        """
+        raise NotImplementedError
+        yield
+
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        """Coroutine version of search_embedding, optional.
+
+        Implement it together with ainit() if the client has an asyncio API, so that
+        AsyncSearchRunner can keep thousands of requests in flight in one process.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def support_async_search(cls) -> bool:
+        return cls.asearch_embedding is not VectorDB.asearch_embedding
+
+    @contextmanager
+    def phase(self, phase: SearchPhase) -> Iterator[None]:
+        """Mark a phase of search_embedding, so that the runners can tell the client-side encoding and
+        decoding apart from the time waiting for the server. Nothing is timed outside of the search stages.
+
+        Examples:
+            >>> with self.phase(SearchPhase.ENCODE):
+            >>>     request = build_request(query)
+            >>> with self.phase(SearchPhase.WAIT):
+            >>>     response = self.client.search(request)
+            >>> with self.phase(SearchPhase.DECODE):
+            >>>     return [int(hit.id) for hit in response]
+        """
+        phase_timer = getattr(self, "phase_timer", None)
+        if phase_timer is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phase_timer.add(phase, time.perf_counter() - start)
+
     def need_normalize_cosine(self) -> bool:
         """Wheather this database need to normalize dataset to support COSINE"""
         return False
@@ -190,6 +300,70 @@ class VectorDB(ABC):
         """
         raise NotImplementedError
 
+    def insert_embeddings_array(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        **kwargs,
+    ) -> tuple[int, Exception]:
+        """Insert a batch of embeddings given as numpy arrays, which are read straight from the
+        dataset's Arrow buffers without building any python float objects.
+
+        Override it if the client accepts arrays natively, the default converts the arrays
+        into lists and calls insert_embeddings.
+
+        Args:
+            ids(np.ndarray): int64 ids of shape (n,), also used as the metadata.
+            vectors(np.ndarray): embeddings of shape (n, dim).
+            **kwargs(Any): vector database specific parameters.
+
+        Returns:
+            int: inserted data count
+        """
+        return self.insert_embeddings(
+            embeddings=vectors.tolist(),
+            metadata=ids.tolist(),
+            **kwargs,
+        )
+
+    def upsert_embeddings(
+        self,
+        embeddings: list[list[float]],
+        metadata: list[int],
+        **kwargs,
+    ) -> tuple[int, Exception]:
+        """Insert the embeddings, replacing the existing ones of the same ids, optional.
+
+        Args:
+            embeddings(list[list[float]]): list of embedding to upsert to the vector database.
+            metadata(list[int]): ids of the embeddings, also used as the metadata.
+            **kwargs(Any): vector database specific parameters.
+
+        Returns:
+            int: upserted data count
+        """
+        raise NotImplementedError
+
+    def delete_embeddings(self, ids: list[int], **kwargs) -> tuple[int, Exception]:
+        """Delete the embeddings of ids from the vector database, optional.
+
+        Args:
+            ids(list[int]): ids of the embeddings to delete, ids not in the database are ignored.
+            **kwargs(Any): vector database specific parameters.
+
+        Returns:
+            int: deleted data count
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def support_upsert(cls) -> bool:
+        return cls.upsert_embeddings is not VectorDB.upsert_embeddings
+
+    @classmethod
+    def support_delete(cls) -> bool:
+        return cls.delete_embeddings is not VectorDB.delete_embeddings
+
     @abstractmethod
     def search_embedding(
         self,
@@ -209,6 +383,26 @@ class VectorDB(ABC):
         """
         raise NotImplementedError
 
+    def search_embeddings(
+        self,
+        queries: np.ndarray,
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[list[int]]:
+        """Get k most similar embeddings of each query vector in one batched request.
+
+        Search the queries one by one by default, override it if the client supports nq > 1 requests.
+
+        Args:
+            queries(np.ndarray): (nq, dim) query embeddings.
+            k(int): Number of most similar embeddings to return for each query. Defaults to 100.
+            filters(dict, optional): filtering expression to filter the data while searching.
+
+        Returns:
+            list[list[int]]: k most similar embeddings IDs of each query, in the order of queries.
+        """
+        return [self.search_embedding(query.tolist(), k, filters) for query in queries]
+
     @abstractmethod
     def optimize(self, data_size: int | None = None):
         """optimize will be called between insertion and search in performance cases.
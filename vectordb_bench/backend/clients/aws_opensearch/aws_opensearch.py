@@ -1,10 +1,15 @@
 import logging
 import time
-from collections.abc import Iterable
-from contextlib import contextmanager
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager, contextmanager
 
 from opensearchpy import OpenSearch
 
+try:
+    from opensearchpy import AsyncOpenSearch
+except ImportError:  # the async client needs aiohttp
+    AsyncOpenSearch = None
+
 from ..api import IndexType, VectorDB
 from .config import AWSOpenSearchConfig, AWSOpenSearchIndexConfig, AWSOS_Engine
 
@@ -103,6 +108,20 @@ class AWSOpenSearch(VectorDB):
         self.client = None
         del self.client
 
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        """async connection to opensearch, requires opensearch-py[async].
+        The aiohttp pool of each node keeps a connection for each concurrent search."""
+        if AsyncOpenSearch is None:
+            msg = "The async search of opensearch needs aiohttp, please install opensearch-py[async]"
+            raise ModuleNotFoundError(msg)
+        self.async_client = AsyncOpenSearch(**self.db_config, maxsize=concurrency)
+
+        yield
+        await self.async_client.close()
+        self.async_client = None
+        del self.async_client
+
     def insert_embeddings(
         self,
         embeddings: Iterable[list[float]],
@@ -149,20 +168,8 @@ class AWSOpenSearch(VectorDB):
         """
         assert self.client is not None, "should self.init() first"
 
-        body = {
-            "size": k,
-            "query": {"knn": {self.vector_col_name: {"vector": query, "k": k}}},
-            **({"filter": {"range": {self.id_col_name: {"gt": filters["id"]}}}} if filters else {}),
-        }
         try:
-            resp = self.client.search(
-                index=self.index_name,
-                body=body,
-                size=k,
-                _source=False,
-                docvalue_fields=[self.id_col_name],
-                stored_fields="_none_",
-            )
+            resp = self.client.search(**self._search_params(query, k, filters))
             log.debug(f"Search took: {resp['took']}")
             log.debug(f"Search shards: {resp['_shards']}")
             log.debug(f"Search hits total: {resp['hits']['total']}")
@@ -171,6 +178,37 @@ class AWSOpenSearch(VectorDB):
             log.warning(f"Failed to search: {self.index_name} error: {e!s}")
             raise e from None
 
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        """Coroutine version of search_embedding, should self.ainit() first"""
+        assert self.async_client is not None, "should self.ainit() first"
+
+        try:
+            resp = await self.async_client.search(**self._search_params(query, k, filters))
+            return [int(h["fields"][self.id_col_name][0]) for h in resp["hits"]["hits"]]
+        except Exception as e:
+            log.warning(f"Failed to search: {self.index_name} error: {e!s}")
+            raise e from None
+
+    def _search_params(self, query: list[float], k: int, filters: dict | None) -> dict:
+        body = {
+            "size": k,
+            "query": {"knn": {self.vector_col_name: {"vector": query, "k": k}}},
+            **({"filter": {"range": {self.id_col_name: {"gt": filters["id"]}}}} if filters else {}),
+        }
+        return {
+            "index": self.index_name,
+            "body": body,
+            "size": k,
+            "_source": False,
+            "docvalue_fields": [self.id_col_name],
+            "stored_fields": "_none_",
+        }
+
     def optimize(self, data_size: int | None = None):
         """optimize will be called between insertion and search in performance cases."""
         # Call refresh first to ensure that all segments are created
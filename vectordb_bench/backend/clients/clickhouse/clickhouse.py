@@ -8,7 +8,7 @@ import clickhouse_connect
 from clickhouse_connect.driver import Client
 
 from .. import IndexType
-from ..api import VectorDB
+from ..api import SearchPhase, VectorDB
 from .config import ClickhouseConfigDict, ClickhouseIndexConfig
 
 log = logging.getLogger(__name__)
@@ -191,42 +191,19 @@ class Clickhouse(VectorDB):
             "metric_type": self.search_param["metric_type"],
             "query": query,
         }
-        if self.case_config.metric_type == "COSINE":
-            if filters:
-                result = self.conn.query(
-                    "SELECT {primary_field:Identifier}, {vector_field:Identifier} "
-                    "FROM {schema:Identifier}.{table:Identifier} "
-                    "WHERE {primary_field:Identifier} > {gt:UInt32} "
-                    "ORDER BY cosineDistance(embedding,{query:Array(Float64)}) "
-                    "LIMIT {k:UInt32}",
-                    parameters=parameters,
-                ).result_rows
-                return [int(row[0]) for row in result]
-
-            result = self.conn.query(
-                "SELECT {primary_field:Identifier}, {vector_field:Identifier} "
+        distance = "cosineDistance" if self.case_config.metric_type == "COSINE" else "L2Distance"
+        where = "WHERE {primary_field:Identifier} > {gt:UInt32} " if filters else ""
+        # the parameters, the query vector included, are bound into the sql on the client side
+        with self.phase(SearchPhase.ENCODE):
+            context = self.conn.create_query_context(
+                query="SELECT {primary_field:Identifier}, {vector_field:Identifier} "  # noqa: S608
                 "FROM {schema:Identifier}.{table:Identifier} "
-                "ORDER BY cosineDistance(embedding,{query:Array(Float64)}) "
+                f"{where}"
+                f"ORDER BY {distance}(embedding,{{query:Array(Float64)}}) "
                 "LIMIT {k:UInt32}",
                 parameters=parameters,
-            ).result_rows
-            return [int(row[0]) for row in result]
-        if filters:
-            result = self.conn.query(
-                "SELECT {primary_field:Identifier}, {vector_field:Identifier} "
-                "FROM {schema:Identifier}.{table:Identifier} "
-                "WHERE {primary_field:Identifier} > {gt:UInt32} "
-                "ORDER BY L2Distance(embedding,{query:Array(Float64)}) "
-                "LIMIT {k:UInt32}",
-                parameters=parameters,
-            ).result_rows
-            return [int(row[0]) for row in result]
-
-        result = self.conn.query(
-            "SELECT {primary_field:Identifier}, {vector_field:Identifier} "
-            "FROM {schema:Identifier}.{table:Identifier} "
-            "ORDER BY L2Distance(embedding,{query:Array(Float64)}) "
-            "LIMIT {k:UInt32}",
-            parameters=parameters,
-        ).result_rows
-        return [int(row[0]) for row in result]
+            )
+        with self.phase(SearchPhase.WAIT):
+            query_result = self.conn.query(context=context)
+        with self.phase(SearchPhase.DECODE):
+            return [int(row[0]) for row in query_result.result_rows]
@@ -1,10 +1,16 @@
 import logging
 import time
-from collections.abc import Iterable
-from contextlib import contextmanager
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager, contextmanager
 
+import numpy as np
 from elasticsearch.helpers import bulk
 
+try:
+    from elasticsearch import AsyncElasticsearch
+except ImportError:  # the async client of elasticsearch<8 needs aiohttp
+    AsyncElasticsearch = None
+
 from ..api import VectorDB
 from .config import ElasticCloudIndexConfig
 
@@ -58,6 +64,23 @@ class ElasticCloud(VectorDB):
         self.client = None
         del self.client
 
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        """async connection to elasticsearch, with a connection per node for each concurrent search"""
+        if AsyncElasticsearch is None:
+            msg = "The async search of elasticsearch needs aiohttp, please install elasticsearch[async]"
+            raise ModuleNotFoundError(msg)
+        self.async_client = AsyncElasticsearch(
+            **self.db_config,
+            request_timeout=180,
+            connections_per_node=concurrency,
+        )
+
+        yield
+        await self.async_client.close()
+        self.async_client = None
+        del self.async_client
+
     def _create_indice(self, client: any) -> None:
         mappings = {
             "_source": {"excludes": [self.vector_col_name]},
@@ -120,6 +143,59 @@ class ElasticCloud(VectorDB):
         """
         assert self.client is not None, "should self.init() first"
 
+        try:
+            res = self.client.search(**self._search_params(query, k, filters))
+            return [h["fields"][self.id_col_name][0] for h in res["hits"]["hits"]]
+        except Exception as e:
+            log.warning(f"Failed to search: {self.indice} error: {e!s}")
+            raise e from None
+
+    def search_embeddings(
+        self,
+        queries: np.ndarray,
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[list[int]]:
+        """Search all the queries in one msearch request."""
+        assert self.client is not None, "should self.init() first"
+
+        searches = []
+        for query in queries:
+            params = self._search_params(query.tolist(), k, filters)
+            params.pop("filter_path")
+            searches.extend([{"index": params.pop("index")}, params])
+        try:
+            res = self.client.msearch(
+                searches=searches,
+                filter_path=[f"responses.hits.hits.fields.{self.id_col_name}", "responses.error"],
+            )
+        except Exception as e:
+            log.warning(f"Failed to msearch: {self.indice} error: {e!s}")
+            raise e from None
+
+        errors = [r["error"] for r in res["responses"] if "error" in r]
+        if errors:
+            log.warning(f"Failed to msearch: {self.indice} error: {errors[0]}")
+            raise RuntimeError(errors[0])
+        return [[h["fields"][self.id_col_name][0] for h in r.get("hits", {}).get("hits", [])] for r in res["responses"]]
+
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        """Coroutine version of search_embedding, should self.ainit() first"""
+        assert self.async_client is not None, "should self.ainit() first"
+
+        try:
+            res = await self.async_client.search(**self._search_params(query, k, filters))
+            return [h["fields"][self.id_col_name][0] for h in res["hits"]["hits"]]
+        except Exception as e:
+            log.warning(f"Failed to search: {self.indice} error: {e!s}")
+            raise e from None
+
+    def _search_params(self, query: list[float], k: int, filters: dict | None) -> dict:
         knn = {
             "field": self.vector_col_name,
             "k": k,
@@ -127,21 +203,15 @@ class ElasticCloud(VectorDB):
             "filter": [{"range": {self.id_col_name: {"gt": filters["id"]}}}] if filters else [],
             "query_vector": query,
         }
-        size = k
-        try:
-            res = self.client.search(
-                index=self.indice,
-                knn=knn,
-                size=size,
-                _source=False,
-                docvalue_fields=[self.id_col_name],
-                stored_fields="_none_",
-                filter_path=[f"hits.hits.fields.{self.id_col_name}"],
-            )
-            return [h["fields"][self.id_col_name][0] for h in res["hits"]["hits"]]
-        except Exception as e:
-            log.warning(f"Failed to search: {self.indice} error: {e!s}")
-            raise e from None
+        return {
+            "index": self.indice,
+            "knn": knn,
+            "size": k,
+            "_source": False,
+            "docvalue_fields": [self.id_col_name],
+            "stored_fields": "_none_",
+            "filter_path": [f"hits.hits.fields.{self.id_col_name}"],
+        }
 
     def optimize(self, data_size: int | None = None):
         """optimize will be called between insertion and search in performance cases."""
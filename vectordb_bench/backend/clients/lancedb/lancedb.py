@@ -2,6 +2,7 @@ import logging
 from contextlib import contextmanager
 
 import lancedb
+import numpy as np
 import pyarrow as pa
 from lancedb.pydantic import LanceModel
 
@@ -45,7 +46,7 @@ class LanceDB(VectorDB):
             db.open_table(self.table_name)
         except Exception:
             schema = pa.schema(
-                [pa.field("id", pa.int64()), pa.field("vector", pa.list_(pa.float64(), list_size=self.dim))]
+                [pa.field("id", pa.int64()), pa.field("vector", pa.list_(pa.float32(), list_size=self.dim))]
             )
             db.create_table(self.table_name, schema=schema, mode="overwrite")
 
@@ -70,6 +71,27 @@ class LanceDB(VectorDB):
             log.warning(f"Failed to insert data into LanceDB table ({self.table_name}), error: {e}")
             return 0, e
 
+    def insert_embeddings_array(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        **kwargs,
+    ) -> tuple[int, Exception | None]:
+        try:
+            # float32 like the table schema, the batch of the datasets is passed through without a copy
+            values = pa.array(np.ascontiguousarray(vectors, dtype=np.float32).ravel())
+            data = pa.table(
+                {
+                    "id": pa.array(ids, type=pa.int64()),
+                    "vector": pa.FixedSizeListArray.from_arrays(values, self.dim),
+                }
+            )
+            self.table.add(data)
+            return len(ids), None
+        except Exception as e:
+            log.warning(f"Failed to insert data into LanceDB table ({self.table_name}), error: {e}")
+            return 0, e
+
     def search_embedding(
         self,
         query: list[float],
@@ -82,6 +104,27 @@ class LanceDB(VectorDB):
             results = self.table.search(query).limit(k).to_list()
         return [int(result["id"]) for result in results]
 
+    def search_embeddings(
+        self,
+        queries: np.ndarray,
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[list[int]]:
+        """Search all the queries in one multi-vector query, rows are tagged with their query_index"""
+        query = self.table.search(list(np.asarray(queries, dtype=np.float32))).limit(k).select(["id"])
+        if filters:
+            query = query.where(f"id >= {filters['id']}", prefilter=True)
+        results = query.to_arrow()
+
+        ids = [[] for _ in range(len(queries))]
+        for query_index, id_ in zip(
+            results["query_index"].to_pylist(),
+            results["id"].to_pylist(),
+            strict=True,
+        ):
+            ids[query_index].append(int(id_))
+        return ids
+
     def optimize(self, data_size: int | None = None):
         if self.table and hasattr(self, "case_config") and self.case_config.index != IndexType.NONE:
             log.info(f"Creating index for LanceDB table ({self.table_name})")
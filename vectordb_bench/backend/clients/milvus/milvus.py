@@ -5,6 +5,7 @@ import time
 from collections.abc import Iterable
 from contextlib import contextmanager
 
+import numpy as np
 from pymilvus import Collection, CollectionSchema, DataType, FieldSchema, MilvusException, utility
 
 from ..api import VectorDB
@@ -178,6 +179,45 @@ class Milvus(VectorDB):
             return (insert_count, e)
         return (insert_count, None)
 
+    def upsert_embeddings(
+        self,
+        embeddings: Iterable[list[float]],
+        metadata: list[int],
+        **kwargs,
+    ) -> tuple[int, Exception]:
+        """Upsert embeddings into Milvus, replacing the rows of the same pk. should call self.init() first"""
+        assert self.col is not None
+        assert len(embeddings) == len(metadata)
+        try:
+            res = self.col.upsert([metadata, metadata, embeddings])
+        except MilvusException as e:
+            log.info(f"Failed to upsert data: {e}")
+            return (0, e)
+        return (res.upsert_count, None)
+
+    def delete_embeddings(self, ids: list[int], **kwargs) -> tuple[int, Exception]:
+        """Delete the rows of ids from Milvus. should call self.init() first"""
+        assert self.col is not None
+        try:
+            res = self.col.delete(f"{self._primary_field} in {list(ids)}")
+        except MilvusException as e:
+            log.info(f"Failed to delete data: {e}")
+            return (0, e)
+        return (res.delete_count, None)
+
+    def insert_embeddings_array(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        **kwargs,
+    ) -> tuple[int, Exception]:
+        """pymilvus accepts the (n, dim) float array as the vector column, no list conversion needed"""
+        return self.insert_embeddings(
+            embeddings=vectors.astype(np.float32, copy=False),
+            metadata=ids.tolist(),
+            **kwargs,
+        )
+
     def search_embedding(
         self,
         query: list[float],
@@ -201,3 +241,23 @@ class Milvus(VectorDB):
 
         # Organize results.
         return [result.id for result in res[0]]
+
+    def search_embeddings(
+        self,
+        queries: np.ndarray,
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[list[int]]:
+        """Search all the queries in one request with nq = len(queries)."""
+        assert self.col is not None
+
+        expr = f"{self._scalar_field} {filters.get('metadata')}" if filters else ""
+
+        res = self.col.search(
+            data=np.asarray(queries, dtype=np.float32),
+            anns_field=self._vector_field,
+            param=self.case_config.search_param(),
+            limit=k,
+            expr=expr,
+        )
+        return [[result.id for result in hits] for hits in res]
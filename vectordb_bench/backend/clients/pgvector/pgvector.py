@@ -1,14 +1,15 @@
 """Wrapper around the Pgvector vector database over VectorDB"""
 
 import logging
-from collections.abc import Generator, Sequence
-from contextlib import contextmanager
+from collections.abc import AsyncIterator, Generator, Sequence
+from contextlib import asynccontextmanager, contextmanager
 from typing import Any
 
 import numpy as np
 import psycopg
-from pgvector.psycopg import register_vector
-from psycopg import Connection, Cursor, sql
+from pgvector.psycopg import register_vector, register_vector_async
+from psycopg import AsyncConnection, Connection, Cursor, sql
+from psycopg_pool import AsyncConnectionPool
 
 from ..api import VectorDB
 from .config import PgVectorConfigDict, PgVectorIndexConfig
@@ -21,6 +22,7 @@ class PgVector(VectorDB):
 
     conn: psycopg.Connection[Any] | None = None
     cursor: psycopg.Cursor[Any] | None = None
+    apool: AsyncConnectionPool | None = None
 
     _filtered_search: sql.Composed
     _unfiltered_search: sql.Composed
@@ -227,6 +229,38 @@ class PgVector(VectorDB):
             self.cursor = None
             self.conn = None
 
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        """pool of async connections used by asearch_embedding, with the same session options as init().
+        A connection runs one statement at a time, so the pool has one for each concurrent search."""
+        session_options: Sequence[dict[str, Any]] = self.case_config.session_param()["session_options"]
+
+        async def configure(conn: AsyncConnection) -> None:
+            await register_vector_async(conn)
+            async with conn.cursor() as cursor:
+                for setting in session_options:
+                    command = sql.SQL("SET {setting_name} " + "= {val};").format(
+                        setting_name=sql.Identifier(setting["parameter"]["setting_name"]),
+                        val=sql.Identifier(str(setting["parameter"]["val"])),
+                    )
+                    await cursor.execute(command)
+            await conn.commit()
+
+        self.apool = AsyncConnectionPool(
+            kwargs=self.db_config,
+            min_size=concurrency,
+            max_size=concurrency,
+            configure=configure,
+            open=False,
+        )
+        await self.apool.open(wait=True)
+
+        try:
+            yield
+        finally:
+            await self.apool.close()
+            self.apool = None
+
     def _drop_table(self):
         assert self.conn is not None, "Connection is not initialized"
         assert self.cursor is not None, "Cursor is not initialized"
@@ -409,6 +443,18 @@ class PgVector(VectorDB):
         embeddings: list[list[float]],
         metadata: list[int],
         **kwargs: Any,
+    ) -> tuple[int, Exception | None]:
+        return self.insert_embeddings_array(
+            ids=np.array(metadata),
+            vectors=np.array(embeddings),
+            **kwargs,
+        )
+
+    def insert_embeddings_array(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        **kwargs: Any,
     ) -> tuple[int, Exception | None]:
         assert self.conn is not None, "Connection is not initialized"
         assert self.cursor is not None, "Cursor is not initialized"
@@ -416,9 +462,6 @@ class PgVector(VectorDB):
         index_param = self.case_config.index_param()
 
         try:
-            metadata_arr = np.array(metadata)
-            embeddings_arr = np.array(embeddings)
-
             if index_param["table_quantization_type"] == "bit":
                 with self.cursor.copy(
                     sql.SQL("COPY public.{table_name} FROM STDIN (FORMAT TEXT)").format(
@@ -426,13 +469,8 @@ class PgVector(VectorDB):
                     )
                 ) as copy:
                     # Same logic as pgvector binary_quantize
-                    for i, row in enumerate(metadata_arr):
-                        embeddings_bit = ""
-                        for embedding in embeddings_arr[i]:
-                            if embedding > 0:
-                                embeddings_bit += "1"
-                            else:
-                                embeddings_bit += "0"
+                    for i, row in enumerate(ids):
+                        embeddings_bit = "".join(np.where(vectors[i] > 0, "1", "0"))
                         copy.write_row((str(row), embeddings_bit))
             else:
                 with self.cursor.copy(
@@ -442,22 +480,78 @@ class PgVector(VectorDB):
                 ) as copy:
                     if index_param["table_quantization_type"] == "halfvec":
                         copy.set_types(["bigint", "halfvec"])
-                        for i, row in enumerate(metadata_arr):
-                            copy.write_row((row, np.float16(embeddings_arr[i])))
+                        vectors = vectors.astype(np.float16)
                     else:
                         copy.set_types(["bigint", "vector"])
-                        for i, row in enumerate(metadata_arr):
-                            copy.write_row((row, embeddings_arr[i]))
+                        vectors = vectors.astype(np.float32, copy=False)
+                    for i, row in enumerate(ids):
+                        copy.write_row((row, vectors[i]))
             self.conn.commit()
 
             if kwargs.get("last_batch"):
                 self._post_insert()
 
-            return len(metadata), None
+            return len(ids), None
         except Exception as e:
             log.warning(f"Failed to insert data into pgvector table ({self.table_name}), error: {e}")
             return 0, e
 
+    def upsert_embeddings(
+        self,
+        embeddings: list[list[float]],
+        metadata: list[int],
+        **kwargs: Any,
+    ) -> tuple[int, Exception | None]:
+        assert self.conn is not None, "Connection is not initialized"
+        assert self.cursor is not None, "Cursor is not initialized"
+
+        table_quantization_type = self.case_config.index_param()["table_quantization_type"]
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if table_quantization_type == "bit":
+            # Same logic as pgvector binary_quantize
+            values = ["".join(np.where(v > 0, "1", "0")) for v in vectors]
+        else:
+            values = list(vectors)
+
+        try:
+            self.cursor.executemany(
+                sql.SQL(
+                    "INSERT INTO public.{table_name} (id, embedding) VALUES (%s, %s::{table_quantization_type}({dim})) "
+                    "ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding"
+                ).format(
+                    table_name=sql.Identifier(self.table_name),
+                    table_quantization_type=sql.SQL(table_quantization_type),
+                    dim=sql.Literal(self.dim),
+                ),
+                list(zip(metadata, values, strict=True)),
+            )
+            self.conn.commit()
+            return len(metadata), None
+        except Exception as e:
+            log.warning(f"Failed to upsert data into pgvector table ({self.table_name}), error: {e}")
+            self.conn.rollback()
+            return 0, e
+
+    def delete_embeddings(self, ids: list[int], **kwargs: Any) -> tuple[int, Exception | None]:
+        assert self.conn is not None, "Connection is not initialized"
+        assert self.cursor is not None, "Cursor is not initialized"
+
+        try:
+            self.cursor.execute(
+                sql.SQL("DELETE FROM public.{table_name} WHERE id = ANY(%s)").format(
+                    table_name=sql.Identifier(self.table_name),
+                ),
+                (list(ids),),
+            )
+            deleted = self.cursor.rowcount
+            self.conn.commit()
+        except Exception as e:
+            log.warning(f"Failed to delete data from pgvector table ({self.table_name}), error: {e}")
+            self.conn.rollback()
+            return 0, e
+        else:
+            return deleted, None
+
     def search_embedding(
         self,
         query: list[float],
@@ -468,39 +562,31 @@ class PgVector(VectorDB):
         assert self.conn is not None, "Connection is not initialized"
         assert self.cursor is not None, "Cursor is not initialized"
 
+        statement, params = self._search_args(query, k, filters)
+        result = self.cursor.execute(statement, params, prepare=True, binary=True)
+
+        return [int(i[0]) for i in result.fetchall()]
+
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        assert self.apool is not None, "Async connection pool is not initialized"
+
+        statement, params = self._search_args(query, k, filters)
+        async with self.apool.connection() as conn, conn.cursor() as cursor:
+            await cursor.execute(statement, params, prepare=True, binary=True)
+            return [int(i[0]) for i in await cursor.fetchall()]
+
+    def _search_args(self, query: list[float], k: int, filters: dict | None) -> tuple[sql.Composed, tuple]:
+        """The prepared search statement and its parameters"""
         index_param = self.case_config.index_param()
         search_param = self.case_config.search_param()
         q = np.asarray(query)
+        rerank = index_param["quantization_type"] == "bit" and search_param["reranking"]
         if filters:
             gt = filters.get("id")
-            if index_param["quantization_type"] == "bit" and search_param["reranking"]:
-                result = self.cursor.execute(
-                    self._filtered_search,
-                    (q, gt, q, k),
-                    prepare=True,
-                    binary=True,
-                )
-            else:
-                result = self.cursor.execute(
-                    self._filtered_search,
-                    (gt, q, k),
-                    prepare=True,
-                    binary=True,
-                )
-
-        elif index_param["quantization_type"] == "bit" and search_param["reranking"]:
-            result = self.cursor.execute(
-                self._unfiltered_search,
-                (q, q, k),
-                prepare=True,
-                binary=True,
-            )
-        else:
-            result = self.cursor.execute(
-                self._unfiltered_search,
-                (q, k),
-                prepare=True,
-                binary=True,
-            )
-
-        return [int(i[0]) for i in result.fetchall()]
+            return self._filtered_search, (q, gt, q, k) if rerank else (gt, q, k)
+        return self._unfiltered_search, (q, q, k) if rerank else (q, k)
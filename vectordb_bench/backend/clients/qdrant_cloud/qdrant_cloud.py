@@ -2,16 +2,21 @@
 
 import logging
 import time
-from contextlib import contextmanager
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, contextmanager
 
-from qdrant_client import QdrantClient
+import httpx
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.models import (
     Batch,
     CollectionStatus,
     FieldCondition,
     Filter,
     PayloadSchemaType,
+    PointIdsList,
     Range,
+    SearchRequest,
     VectorParams,
 )
 
@@ -62,6 +67,18 @@ class QdrantCloud(VectorDB):
         self.qdrant_client = None
         del self.qdrant_client
 
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        """async client, its http pool keeps a connection for each concurrent search"""
+        self.async_client = AsyncQdrantClient(
+            **self.db_config,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        yield
+        await self.async_client.close()
+        self.async_client = None
+        del self.async_client
+
     def optimize(self, data_size: int | None = None):
         assert self.qdrant_client, "Please call self.init() before"
         # wait for vectors to be fully indexed
@@ -131,6 +148,29 @@ class QdrantCloud(VectorDB):
         else:
             return len(metadata), None
 
+    def upsert_embeddings(
+        self,
+        embeddings: list[list[float]],
+        metadata: list[int],
+        **kwargs,
+    ) -> tuple[int, Exception]:
+        """Qdrant always upserts points by id"""
+        return self.insert_embeddings(embeddings, metadata, **kwargs)
+
+    def delete_embeddings(self, ids: list[int], **kwargs) -> tuple[int, Exception]:
+        assert self.qdrant_client is not None
+        try:
+            self.qdrant_client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=list(ids)),
+                wait=True,
+            )
+        except Exception as e:
+            log.info(f"Failed to delete data, {e}")
+            return 0, e
+        else:
+            return len(ids), None
+
     def search_embedding(
         self,
         query: list[float],
@@ -143,26 +183,60 @@ class QdrantCloud(VectorDB):
         """
         assert self.qdrant_client is not None
 
-        f = None
-        if filters:
-            f = Filter(
-                must=[
-                    FieldCondition(
-                        key=self._primary_field,
-                        range=Range(
-                            gt=filters.get("id"),
-                        ),
-                    ),
-                ],
-            )
-
         res = (
             self.qdrant_client.search(
                 collection_name=self.collection_name,
                 query_vector=query,
                 limit=k,
-                query_filter=f,
+                query_filter=self._build_filter(filters),
             ),
         )
 
         return [result.id for result in res[0]]
+
+    def search_embeddings(
+        self,
+        queries: np.ndarray,
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[list[int]]:
+        """Search all the queries in one search_batch request."""
+        assert self.qdrant_client is not None
+
+        f = self._build_filter(filters)
+        res = self.qdrant_client.search_batch(
+            collection_name=self.collection_name,
+            requests=[SearchRequest(vector=query.tolist(), limit=k, filter=f) for query in queries],
+        )
+        return [[result.id for result in hits] for hits in res]
+
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        """Should call self.ainit() first."""
+        assert self.async_client is not None
+
+        res = await self.async_client.search(
+            collection_name=self.collection_name,
+            query_vector=query,
+            limit=k,
+            query_filter=self._build_filter(filters),
+        )
+        return [result.id for result in res]
+
+    def _build_filter(self, filters: dict | None) -> Filter | None:
+        if not filters:
+            return None
+        return Filter(
+            must=[
+                FieldCondition(
+                    key=self._primary_field,
+                    range=Range(
+                        gt=filters.get("id"),
+                    ),
+                ),
+            ],
+        )
@@ -1,14 +1,16 @@
 import logging
-from contextlib import contextmanager
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, contextmanager
 from typing import Any
 
 import numpy as np
 import redis
+import redis.asyncio
 from redis.commands.search.field import NumericField, TagField, VectorField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from redis.commands.search.query import Query
 
-from ..api import DBCaseConfig, VectorDB
+from ..api import DBCaseConfig, SearchPhase, VectorDB
 
 log = logging.getLogger(__name__)
 INDEX_NAME = "index"  # Vector Index Name
@@ -92,6 +94,19 @@ class Redis(VectorDB):
         self.conn.close()
         self.conn = None
 
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        self.aconn = redis.asyncio.Redis(
+            host=self.db_config["host"],
+            port=self.db_config["port"],
+            password=self.db_config["password"],
+            db=0,
+            max_connections=concurrency,
+        )
+        yield
+        await self.aconn.aclose()
+        self.aconn = None
+
     def ready_to_search(self) -> bool:
         """Check if the database is ready to search."""
 
@@ -142,6 +157,27 @@ class Redis(VectorDB):
     ) -> list[int]:
         assert self.conn is not None
 
+        with self.phase(SearchPhase.ENCODE):
+            query_obj, query_params = self._build_query(query, k, filters)
+        with self.phase(SearchPhase.WAIT):
+            res = self.conn.ft(INDEX_NAME).search(query_obj, query_params)
+        # doc in res of format {'id': '9831', 'payload': None, 'score': '1.19209289551e-07'}
+        with self.phase(SearchPhase.DECODE):
+            return [int(doc["id"]) for doc in res.docs]
+
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        assert self.aconn is not None
+
+        query_obj, query_params = self._build_query(query, k, filters)
+        res = await self.aconn.ft(INDEX_NAME).search(query_obj, query_params)
+        return [int(doc["id"]) for doc in res.docs]
+
+    def _build_query(self, query: list[float], k: int, filters: dict | None) -> tuple[Query, dict]:
         query_vector = np.array(query).astype(np.float32).tobytes()
         ef_runtime = self.case_config.search_param()["params"]["ef"]
         query_obj = (
@@ -186,6 +222,4 @@ class Redis(VectorDB):
                     .paging(0, k)
                     .dialect(2)
                 )
-        res = self.conn.ft(INDEX_NAME).search(query_obj, query_params)
-        # doc in res of format {'id': '9831', 'payload': None, 'score': '1.19209289551e-07'}
-        return [int(doc["id"]) for doc in res.docs]
+        return query_obj, query_params
@@ -47,6 +47,17 @@ class Test(VectorDB):
         """
         return len(metadata), None
 
+    def upsert_embeddings(
+        self,
+        embeddings: list[list[float]],
+        metadata: list[int],
+        **kwargs: Any,
+    ) -> tuple[int, Exception | None]:
+        return len(metadata), None
+
+    def delete_embeddings(self, ids: list[int], **kwargs: Any) -> tuple[int, Exception | None]:
+        return len(ids), None
+
     def search_embedding(
         self,
         query: list[float],
@@ -1,8 +1,8 @@
 import datetime
 import logging
 import math
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections.abc import AsyncIterator, Generator
+from contextlib import asynccontextmanager, contextmanager
 
 from vespa import application
 
@@ -57,6 +57,15 @@ class Vespa(VectorDB):
         yield
         self.client = None
 
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        """async http session of the client opened by init(), with a connection for each concurrent search"""
+        assert self.client is not None
+        async with self.client.asyncio(connections=concurrency) as async_client:
+            self.async_client = async_client
+            yield
+        self.async_client = None
+
     def need_normalize_cosine(self) -> bool:
         """Wheather this database need to normalize dataset to support COSINE"""
         return False
@@ -102,6 +111,22 @@ class Vespa(VectorDB):
         """
         assert self.client is not None
 
+        result = self.client.query(self._query_body(query, k, filters))
+        return [child["fields"]["id"] for child in result.get_json()["root"]["children"]]
+
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        """Coroutine version of search_embedding, should call self.ainit() first"""
+        assert self.async_client is not None
+
+        result = await self.async_client.query(self._query_body(query, k, filters))
+        return [child["fields"]["id"] for child in result.get_json()["root"]["children"]]
+
+    def _query_body(self, query: list[float], k: int, filters: dict | None) -> dict:
         ef = self.case_config.ef
         extra_ef = max(0, ef - k)
         embedding_field = "embedding" if self.case_config.quantization_type == "none" else "embedding_binary"
@@ -120,8 +145,7 @@ class Vespa(VectorDB):
 
         ranking = self.case_config.quantization_type
 
-        result = self.client.query({"yql": yql, "input.query(query_embedding)": query_embedding, "ranking": ranking})
-        return [child["fields"]["id"] for child in result.get_json()["root"]["children"]]
+        return {"yql": yql, "input.query(query_embedding)": query_embedding, "ranking": ranking}
 
     def optimize(self, data_size: int | None = None):
         """optimize will be called between insertion and search in performance cases.
@@ -1,13 +1,14 @@
 """Wrapper around the Weaviate vector database over VectorDB"""
 
 import logging
-from collections.abc import Iterable
-from contextlib import contextmanager
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager, contextmanager
 
+import httpx
 import weaviate
 from weaviate.exceptions import WeaviateBaseError
 
-from ..api import DBCaseConfig, VectorDB
+from ..api import DBCaseConfig, SearchPhase, VectorDB
 
 log = logging.getLogger(__name__)
 
@@ -67,6 +68,24 @@ class WeaviateCloud(VectorDB):
         self.client = None
         del self.client
 
+    @asynccontextmanager
+    async def ainit(self, concurrency: int = 1) -> AsyncIterator[None]:
+        """async http client to the GraphQL endpoint, its pool keeps a connection for each concurrent search.
+
+        The v3 weaviate client has no async api, so the GraphQL query built by its query builder is posted
+        as the client.query.raw() of search_embedding does.
+        """
+        self.async_client = httpx.AsyncClient(
+            base_url=self.db_config["url"],
+            headers={"Authorization": f"Bearer {self.db_config['auth_client_secret'].api_key}"},
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            timeout=httpx.Timeout(60, connect=10),
+        )
+        yield
+        await self.async_client.aclose()
+        self.async_client = None
+        del self.async_client
+
     def optimize(self, data_size: int | None = None):
         assert self.client.schema.exists(self.collection_name)
         self.client.schema.update_config(
@@ -134,6 +153,36 @@ class WeaviateCloud(VectorDB):
         """
         assert self.client.schema.exists(self.collection_name)
 
+        with self.phase(SearchPhase.ENCODE):
+            gql = self._search_gql(query, k, filters)
+
+        # Perform the search, same as query_obj.do() with the GraphQL built apart.
+        with self.phase(SearchPhase.WAIT):
+            res = self.client.query.raw(gql)
+
+        # Organize results.
+        with self.phase(SearchPhase.DECODE):
+            return self._search_ids(res)
+
+    async def asearch_embedding(
+        self,
+        query: list[float],
+        k: int = 100,
+        filters: dict | None = None,
+    ) -> list[int]:
+        """Coroutine version of search_embedding, should self.ainit() first"""
+        assert self.async_client is not None, "should self.ainit() first"
+
+        gql = self._search_gql(query, k, filters)
+        try:
+            res = await self.async_client.post("/v1/graphql", json={"query": gql})
+            res.raise_for_status()
+            return self._search_ids(res.json())
+        except Exception as e:
+            log.warning(f"Failed to search: {self.collection_name} error: {e!s}")
+            raise e from None
+
+    def _search_gql(self, query: list[float], k: int, filters: dict | None) -> str:
         query_obj = (
             self.client.query.get(self.collection_name, [self._scalar_field])
             .with_additional("distance")
@@ -147,9 +196,7 @@ class WeaviateCloud(VectorDB):
                 "valueInt": filters.get("id"),
             }
             query_obj = query_obj.with_where(where_filter)
+        return query_obj.build()
 
-        # Perform the search.
-        res = query_obj.do()
-
-        # Organize results.
+    def _search_ids(self, res: dict) -> list[int]:
         return [result[self._scalar_field] for result in res["data"]["Get"][self.collection_name]]
@@ -9,20 +9,28 @@ import pathlib
 import typing
 from enum import Enum
 
+import numpy as np
 import pandas as pd
 import polars as pl
+import pyarrow as pa
 from pyarrow.parquet import ParquetFile
 from pydantic import PrivateAttr, validator
 
 from vectordb_bench import config
 from vectordb_bench.base import BaseModel
+from vectordb_bench.metric import ground_truth_array
 
 from . import utils
 from .clients import MetricType
 from .data_source import DatasetReader, DatasetSource
+from .dataset_cache import NpyCache
 
 log = logging.getLogger(__name__)
 
+CACHE_BUILD_BATCH_SIZE = 100_000
+GROUND_TRUTH_BATCH_SIZE = 10_000  # train rows compared with the test vectors at once
+GROUND_TRUTH_QUERY_BATCH_SIZE = 1_000  # test vectors compared with a train batch at once
+
 
 class SizeLabel(typing.NamedTuple):
     size: int
@@ -159,6 +167,9 @@ class DatasetManager(BaseModel):
 
     DatasetManager is iterable, each iteration will return the next batch of data in pandas.DataFrame
 
+    With config.USE_DATASET_CACHE, prepare() converts the dataset once into .npy arrays under
+    config.DATASET_CACHE_DIR, and all the data is read from their memmaps instead of Parquet.
+
     Examples:
         >>> cohere = Dataset.COHERE.manager(100_000)
         >>> for data in cohere:
@@ -170,6 +181,9 @@ class DatasetManager(BaseModel):
     gt_data: pd.DataFrame | None = None
     train_files: list[str] = []
     reader: DatasetReader | None = None
+    train_cache: NpyCache | None = None
+    test_cache: NpyCache | None = None
+    gt_cache: NpyCache | None = None
 
     def __eq__(self, obj: any):
         if isinstance(obj, DatasetManager):
@@ -197,6 +211,21 @@ class DatasetManager(BaseModel):
     def __iter__(self):
         return DataSetIterator(self)
 
+    def iter_arrays(self, batch_size: int = config.NUM_PER_BATCH) -> "ArrayDataSetIterator":
+        """Iterate the train data as (ids, embeddings) numpy arrays instead of pandas DataFrames"""
+        return ArrayDataSetIterator(self, batch_size)
+
+    def train_ids(self) -> np.ndarray:
+        """Ids of all the train rows, from the cache or the id column alone of the train files"""
+        if self.train_cache is not None:
+            return np.asarray(self.train_cache.load("ids"))
+        return np.concatenate(
+            [
+                ParquetFile(self.data_dir.joinpath(f)).read(columns=["id"]).column("id").to_numpy()
+                for f in self.train_files
+            ]
+        )
+
     # TODO passing use_shuffle from outside
     def prepare(
         self,
@@ -234,18 +263,137 @@ class DatasetManager(BaseModel):
                 local_ds_root=self.data_dir,
             )
 
+        prefix = "shuffle_train" if use_shuffled else "train"
+        self.train_files = sorted([f.name for f in self.data_dir.glob(f"{prefix}*.parquet")])
+        log.debug(f"{self.data.name}: available train files {self.train_files}")
+
+        if config.USE_DATASET_CACHE:
+            self._prepare_cache(test_file, gt_file)
+            return True
+
         if test_file is not None:
             self.test_data = self._read_file(test_file)
 
         if gt_file is not None:
             self.gt_data = self._read_file(gt_file)
 
-        prefix = "shuffle_train" if use_shuffled else "train"
-        self.train_files = sorted([f.name for f in self.data_dir.glob(f"{prefix}*.parquet")])
-        log.debug(f"{self.data.name}: available train files {self.train_files}")
-
         return True
 
+    @property
+    def cache_dir(self) -> pathlib.Path:
+        """cache directory: config.DATASET_CACHE_DIR/{dataset_name}/{last part of dataset_dirname}"""
+        return pathlib.Path(
+            config.DATASET_CACHE_DIR,
+            self.data.name.lower(),
+            pathlib.Path(self.data.dir_name.lower()).name,
+        )
+
+    def _prepare_cache(self, test_file: str, gt_file: str | None):
+        """Build the missing .npy caches of the train, test and ground truth files"""
+        train_paths = [pathlib.Path(self.data_dir, f) for f in self.train_files]
+        self.train_cache = NpyCache(self.cache_dir, "train", train_paths)
+        if not self.train_cache.exists():
+            num_rows = sum([ParquetFile(p).metadata.num_rows for p in train_paths])
+            with self.train_cache.build() as tmp_dir:
+                ids = np.lib.format.open_memmap(tmp_dir.joinpath("ids.npy"), "w+", np.int64, (num_rows,))
+                emb = np.lib.format.open_memmap(
+                    tmp_dir.joinpath("emb.npy"), "w+", np.float32, (num_rows, self.data.dim)
+                )
+                offset = 0
+                for p in train_paths:
+                    for batch in ParquetFile(p, memory_map=True).iter_batches(CACHE_BUILD_BATCH_SIZE):
+                        batch_ids, batch_emb = record_batch_to_arrays(batch)
+                        ids[offset : offset + len(batch_ids)] = batch_ids
+                        emb[offset : offset + len(batch_ids)] = batch_emb
+                        offset += len(batch_ids)
+                ids.flush()
+                emb.flush()
+                del ids, emb
+
+        test_path = pathlib.Path(self.data_dir, test_file)
+        self.test_cache = NpyCache(self.cache_dir, "test", [test_path]) if test_path.exists() else None
+        if self.test_cache is not None and not self.test_cache.exists():
+            with self.test_cache.build() as tmp_dir:
+                test_emb = np.stack(self._read_file(test_file)["emb"]).astype(np.float32)
+                np.save(tmp_dir.joinpath("emb.npy"), test_emb)
+
+        gt_path = None if gt_file is None else pathlib.Path(self.data_dir, gt_file)
+        if gt_path is not None and gt_path.exists():
+            self.gt_cache = NpyCache(self.cache_dir, "gt", [gt_path])
+            if not self.gt_cache.exists():
+                with self.gt_cache.build() as tmp_dir:
+                    neighbors = self._read_file(gt_file)["neighbors_id"]
+                    k = max([len(n) for n in neighbors], default=0)
+                    np.save(tmp_dir.joinpath("neighbors.npy"), ground_truth_array(neighbors, k))
+
+    def get_test_emb(self) -> np.ndarray:
+        """(nq, dim) test vectors"""
+        if self.test_cache is not None:
+            return self.test_cache.load("emb")
+        return np.stack(self.test_data["emb"])
+
+    def get_ground_truth(self) -> pd.DataFrame | np.ndarray | None:
+        """ground truth DataFrame with the neighbors_id column, or the (nq, k) int64 neighbor ids
+        padded with -1 if the dataset is cached"""
+        if self.gt_cache is not None:
+            return self.gt_cache.load("neighbors")
+        return self.gt_data
+
+    def compute_ground_truth(
+        self,
+        test_emb: np.ndarray,
+        k: int,
+        excluded_ids: np.ndarray | None = None,
+        min_id: int | None = None,
+    ) -> np.ndarray:
+        """Exact k nearest neighbors of each test vector by brute force over the train data,
+        without the excluded_ids and the ids under min_id, i.e. the id filter of the filter cases
+
+        Returns:
+            np.ndarray: (nq, k) int64 neighbor ids, nearest first, padded with -1
+        """
+        metric_type = self.data.metric_type
+        if metric_type not in (MetricType.L2, MetricType.COSINE, MetricType.IP, MetricType.DP):
+            msg = f"Not support computing the ground truth of metric_type: {metric_type}"
+            raise ValueError(msg)
+
+        queries = np.asarray(test_emb, dtype=np.float32)
+        if metric_type == MetricType.COSINE:
+            queries = queries / np.linalg.norm(queries, axis=1)[:, np.newaxis]
+
+        # the running top k of each query, padded with -1 at an infinite distance
+        best_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        best_dist = np.full((len(queries), k), np.inf, dtype=np.float32)
+        for batch_ids, batch_vectors in self.iter_arrays(GROUND_TRUTH_BATCH_SIZE):
+            keep = np.ones(len(batch_ids), dtype=bool)
+            if excluded_ids is not None:
+                keep &= ~np.isin(batch_ids, excluded_ids)
+            if min_id is not None:
+                keep &= batch_ids >= min_id
+            if not keep.any():
+                continue
+
+            ids, vectors = batch_ids[keep], batch_vectors[keep].astype(np.float32)
+            if metric_type == MetricType.COSINE:
+                vectors = vectors / np.linalg.norm(vectors, axis=1)[:, np.newaxis]
+            squared_norms = (vectors**2).sum(axis=1)[np.newaxis, :] if metric_type == MetricType.L2 else None
+
+            # at most GROUND_TRUTH_QUERY_BATCH_SIZE x GROUND_TRUTH_BATCH_SIZE distances at once
+            for start in range(0, len(queries), GROUND_TRUTH_QUERY_BATCH_SIZE):
+                rows = slice(start, start + GROUND_TRUTH_QUERY_BATCH_SIZE)
+                dist = -(queries[rows] @ vectors.T)
+                if squared_norms is not None:
+                    dist = squared_norms + 2 * dist
+
+                dist = np.concatenate([best_dist[rows], dist], axis=1)
+                dist_ids = np.concatenate([best_ids[rows], np.broadcast_to(ids, (len(dist), len(ids)))], axis=1)
+                top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                best_dist[rows] = np.take_along_axis(dist, top, axis=1)
+                best_ids[rows] = np.take_along_axis(dist_ids, top, axis=1)
+
+        order = np.argsort(best_dist, axis=1, kind="stable")
+        return ground_truth_array(np.take_along_axis(best_ids, order, axis=1), k)
+
     def _read_file(self, file_name: str) -> pd.DataFrame:
         """read one file from disk into memory"""
         log.info(f"Read the entire file into memory: {file_name}")
@@ -258,12 +406,17 @@ class DatasetManager(BaseModel):
 
 
 class DataSetIterator:
-    def __init__(self, dataset: DatasetManager):
+    def __init__(self, dataset: DatasetManager, batch_size: int = config.NUM_PER_BATCH):
         self._ds = dataset
+        self._batch_size = batch_size
         self._idx = 0  # file number
         self._cur = None
         self._sub_idx = [0 for i in range(len(self._ds.train_files))]  # iter num for each file
 
+        # row offset into the cached train arrays, memmaps are opened on the first batch
+        self._cache_offset = 0
+        self._cache_ids, self._cache_emb = None, None
+
     def __iter__(self):
         return self
 
@@ -274,17 +427,39 @@ class DataSetIterator:
             msg = f"No such file: {p}"
             log.warning(msg)
             raise IndexError(msg)
-        return ParquetFile(p, memory_map=True, pre_buffer=True).iter_batches(config.NUM_PER_BATCH)
+        return ParquetFile(p, memory_map=True, pre_buffer=True).iter_batches(self._batch_size)
+
+    def _convert(self, batch: pa.RecordBatch) -> pd.DataFrame:
+        return batch.to_pandas()
+
+    def _convert_arrays(self, ids: np.ndarray, emb: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({"id": ids, "emb": list(emb)})
+
+    def _next_cached(self) -> pd.DataFrame:
+        if self._cache_ids is None:
+            self._cache_ids, self._cache_emb = self._ds.train_cache.load("ids"), self._ds.train_cache.load("emb")
+
+        start = self._cache_offset
+        if start >= len(self._cache_ids):
+            raise StopIteration
+        self._cache_offset = start + self._batch_size
+        return self._convert_arrays(
+            np.asarray(self._cache_ids[start : self._cache_offset]),
+            self._cache_emb[start : self._cache_offset],
+        )
 
     def __next__(self) -> pd.DataFrame:
         """return the data in the next file of the training list"""
+        if self._ds.train_cache is not None:
+            return self._next_cached()
+
         if self._idx < len(self._ds.train_files):
             if self._cur is None:
                 file_name = self._ds.train_files[self._idx]
                 self._cur = self._get_iter(file_name)
 
             try:
-                return next(self._cur).to_pandas()
+                return self._convert(next(self._cur))
             except StopIteration:
                 if self._idx == len(self._ds.train_files) - 1:
                     raise StopIteration from None
@@ -292,10 +467,38 @@ class DataSetIterator:
                 self._idx += 1
                 file_name = self._ds.train_files[self._idx]
                 self._cur = self._get_iter(file_name)
-                return next(self._cur).to_pandas()
+                return self._convert(next(self._cur))
         raise StopIteration
 
 
+def record_batch_to_arrays(batch: pa.RecordBatch) -> tuple[np.ndarray, np.ndarray]:
+    """(ids, embeddings) of a train data batch, embeddings is a (n, dim) view of the Arrow values buffer"""
+    ids = batch.column("id").to_numpy()
+    emb = batch.column("emb")
+    if emb.null_count > 0:
+        msg = "embeddings with null values are not supported"
+        raise ValueError(msg)
+    vectors = emb.flatten().to_numpy().reshape(len(emb), -1)
+    return ids, vectors
+
+
+class ArrayDataSetIterator(DataSetIterator):
+    """DataSetIterator yielding (ids, embeddings) numpy arrays of each batch.
+
+    The embeddings are a (n, dim) view over the values buffer of the Arrow list column,
+    or a slice of the cached memmap, no python objects are created for the floats.
+    """
+
+    def _convert(self, batch: pa.RecordBatch) -> tuple[np.ndarray, np.ndarray]:
+        return record_batch_to_arrays(batch)
+
+    def _convert_arrays(self, ids: np.ndarray, emb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return ids, emb
+
+    def __next__(self) -> tuple[np.ndarray, np.ndarray]:
+        return super().__next__()
+
+
 class Dataset(Enum):
     """
     Value is Dataset classes, DO NOT use it
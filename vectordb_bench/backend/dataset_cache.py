@@ -0,0 +1,96 @@
+"""Local cache of the dataset converted into native .npy arrays.
+
+Parquet files are decoded only once into contiguous float32 vectors and int64 ids.
+Later runs `np.load(mmap_mode="r")` them, so reading a batch is just slicing a memmap.
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+from collections.abc import Generator
+from contextlib import contextmanager
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+PARQUET_MAGIC = b"PAR1"
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def parquet_footer(p: pathlib.Path) -> bytes | None:
+    """The file metadata at the end of a parquet file, None if it isn't a parquet file"""
+    with p.open("rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size < 2 * len(PARQUET_MAGIC) + 4:
+            return None
+        f.seek(size - len(PARQUET_MAGIC) - 4)
+        tail = f.read()
+        if tail[4:] != PARQUET_MAGIC:
+            return None
+        footer_len = int.from_bytes(tail[:4], "little")
+        f.seek(max(size - len(tail) - footer_len, 0))
+        return f.read(footer_len)
+
+
+def files_fingerprint(files: list[pathlib.Path]) -> str:
+    """Fingerprint of the names, sizes and parquet footers of the source files.
+
+    The footer holds the schema, the row group offsets and the min/max statistics of every column chunk,
+    so a file rewritten with other rows changes it without the whole file being read. A rewrite keeping
+    the same encoded sizes and statistics, e.g. of a file written without statistics, goes unnoticed:
+    remove the cache directory by hand then. Files that aren't parquet are hashed in full.
+    """
+    h = hashlib.sha256()
+    for p in sorted(files):
+        h.update(f"{p.name}:{p.stat().st_size};".encode())
+        footer = parquet_footer(p)
+        if footer is not None:
+            h.update(footer)
+            continue
+        with p.open("rb") as f:
+            while block := f.read(HASH_BLOCK_SIZE):
+                h.update(block)
+    return h.hexdigest()[:16]
+
+
+class NpyCache:
+    """A directory of named .npy arrays, converted from the source files and keyed by their fingerprint.
+
+    A change of the source files leads to another directory, the stale one is never read again,
+    see files_fingerprint for the changes it can't tell.
+
+    Examples:
+        >>> cache = NpyCache(cache_root, "test", [test_parquet])
+        >>> if not cache.exists():
+        >>>     with cache.build() as tmp_dir:
+        >>>         np.save(tmp_dir / "emb.npy", emb)
+        >>> emb = cache.load("emb")
+    """
+
+    def __init__(self, root: pathlib.Path, kind: str, sources: list[pathlib.Path]):
+        self.path = pathlib.Path(root, f"{kind}-{files_fingerprint(sources)}")
+
+    def exists(self) -> bool:
+        return self.path.is_dir()
+
+    def load(self, name: str) -> np.ndarray:
+        return np.load(self.path.joinpath(f"{name}.npy"), mmap_mode="r")
+
+    @contextmanager
+    def build(self) -> Generator[pathlib.Path, None, None]:
+        """Write the arrays into a temporary directory, which only becomes the cache once complete"""
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        log.info(f"Start building dataset cache: {self.path}")
+        try:
+            yield tmp
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        tmp.rename(self.path)
+        log.info(f"Finish building dataset cache: {self.path}")
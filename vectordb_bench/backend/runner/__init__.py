@@ -1,10 +1,29 @@
+from .async_runner import AsyncSearchRunner
+from .batch_runner import BatchSearchRunner
+from .distributed_runner import DistributedSearchRunner
+from .mixed_runner import MixedWorkloadRunner
 from .mp_runner import (
     MultiProcessingSearchRunner,
 )
-from .serial_runner import SerialInsertRunner, SerialSearchRunner
+from .open_loop_runner import OpenLoopSearchRunner
+from .parallel_insert_runner import ParallelInsertRunner
+from .read_write_runner import ReadWriteRunner
+from .serial_runner import SerialDeleteRunner, SerialInsertRunner, SerialSearchRunner
+from .threaded_runner import ThreadedSearchRunner
+from .trace_runner import TraceReplayRunner
 
 __all__ = [
+    "AsyncSearchRunner",
+    "BatchSearchRunner",
+    "DistributedSearchRunner",
+    "MixedWorkloadRunner",
     "MultiProcessingSearchRunner",
+    "OpenLoopSearchRunner",
+    "ParallelInsertRunner",
+    "ReadWriteRunner",
+    "SerialDeleteRunner",
     "SerialInsertRunner",
     "SerialSearchRunner",
+    "ThreadedSearchRunner",
+    "TraceReplayRunner",
 ]
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+import traceback
+from collections.abc import Iterable
+
+from ... import config
+from ...models import LatencySLO
+from ..clients import api
+from .histogram import LatencyHistogram
+from .mp_runner import MultiProcessingSearchRunner, SearchWorkerPool
+from .util import ProcessUsage, SharedArray, ThroughputSeries
+
+log = logging.getLogger(__name__)
+
+
+class AsyncSearchRunner(MultiProcessingSearchRunner):
+    """asyncio search runner, keeps `concurrency` requests in flight with coroutines on the event loop
+    of a few processes instead of one process for each request.
+
+    The concurrency of each level is spread evenly over the processes, every process opens
+    `db.ainit()` once, with connection pools sized to its largest share of the concurrency,
+    and awaits `db.asearch_embedding`. The outputs are the same as MultiProcessingSearchRunner's.
+
+    Args:
+        num_processes(int): number of processes running an event loop, default to 1
+        concurrency(Iterable): concurrencies, default [1, 5, 10, 15, 20, 25, 30, 35]
+        duration(int): duration for each concurency, default to 30s
+    """
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        test_data: list[list[float]],
+        k: int = config.K_DEFAULT,
+        filters: dict | None = None,
+        concurrencies: Iterable[int] = config.NUM_CONCURRENCY,
+        duration: int = config.CONCURRENCY_DURATION,
+        concurrency_timeout: int = config.CONCURRENCY_TIMEOUT,
+        warmup_duration: int = config.CONCURRENCY_WARMUP_DURATION,
+        adaptive: bool = False,
+        saturation_gain: float = config.SATURATION_QPS_GAIN,
+        saturation_latency_limit: float = 0.0,
+        latency_slos: Iterable[LatencySLO] = (),
+        pin_workers: bool = False,
+        client_cpu_threshold: float = config.CLIENT_BOUND_CPU_PERCENT,
+        num_processes: int = 1,
+    ):
+        if not db.support_async_search():
+            msg = f"{db.__class__.__name__} doesn't implement asearch_embedding"
+            raise NotImplementedError(msg)
+
+        super().__init__(
+            db=db,
+            test_data=test_data,
+            k=k,
+            filters=filters,
+            concurrencies=concurrencies,
+            duration=duration,
+            concurrency_timeout=concurrency_timeout,
+            warmup_duration=warmup_duration,
+            adaptive=adaptive,
+            saturation_gain=saturation_gain,
+            saturation_latency_limit=saturation_latency_limit,
+            latency_slos=latency_slos,
+            pin_workers=pin_workers,
+            client_cpu_threshold=client_cpu_threshold,
+        )
+        self.num_processes = num_processes
+
+    def _search_worker(
+        self,
+        test_data: SharedArray,
+        task_q: mp.Queue,
+        ready_q: mp.Queue,
+        result_q: mp.Queue,
+    ) -> None:
+        asyncio.run(self._async_search_worker(test_data, task_q, ready_q, result_q))
+
+    async def _async_search_worker(
+        self,
+        test_data: SharedArray,
+        task_q: mp.Queue,
+        ready_q: mp.Queue,
+        result_q: mp.Queue,
+    ) -> None:
+        """Keep the async connections open and run the tasks of every concurrency level on the event loop.
+        The blocking waits for the tasks and the barrier run in the default executor, off the loop."""
+        loop = asyncio.get_running_loop()
+        with self.db.init():
+            async with self.db.ainit(concurrency=self._coroutines_per_process()):
+                ready_q.put(os.getpid())
+                while (task := await loop.run_in_executor(None, task_q.get)) is not None:
+                    barrier, func, kwargs = task
+                    try:
+                        await loop.run_in_executor(None, barrier.wait)
+                        with ProcessUsage.measure() as usage:
+                            res = await getattr(self, func)(test_data, **kwargs)
+                    except Exception as e:
+                        log.warning(f"({mp.current_process().name:16}) async search worker error: {e}")
+                        try:
+                            result_q.put(e)
+                        except Exception:
+                            result_q.put(RuntimeError(repr(e)))
+                        return
+                    result_q.put((*res, usage))
+
+    async def asearch(
+        self,
+        test_data: SharedArray,
+        worker_id: int,
+        duration: float,
+        concurrency: int,
+    ) -> tuple[int, float, LatencyHistogram, ThroughputSeries, api.PhaseTimer]:
+        """Search the test data endlessly for `duration` seconds with `concurrency` coroutines.
+        The phases of concurrent coroutines overlap on the event loop, they are not timed."""
+        num = len(test_data)
+        start_time = time.perf_counter()
+        end_time = start_time + duration
+        count = 0
+        latencies = LatencyHistogram()
+        series = ThroughputSeries()
+
+        async def search_loop():
+            nonlocal count
+            idx = random.randint(0, num - 1)
+            while time.perf_counter() < end_time:
+                query = test_data[idx].tolist()
+                s = time.perf_counter()
+                try:
+                    await self.db.asearch_embedding(
+                        query,
+                        self.k,
+                        self.filters,
+                    )
+                except Exception as e:
+                    log.warning(f"VectorDB asearch_embedding error: {e}")
+                    traceback.print_exc(chain=True)
+                    raise e from None
+
+                latencies.record(time.perf_counter() - s)
+                series.record(time.time())
+                count += 1
+                idx = idx + 1 if idx < num - 1 else 0
+
+        await asyncio.gather(*[search_loop() for _ in range(concurrency)])
+
+        total_dur = round(time.perf_counter() - start_time, 4)
+        log.debug(
+            f"{mp.current_process().name:16} async search {duration}s with {concurrency} coroutines: "
+            f"actual_dur={total_dur}s, count={count}, qps in this process: {round(count / total_dur, 4):3}"
+        )
+        return (count, total_dur, latencies, series, api.PhaseTimer())
+
+    def _pool_size(self) -> int:
+        return min(self.num_processes, max(self.concurrencies))
+
+    def _coroutines_per_process(self) -> int:
+        """The most coroutines of one process searching at once, over all concurrency levels"""
+        return math.ceil(max(self.concurrencies) / self._pool_size())
+
+    def _run_concurrency(self, pool: SearchWorkerPool, conc: int, duration: float) -> tuple[list, float]:
+        num_workers = min(pool.size, conc)
+        per_worker, remainder = divmod(conc, num_workers)
+        return pool.run_each(
+            "asearch",
+            [{"duration": duration, "concurrency": per_worker + (i < remainder)} for i in range(num_workers)],
+        )
@@ -0,0 +1,113 @@
+import concurrent
+import logging
+import multiprocessing as mp
+import time
+import traceback
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from ... import config
+from ...metric import calc_recall_batch, ground_truth_array
+from .. import utils
+from ..clients import api
+from .histogram import LatencyHistogram
+
+log = logging.getLogger(__name__)
+
+
+class BatchSearchRunner:
+    """Search the entire test data with batched nq > 1 requests, once for each batch size.
+
+    Reports the throughput in query vectors/s, the latency of one batch request, and the
+    recall against the ground truth, all measured in one subprocess and one connection.
+
+    Args:
+        batch_sizes(Iterable): number of queries of each request, default [1, 10, 100]
+    """
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        test_data: np.ndarray,
+        ground_truth: pd.DataFrame | np.ndarray,
+        batch_sizes: Iterable[int] = config.BATCH_SEARCH_SIZES,
+        k: int = config.K_DEFAULT,
+        filters: dict | None = None,
+    ):
+        self.db = db
+        self.k = k
+        self.filters = filters
+        self.batch_sizes = batch_sizes
+        self.test_data = np.asarray(test_data, dtype=np.float32)
+        self.ground_truth = ground_truth
+
+    def _search_batches(self, batch_size: int) -> tuple[np.ndarray, LatencyHistogram]:
+        """Search the test data in requests of `batch_size` queries on the already initialized db
+
+        Returns:
+            tuple[np.ndarray, LatencyHistogram]: (nq, k) result ids, and the latency of each request
+        """
+        got = np.full((len(self.test_data), self.k), -1, dtype=np.int64)
+        latencies = LatencyHistogram()
+        for start in range(0, len(self.test_data), batch_size):
+            queries = self.test_data[start : start + batch_size]
+            s = time.perf_counter()
+            try:
+                results = self.db.search_embeddings(queries, self.k, self.filters)
+            except Exception as e:
+                log.warning(f"VectorDB search_embeddings error: {e}")
+                traceback.print_exc(chain=True)
+                raise e from None
+            latencies.record(time.perf_counter() - s)
+
+            for i, ids in enumerate(results):
+                top_k = ids[: self.k]
+                got[start + i, : len(top_k)] = top_k
+        return got, latencies
+
+    def search(self) -> tuple[list[int], list[float], list[float], list[float], list[float]]:
+        log.info(f"{mp.current_process().name:14} start batched search with nq in {self.batch_sizes}")
+        gt = None
+        if self.ground_truth is not None:
+            neighbors = (
+                self.ground_truth if isinstance(self.ground_truth, np.ndarray) else self.ground_truth["neighbors_id"]
+            )
+            gt = ground_truth_array(neighbors[: len(self.test_data)], self.k)
+
+        batch_size_list, vps_list, latency_p50_list, latency_p99_list, recall_list = [], [], [], [], []
+        with self.db.init():
+            for batch_size in self.batch_sizes:
+                got, latencies = self._search_batches(batch_size)
+                cost = latencies.sum
+                vps = round(len(self.test_data) / cost, 4) if cost > 0 else 0.0
+                p50, p99 = latencies.percentiles([50, 99])
+                recall = round(float(np.mean(calc_recall_batch(self.k, gt, got))), 4) if gt is not None else 0.0
+
+                batch_size_list.append(batch_size)
+                vps_list.append(vps)
+                latency_p50_list.append(p50)
+                latency_p99_list.append(p99)
+                recall_list.append(recall)
+                log.info(
+                    f"{mp.current_process().name:14} batched search with nq={batch_size}: "
+                    f"cost={round(cost, 4)}s, requests={latencies.count}, vectors/s={vps}, "
+                    f"batch_latency_p50={p50}, batch_latency_p99={p99}, avg_recall={recall}"
+                )
+
+        return (batch_size_list, vps_list, latency_p50_list, latency_p99_list, recall_list)
+
+    def _run_in_subprocess(self) -> tuple[list[int], list[float], list[float], list[float], list[float]]:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.search)
+            return future.result()
+
+    @utils.time_it
+    def run(self) -> tuple[list[int], list[float], list[float], list[float], list[float]]:
+        """
+        Returns:
+            tuple[tuple[list, list, list, list, list], float]: (batch_size_list, vps_list,
+                latency_p50_list, latency_p99_list, recall_list), cost
+        """
+        return self._run_in_subprocess()
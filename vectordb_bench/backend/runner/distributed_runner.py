@@ -0,0 +1,164 @@
+import contextlib
+import copy
+import logging
+import math
+import time
+from multiprocessing.connection import Client, Connection, Listener
+
+from ... import config
+from ...models import ConcurrencySlotTimeoutError
+from .mp_runner import MultiProcessingSearchRunner
+
+log = logging.getLogger(__name__)
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return (host or "localhost", int(port) if port else config.AGENT_PORT)
+
+
+def agent_authkey() -> bytes:
+    """The AGENT_AUTHKEY shared by the agents and the coordinator, there is no default one to fall back on"""
+    if not config.AGENT_AUTHKEY:
+        msg = "AGENT_AUTHKEY is not set, set the same private key in the env of the agents and the coordinator"
+        raise ValueError(msg)
+    return config.AGENT_AUTHKEY.encode()
+
+
+class AgentPool:
+    """The search agents of a DistributedSearchRunner, used in place of its SearchWorkerPool.
+
+    Every agent gets a copy of the search runner, with the test data and the db, and opens its own
+    worker pool for its share of the largest concurrency. Each level is then split over the agents,
+    which all release their workers at the same wall-clock timestamp.
+
+    Messages are pickled, so anyone holding AGENT_AUTHKEY can run code on the agents: only connect
+    to agents you trust, with a private key.
+
+    The start timestamp and the per-second series of the agents are `time.time()` of each host,
+    so the results depend on the clock skew between the hosts: a skew of s seconds starts some
+    agents s seconds late and shifts their series by s. Synchronize the clocks, e.g. with NTP,
+    to well below a second.
+    """
+
+    def __init__(
+        self,
+        runner: MultiProcessingSearchRunner,
+        addresses: list[str],
+        timeout: int = config.CONCURRENCY_TIMEOUT,
+    ):
+        self.runner = runner
+        self.addresses = addresses
+        self.timeout = timeout
+        self.size = 0
+        self._conns: list[Connection] = []
+
+    def _recv(self, conn: Connection, address: str, timeout: float) -> object:
+        if not conn.poll(timeout if timeout > 0 else None):
+            log.warning(f"search agent {address} didn't answer in {timeout}s")
+            raise ConcurrencySlotTimeoutError
+        status, payload = conn.recv()
+        if status == "error":
+            msg = f"search agent {address} error: {payload}"
+            raise RuntimeError(msg)
+        return payload
+
+    def __enter__(self):
+        for address in self.addresses:
+            conn = Client(parse_address(address), authkey=agent_authkey())
+            self._conns.append(conn)
+            conn.send(("setup", self.runner))
+        for address, conn in zip(self.addresses, self._conns, strict=True):
+            self.size += self._recv(conn, address, self.timeout)
+        log.info(f"All {len(self._conns)} search agents are connected, {self.size} workers in total")
+        return self
+
+    def __exit__(self, *exc_info):
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+                conn.close()
+            except OSError as e:
+                log.warning(f"Failed to close the connection to a search agent: {e}")
+        self._conns, self.size = [], 0
+
+    def run(self, concurrencies: list[int], duration: float) -> tuple[list, float]:
+        """Search with concurrencies[i] on the i-th agent for `duration` seconds, starting all at once
+
+        Returns:
+            tuple[list, float]: results of every worker of all agents, and the cost from the start
+        """
+        start_at = time.time() + config.AGENT_START_DELAY
+        running = []
+        for address, conn, conc in zip(self.addresses, self._conns, concurrencies, strict=False):
+            if conc > 0:
+                conn.send(("run", (conc, duration, start_at)))
+                running.append((address, conn))
+
+        results = []
+        for address, conn in running:
+            results.extend(self._recv(conn, address, config.AGENT_START_DELAY + duration + self.timeout))
+        return results, time.time() - start_at
+
+
+class DistributedSearchRunner(MultiProcessingSearchRunner):
+    """Coordinator of the concurrent search over several `vectordbbench agent` hosts.
+
+    Every concurrency level is split evenly over the agents, each one running `runner` locally.
+    Their latency histograms, counts and per-second series are merged here the same way as the
+    results of local workers, so warm-up, adaptive search and latency SLOs work unchanged.
+
+    The hosts' clocks should be synchronized, see AgentPool.
+
+    Args:
+        runner(MultiProcessingSearchRunner): the search runner shipped to the agents
+        agents(list[str]): host:port of each agent
+    """
+
+    def __init__(self, runner: MultiProcessingSearchRunner, agents: list[str]):
+        agent_authkey()
+        super().__init__(**runner.search_config())
+        self.runner = runner
+        self.agents = agents
+
+    def _worker_pool(self) -> AgentPool:
+        agent_runner = copy.copy(self.runner)
+        agent_runner.concurrencies = [math.ceil(max(self.concurrencies) / len(self.agents))]
+        return AgentPool(agent_runner, self.agents, timeout=self.concurrency_timeout)
+
+    def _run_concurrency(self, pool: AgentPool, conc: int, duration: float) -> tuple[list, float]:
+        per_agent, remainder = divmod(conc, len(self.agents))
+        return pool.run([per_agent + (i < remainder) for i in range(len(self.agents))], duration)
+
+
+def _serve_coordinator(conn: Connection):
+    """Open the worker pool of the shipped runner, and search each level the coordinator schedules"""
+    _, runner = conn.recv()
+    try:
+        with runner._worker_pool() as pool:
+            conn.send(("ready", pool.size))
+            while (msg := conn.recv())[0] == "run":
+                conc, duration, start_at = msg[1]
+                time.sleep(max(0.0, start_at - time.time()))
+                results, _ = runner._run_concurrency(pool, conc, duration)
+                log.info(f"Searched {duration}s in concurrency {conc}, count={sum([r[0] for r in results])}")
+                conn.send(("ok", results))
+    except EOFError:
+        log.warning("Coordinator disconnected")
+    except Exception as e:
+        log.warning(f"Search agent error: {e}")
+        with contextlib.suppress(OSError):
+            conn.send(("error", repr(e)))
+    finally:
+        runner.stop()
+
+
+def serve_agent(host: str = "127.0.0.1", port: int = config.AGENT_PORT):
+    """Serve the coordinators connecting one after another, until interrupted.
+    Only listens on the loopback interface unless another `host` is given."""
+    with Listener((host, port), authkey=agent_authkey()) as listener:
+        log.info(f"Search agent listening on {host}:{port}")
+        while True:
+            with listener.accept() as conn:
+                log.info(f"Coordinator connected from {listener.last_accepted}")
+                _serve_coordinator(conn)
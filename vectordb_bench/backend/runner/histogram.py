@@ -0,0 +1,102 @@
+import math
+from collections.abc import Iterable
+from typing import Self
+
+import numpy as np
+
+LATENCY_MIN = 1e-6  # 1us
+LATENCY_MAX = 3600.0  # 1h
+RELATIVE_PRECISION = 0.01
+
+
+class LatencyHistogram:
+    """Fixed-size, log-bucketed latency histogram in seconds.
+
+    Bucket i covers [min_value * base**i, min_value * base**(i+1)), base = 1 + precision,
+    so every recorded value is reported with at most `precision` relative error.
+    Values out of [min_value, max_value] are clamped into the first or last bucket.
+
+    Recording is O(1) and merging two histograms is O(buckets), which makes it cheap
+    to record millions of latencies in each worker and ship them back to the parent.
+
+    Examples:
+        >>> hist = LatencyHistogram()
+        >>> hist.record(0.0015)
+        >>> hist.merge(other_hist)
+        >>> hist.percentile(99)
+    """
+
+    def __init__(
+        self,
+        min_value: float = LATENCY_MIN,
+        max_value: float = LATENCY_MAX,
+        precision: float = RELATIVE_PRECISION,
+    ):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.num_buckets = self._bucket_index(max_value) + 1
+        self.counts = [0] * self.num_buckets
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _bucket_index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_base)
+
+    def record(self, value: float):
+        idx = self._bucket_index(value)
+        self.counts[idx if idx < self.num_buckets else self.num_buckets - 1] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _check_compatible(self, other: Self):
+        if (self.min_value, self.max_value, self.precision) != (other.min_value, other.max_value, other.precision):
+            msg = "Cannot merge latency histograms with different bucket layouts"
+            raise ValueError(msg)
+
+    def merge(self, other: Self) -> Self:
+        """Add the counts of other into this histogram in place"""
+        self._check_compatible(other)
+        self.counts = [a + b for a, b in zip(self.counts, other.counts, strict=True)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def merge_all(cls, hists: Iterable[Self]) -> Self:
+        merged = cls()
+        for h in hists:
+            merged.merge(h)
+        return merged
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Value at the q-th percentile (0 <= q <= 100), 0.0 if nothing recorded"""
+        return self.percentiles([q])[0]
+
+    def percentiles(self, qs: Iterable[float]) -> list[float]:
+        if self.count == 0:
+            return [0.0 for _ in qs]
+
+        cumsum = np.cumsum(self.counts)
+        values = []
+        for q in qs:
+            rank = max(math.ceil(q / 100 * self.count), 1)
+            idx = int(np.searchsorted(cumsum, rank))
+            # geometric middle of the bucket, never outside of the observed range
+            value = self.min_value * math.exp(self._log_base * (idx + 0.5))
+            values.append(min(max(value, self.min), self.max))
+        return values
@@ -0,0 +1,322 @@
+import logging
+import multiprocessing as mp
+import random
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from ... import config
+from ...metric import ground_truth_array
+from ...models import WorkloadOp
+from ..clients import api
+from ..dataset import DatasetManager
+from .histogram import LatencyHistogram
+from .mp_runner import MultiProcessingSearchRunner, SearchWorkerPool
+from .open_loop_runner import LATE_THRESHOLD
+from .util import SharedArray, ThroughputSeries
+
+log = logging.getLogger(__name__)
+
+
+class MixedWorkloadRunner(MultiProcessingSearchRunner):
+    """Drive a mix of searches, upserts and deletes at a target total ops/s from one pool of workers.
+
+    Upserts and deletes pick single rows from a pool of the dataset: the nearest neighbors of the
+    test queries, best ranked first, so that they actually move the results of the searches. A
+    shared flag per pool row tracks which ones are deleted, an upsert writes the row back with its
+    original vector. The live ground truth of a query is then its ground truth without the deleted
+    rows, and the recall of every search is checked against it, averaged per `recall_window`.
+
+    Like OpenLoopSearchRunner, the operations are issued on a fixed arrival schedule, and their
+    latency is measured from the scheduled send time. The deleted rows are upserted back at the end,
+    also when the workload fails.
+
+    Args:
+        ratios(dict[WorkloadOp, float]): share of each operation, summing to 1
+        rate(int): total operations per second of all workers
+        num_workers(int): number of worker connections, at most the rows of the pool if there are writes
+        pool_size(int): maximum rows of the dataset the upserts and deletes pick from
+    """
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        test_data: list[list[float]],
+        ground_truth: pd.DataFrame | np.ndarray,
+        dataset: DatasetManager,
+        ratios: dict[WorkloadOp, float],
+        rate: int = config.MIXED_WORKLOAD_RATE,
+        num_workers: int = max(config.NUM_CONCURRENCY),
+        pool_size: int = config.MIXED_WORKLOAD_POOL_SIZE,
+        recall_window: float = config.MIXED_WORKLOAD_RECALL_WINDOW,
+        normalize: bool = False,
+        k: int = config.K_DEFAULT,
+        filters: dict | None = None,
+        duration: int = config.CONCURRENCY_DURATION,
+        concurrency_timeout: int = config.CONCURRENCY_TIMEOUT,
+    ):
+        super().__init__(
+            db=db,
+            test_data=test_data,
+            k=k,
+            filters=filters,
+            concurrencies=[num_workers],
+            duration=duration,
+            concurrency_timeout=concurrency_timeout,
+        )
+        self.ratios = ratios
+        self.rate = rate
+        self.num_workers = num_workers
+        self.recall_window = recall_window
+
+        neighbors = ground_truth if isinstance(ground_truth, np.ndarray) else ground_truth["neighbors_id"]
+        self.ground_truth = ground_truth_array(neighbors[: len(self.test_data)], max(len(n) for n in neighbors))
+        self.pool_ids, pool_vectors = self._read_pool(dataset, pool_size, normalize)
+        self._pool_pos = {int(row_id): pos for pos, row_id in enumerate(self.pool_ids)}
+        self._pool_vectors = pool_vectors
+        self._shared_pool_vectors: SharedArray | None = None
+        self._deleted: SharedArray | None = None
+
+        writes = ratios.get(WorkloadOp.UPSERT, 0) + ratios.get(WorkloadOp.DELETE, 0)
+        if writes > 0 and num_workers > len(self.pool_ids):
+            msg = (
+                f"{num_workers} workers of the mixed workload can't own a row each of the {len(self.pool_ids)} "
+                f"rows the upserts and deletes pick from, use at most {len(self.pool_ids)} workers"
+            )
+            raise ValueError(msg)
+
+    def _read_pool(self, dataset: DatasetManager, pool_size: int, normalize: bool) -> tuple[np.ndarray, np.ndarray]:
+        """The ground truth neighbors of the test queries, rank by rank, and their vectors from the dataset"""
+        ranked = self.ground_truth[:, : self.k].flatten(order="F")
+        ranked = ranked[ranked >= 0]
+        _, first = np.unique(ranked, return_index=True)
+        wanted = ranked[np.sort(first)][:pool_size]
+
+        found_ids, found_vectors = [], []
+        for ids, vectors in dataset.iter_arrays():
+            mask = np.isin(ids, wanted)
+            if mask.any():
+                found_ids.append(ids[mask])
+                found_vectors.append(vectors[mask])
+        if not found_ids:
+            msg = "none of the ground truth neighbors of the test queries is in the dataset"
+            raise ValueError(msg)
+
+        pool_ids, pool_vectors = np.concatenate(found_ids), np.concatenate(found_vectors).astype(np.float32)
+        if normalize:
+            pool_vectors = pool_vectors / np.linalg.norm(pool_vectors, axis=1)[:, np.newaxis]
+        log.info(f"Mixed workload picks the upserts and deletes from {len(pool_ids)} neighbors of the test queries")
+        return pool_ids, pool_vectors
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        if self._shared_pool_vectors is not None:
+            state["_pool_vectors"] = None
+        return state
+
+    def _share_pool(self) -> tuple[SharedArray, SharedArray]:
+        if self._shared_pool_vectors is None:
+            self._shared_pool_vectors = SharedArray(self._pool_vectors)
+            self._deleted = SharedArray(np.zeros(len(self.pool_ids)), dtype=np.bool_)
+        return self._shared_pool_vectors, self._deleted
+
+    def stop(self) -> None:
+        super().stop()
+        for shared in (self._shared_pool_vectors, self._deleted):
+            if shared is not None:
+                shared.close()
+        self._shared_pool_vectors, self._deleted = None, None
+
+    def _live_recall(self, query_idx: int, got: list[int], deleted: SharedArray) -> float | None:
+        """Recall against the ground truth of the query without the currently deleted rows,
+        None if all its neighbors are deleted"""
+        live = []
+        for row_id in self.ground_truth[query_idx]:
+            pos = self._pool_pos.get(int(row_id))
+            if row_id >= 0 and (pos is None or not deleted[pos]):
+                live.append(int(row_id))
+                if len(live) == self.k:
+                    break
+        if not live:
+            return None
+        return len(set(got[: self.k]) & set(live)) / len(live)
+
+    def _apply(self, op: WorkloadOp, test_data: SharedArray, rng: random.Random, state: dict) -> float | None:
+        """Issue one operation, returns the recall of a search"""
+        if op == WorkloadOp.SEARCH:
+            query_idx = state["query_idx"] = (state["query_idx"] + 1) % len(test_data)
+            got = self.db.search_embedding(test_data[query_idx].tolist(), self.k, self.filters)
+            return self._live_recall(query_idx, got, state["deleted"])
+
+        pos = rng.choice(state["own"])
+        row_id = int(self.pool_ids[pos])
+        if op == WorkloadOp.UPSERT:
+            _, error = self.db.upsert_embeddings([state["vectors"][pos].tolist()], [row_id])
+        else:
+            _, error = self.db.delete_embeddings([row_id])
+        if error is not None:
+            raise error
+        state["deleted"].array[pos] = op == WorkloadOp.DELETE
+        return None
+
+    def mixed_ops(
+        self,
+        test_data: SharedArray,
+        worker_id: int,
+        pool_vectors: SharedArray,
+        deleted: SharedArray,
+    ) -> tuple[int, float, dict[WorkloadOp, LatencyHistogram], int, dict[int, list[float]], ThroughputSeries]:
+        """Issue this worker's share of the workload for `duration` seconds, upserting and deleting
+        only the pool rows of its own, so the workers never race on a row
+
+        Returns:
+            tuple: (count, actual duration, latencies of each operation, late count,
+                sum and count of the search recalls of each window, per-second series of all operations)
+        """
+        rng = random.Random(worker_id)
+        ops, weights = list(self.ratios), list(self.ratios.values())
+        state = {
+            "query_idx": rng.randrange(len(test_data)),
+            "own": range(worker_id, len(self.pool_ids), self.num_workers),
+            "vectors": pool_vectors,
+            "deleted": deleted,
+        }
+        interval = self.num_workers / self.rate
+
+        start_time = time.perf_counter()
+        end_time = start_time + self.duration
+        scheduled = start_time + interval * worker_id / self.num_workers
+        late = 0
+        latencies = {op: LatencyHistogram() for op in ops}
+        recalls: dict[int, list[float]] = {}
+        series = ThroughputSeries()
+        while scheduled < end_time:
+            now = time.perf_counter()
+            if now >= end_time:
+                break
+            if now < scheduled:
+                time.sleep(scheduled - now)
+            elif now - scheduled > LATE_THRESHOLD:
+                late += 1
+
+            op = rng.choices(ops, weights)[0]
+            try:
+                recall = self._apply(op, test_data, rng, state)
+            except Exception as e:
+                log.warning(f"VectorDB {op} error: {e}")
+                traceback.print_exc(chain=True)
+                raise e from None
+
+            latencies[op].record(time.perf_counter() - scheduled)
+            series.record(time.time())
+            if recall is not None:
+                window = recalls.setdefault(int((scheduled - start_time) / self.recall_window), [0.0, 0])
+                window[0] += recall
+                window[1] += 1
+            scheduled += interval
+
+        count = sum([h.count for h in latencies.values()])
+        total_dur = round(time.perf_counter() - start_time, 4)
+        log.debug(
+            f"{mp.current_process().name:16} mixed workload {self.duration}s at {self.rate} ops/s: "
+            f"actual_dur={total_dur}s, count={count}, late={late}"
+        )
+        return (count, total_dur, latencies, late, recalls, series)
+
+    def restore(
+        self,
+        test_data: SharedArray,
+        worker_id: int,
+        pool_vectors: SharedArray,
+        deleted: SharedArray,
+    ) -> tuple[int]:
+        """Upsert the deleted pool rows back, so that the dataset is whole again"""
+        positions = np.flatnonzero(deleted.array)
+        for start in range(0, len(positions), config.NUM_PER_BATCH):
+            batch = positions[start : start + config.NUM_PER_BATCH]
+            _, error = self.db.upsert_embeddings(pool_vectors[batch].tolist(), self.pool_ids[batch].tolist())
+            if error is not None:
+                raise error
+            deleted.array[batch] = False
+        return (len(positions),)
+
+    def _restore_pool(self, pool_vectors: SharedArray, deleted: SharedArray) -> None:
+        """Upsert the deleted rows back with a worker of its own, the workload pool may be broken by a failure"""
+        if not deleted.array.any():
+            return
+        with SearchWorkerPool(self, size=1, timeout=self.concurrency_timeout) as pool:
+            (restored,), _ = pool.run(1, "restore", pool_vectors=pool_vectors, deleted=deleted)
+        log.info(f"Upserted {restored[0]} deleted rows back after the mixed workload")
+
+    def _run_workload(self) -> dict:
+        try:
+            pool_vectors, deleted = self._share_pool()
+            try:
+                with SearchWorkerPool(self, size=self.num_workers, timeout=self.concurrency_timeout) as pool:
+                    log.info(
+                        f"Start mixed workload {self.duration}s at {self.rate} ops/s, "
+                        f"ratios={ {op.value: round(r, 4) for op, r in self.ratios.items()} }, "
+                        f"workers={self.num_workers}, filters: {self.filters}"
+                    )
+                    results, cost = pool.run(
+                        self.num_workers,
+                        "mixed_ops",
+                        pool_vectors=pool_vectors,
+                        deleted=deleted,
+                    )
+            except Exception:
+                # the failure of the workload is the one to report, not a failed restore after it
+                try:
+                    self._restore_pool(pool_vectors, deleted)
+                except Exception as restore_error:
+                    log.warning(f"Failed to restore the deleted rows after the failed mixed workload: {restore_error}")
+                raise
+            self._restore_pool(pool_vectors, deleted)
+        except Exception as e:
+            log.warning(f"Fail to run the mixed workload, ratios: {self.ratios}, reason={e}")
+            traceback.print_exc()
+            raise e from None
+        finally:
+            self.stop()
+
+        ops = list(self.ratios)
+        latencies = {op: LatencyHistogram.merge_all([r[2][op] for r in results]) for op in ops}
+        recalls: dict[int, list[float]] = {}
+        for r in results:
+            for window, (recall_sum, recall_count) in r[4].items():
+                total = recalls.setdefault(window, [0.0, 0])
+                total[0] += recall_sum
+                total[1] += recall_count
+        recall_count = sum([n for _, n in recalls.values()])
+        recall = round(sum([s for s, _ in recalls.values()]) / recall_count, 4) if recall_count else 0.0
+        series = ThroughputSeries.merge_all([r[5] for r in results])
+        qps = series.qps(cost)
+        late = sum([r[3] for r in results])
+        log.info(f"End mixed workload: achieved ops/s={qps}, late={late}, avg_recall={recall}")
+        for op in ops:
+            log.info(f"Mixed workload {op}: count={latencies[op].count}, p99={latencies[op].percentile(99):.4f}s")
+
+        windows = sorted(recalls)
+        return {
+            "mixed_qps": qps,
+            "mixed_qps_timeline": series.counts,
+            "mixed_late": late,
+            "mixed_recall": recall,
+            "mixed_op_list": [op.value for op in ops],
+            "mixed_op_count_list": [latencies[op].count for op in ops],
+            "mixed_op_latency_p50_list": [latencies[op].percentile(50) for op in ops],
+            "mixed_op_latency_p99_list": [latencies[op].percentile(99) for op in ops],
+            "mixed_recall_window_start_list": [w * self.recall_window for w in windows],
+            "mixed_recall_list": [round(recalls[w][0] / recalls[w][1], 4) for w in windows],
+        }
+
+    def run(self) -> dict:
+        """
+        Returns:
+            dict: results keyed by their Metric field names, the achieved ops/s, per-second operations, late
+                operations and mean search recall of the workload, then the name, count, p50 and p99 latency
+                of each operation, then the start second and mean search recall of each recall window
+        """
+        return self._run_workload()
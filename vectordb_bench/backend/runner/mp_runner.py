@@ -1,22 +1,173 @@
 import concurrent
+import contextlib
+import inspect
 import logging
 import multiprocessing as mp
+import os
 import random
+import sys
+import threading
 import time
 import traceback
-from collections.abc import Iterable
-from multiprocessing.queues import Queue
+from collections.abc import Iterable, Iterator
+from queue import Empty
 
 import numpy as np
+import psutil
 
 from ... import config
-from ...models import ConcurrencySlotTimeoutError
+from ...metric import calc_qps_under_latency
+from ...models import ConcurrencySlotTimeoutError, LatencySLO
 from ..clients import api
+from .histogram import LatencyHistogram
+from .util import ProcessUsage, SharedArray, ThroughputSeries
 
 NUM_PER_BATCH = config.NUM_PER_BATCH
+SATURATION_GROWTH_FACTOR = 2  # concurrency multiplier of each step of the adaptive search
+SATURATION_REFINE_STEPS = 2  # bisections around the best concurrency once the growth stops
 log = logging.getLogger(__name__)
 
 
+class SearchWorkerPool:
+    """A long-lived pool of search worker processes shared by all concurrency levels.
+
+    Each worker opens `db.init()` once and keeps the connection while idle. For every
+    concurrency level, the first N workers are activated with a task and released
+    together through a barrier, the rest of the pool stays idle.
+
+    Examples:
+        >>> with SearchWorkerPool(runner, size=max(concurrencies)) as pool:
+        >>>     for conc in concurrencies:
+        >>>         results, cost = pool.run(conc, "search", duration=30)
+    """
+
+    def __init__(self, runner: "MultiProcessingSearchRunner", size: int, timeout: int = config.CONCURRENCY_TIMEOUT):
+        self.runner = runner
+        self.size = size
+        self.timeout = timeout
+
+        self._manager = None
+        self._executor: concurrent.futures.ProcessPoolExecutor | None = None
+        self._futures: list[concurrent.futures.Future] = []
+        self._task_qs: list[mp.Queue] = []
+
+    def __enter__(self):
+        self._manager = mp.Manager()
+        try:
+            self._task_qs = [self._manager.Queue() for _ in range(self.size)]
+            self._ready_q, self._result_q = self._manager.Queue(), self._manager.Queue()
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                mp_context=self.runner.get_mp_context(),
+                max_workers=self.size,
+            )
+            test_data = self.runner._share_test_data()
+
+            log.info(f"Start {self.size} search workers")
+            self._futures = [
+                self._executor.submit(self.runner._search_worker, test_data, task_q, self._ready_q, self._result_q)
+                for task_q in self._task_qs
+            ]
+            self._wait_for_queue_fill(self._ready_q, size=self.size)
+            log.info(f"All {self.size} search workers are connected")
+            if self.runner.pin_workers:
+                self._pin_workers([self._ready_q.get() for _ in range(self.size)])
+        except BaseException:
+            self._kill_connecting_workers()
+            self.__exit__(*sys.exc_info())
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        for task_q in self._task_qs:
+            task_q.put(None)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        self._manager.shutdown()
+        self._executor, self._manager, self._futures, self._task_qs = None, None, [], []
+
+    def _kill_connecting_workers(self):
+        """Kill the workers still in db.init(), the shutdown would wait for them, maybe forever after a timeout"""
+        if self._executor is None:
+            return
+        ready = {self._ready_q.get() for _ in range(self._ready_q.qsize())}
+        for pid in list(self._executor._processes):
+            if pid not in ready:
+                with contextlib.suppress(psutil.Error):
+                    psutil.Process(pid).kill()
+
+    def _pin_workers(self, pids: list[int]):
+        """Pin each worker to a core of its own, round robin over the cores this process may run on"""
+        try:
+            cores = psutil.Process().cpu_affinity()
+            for i, pid in enumerate(pids):
+                psutil.Process(pid).cpu_affinity([cores[i % len(cores)]])
+        except (AttributeError, psutil.Error) as e:
+            log.warning(f"Failed to pin the search workers to cores: {e}")
+            return
+        if len(pids) > len(cores):
+            log.warning(f"{len(pids)} search workers share {len(cores)} cores, some cores host several workers")
+        log.info(f"Pinned {len(pids)} search workers to cores {cores[: len(pids)]}")
+
+    def _check_workers(self):
+        """Raise the error of any worker that exited unexpectedly"""
+        for f in self._futures:
+            if f.done():
+                f.result()
+                msg = "search worker exited unexpectedly"
+                raise RuntimeError(msg)
+
+    def _wait_for_queue_fill(self, q: mp.Queue, size: int):
+        wait_t = 0
+        while q.qsize() < size:
+            self._check_workers()
+            sleep_t = 1
+            wait_t += sleep_t
+            if wait_t > self.timeout > 0:
+                raise ConcurrencySlotTimeoutError
+            time.sleep(sleep_t)
+
+    def _collect(self, num: int) -> list:
+        results = []
+        while len(results) < num:
+            try:
+                res = self._result_q.get(timeout=1)
+            except Empty:
+                self._check_workers()
+                continue
+
+            if isinstance(res, Exception):
+                raise res
+            results.append(res)
+        return results
+
+    def run(self, num: int, task: str, **kwargs) -> tuple[list, float]:
+        """Activate the first `num` workers with runner.`task`(test_data, worker_id, **kwargs)
+        and wait for all the results
+
+        Returns:
+            tuple[list, float]: results of each worker, and the cost from the barrier release to the last result
+        """
+        return self.run_each(task, [kwargs] * num)
+
+    def run_each(self, task: str, worker_kwargs: list[dict]) -> tuple[list, float]:
+        """Same as run(), but the i-th worker gets its own kwargs worker_kwargs[i]"""
+        num = len(worker_kwargs)
+        assert 0 < num <= self.size, f"concurrency {num} is out of the pool size {self.size}"
+        barrier = self._manager.Barrier(num + 1)
+        for worker_id, (task_q, kwargs) in enumerate(zip(self._task_qs, worker_kwargs, strict=False)):
+            task_q.put((barrier, task, {"worker_id": worker_id, **kwargs}))
+
+        try:
+            barrier.wait(timeout=self.timeout if self.timeout > 0 else None)
+        except threading.BrokenBarrierError as e:
+            self._check_workers()
+            raise ConcurrencySlotTimeoutError from e
+
+        start = time.perf_counter()
+        results = self._collect(num)
+        return results, time.perf_counter() - start
+
+
 class MultiProcessingSearchRunner:
     """multiprocessing search runner
 
@@ -24,6 +175,15 @@ class MultiProcessingSearchRunner:
         k(int): search topk, default to 100
         concurrency(Iterable): concurrencies, default [1, 5, 10, 15, 20, 25, 30, 35]
         duration(int): duration for each concurency, default to 30s
+        warmup_duration(int): search with the same workers for this long before measuring each
+            concurrency, the warm-up is excluded from qps and latencies and reported apart, default to 0s
+        adaptive(bool): instead of every concurrency, grow it geometrically from 1 up to max(concurrencies)
+            until the qps gain of a step is below `saturation_gain` or the p99 latency is over
+            `saturation_latency_limit` seconds (0 for no limit), then bisect around the best one
+        latency_slos(Iterable[LatencySLO]): report the largest qps meeting each of these latency budgets
+        pin_workers(bool): pin each search worker process to a core of its own
+        client_cpu_threshold(float): flag a concurrency as client-bound when the search workers are busier
+            than this cpu% on average, their qps is then limited by the client rather than by the database
     """
 
     def __init__(
@@ -35,6 +195,13 @@ class MultiProcessingSearchRunner:
         concurrencies: Iterable[int] = config.NUM_CONCURRENCY,
         duration: int = config.CONCURRENCY_DURATION,
         concurrency_timeout: int = config.CONCURRENCY_TIMEOUT,
+        warmup_duration: int = config.CONCURRENCY_WARMUP_DURATION,
+        adaptive: bool = False,
+        saturation_gain: float = config.SATURATION_QPS_GAIN,
+        saturation_latency_limit: float = 0.0,
+        latency_slos: Iterable[LatencySLO] = (),
+        pin_workers: bool = False,
+        client_cpu_threshold: float = config.CLIENT_BOUND_CPU_PERCENT,
     ):
         self.db = db
         self.k = k
@@ -42,58 +209,126 @@ class MultiProcessingSearchRunner:
         self.concurrencies = concurrencies
         self.duration = duration
         self.concurrency_timeout = concurrency_timeout
-
-        self.test_data = test_data
+        self.warmup_duration = warmup_duration
+        self.adaptive = adaptive
+        self.saturation_gain = saturation_gain
+        self.saturation_latency_limit = saturation_latency_limit
+        self.latency_slos = list(latency_slos)
+        self.pin_workers = pin_workers
+        self.client_cpu_threshold = client_cpu_threshold
+
+        self.test_data = np.asarray(test_data, dtype=np.float32)
+        self._shared_test_data: SharedArray | None = None
         log.debug(f"test dataset columns: {len(test_data)}")
 
+    def search_config(self) -> dict:
+        """Arguments of the MultiProcessingSearchRunner constructor, to build another runner of the same search"""
+        params = inspect.signature(MultiProcessingSearchRunner.__init__).parameters
+        return {name: getattr(self, name) for name in params if name != "self"}
+
+    def __getstate__(self) -> dict:
+        """Workers attach to the shared test data by name instead of unpickling a copy of it"""
+        state = self.__dict__.copy()
+        if self._shared_test_data is not None:
+            state["test_data"] = None
+        return state
+
+    def _share_test_data(self) -> SharedArray:
+        """Place the test data into a shared memory block once for all workers of this run"""
+        if self._shared_test_data is None:
+            self._shared_test_data = SharedArray(self.test_data)
+        return self._shared_test_data
+
+    def _release_test_data(self):
+        if self._shared_test_data is not None:
+            self._shared_test_data.close()
+            self._shared_test_data = None
+
+    def _search_worker(
+        self,
+        test_data: SharedArray,
+        task_q: mp.Queue,
+        ready_q: mp.Queue,
+        result_q: mp.Queue,
+    ) -> None:
+        """Keep one connection open and run the tasks of every concurrency level this worker is activated for"""
+        with self.db.init():
+            ready_q.put(os.getpid())
+            self._serve_tasks(test_data, task_q, result_q)
+
+    def _serve_tasks(self, test_data: SharedArray, task_q: mp.Queue, result_q: mp.Queue) -> None:
+        """Run the tasks from task_q until the pool stops, or a task fails"""
+        while (task := task_q.get()) is not None:
+            barrier, func, kwargs = task
+            try:
+                barrier.wait()
+                with ProcessUsage.measure() as usage:
+                    res = getattr(self, func)(test_data, **kwargs)
+            except Exception as e:
+                log.warning(f"({mp.current_process().name:16}) search worker error: {e}")
+                try:
+                    result_q.put(e)
+                except Exception:
+                    result_q.put(RuntimeError(repr(e)))
+                return
+            result_q.put((*res, usage))
+
     def search(
         self,
-        test_data: list[list[float]],
-        q: mp.Queue,
-        cond: mp.Condition,
-    ) -> tuple[int, float]:
-        # sync all process
-        q.put(1)
-        with cond:
-            cond.wait()
+        test_data: SharedArray,
+        worker_id: int,
+        duration: float,
+    ) -> tuple[int, float, LatencyHistogram, ThroughputSeries, api.PhaseTimer]:
+        """Search the test data endlessly for `duration` seconds on the already initialized db"""
+        return self._search_loop(self.db, test_data, duration)
+
+    def _search_loop(
+        self,
+        db: api.VectorDB,
+        test_data: SharedArray,
+        duration: float,
+    ) -> tuple[int, float, LatencyHistogram, ThroughputSeries, api.PhaseTimer]:
+        num, idx = len(test_data), random.randint(0, len(test_data) - 1)
+        phases = db.phase_timer = api.PhaseTimer()
+
+        start_time = time.perf_counter()
+        count = 0
+        latencies = LatencyHistogram()
+        series = ThroughputSeries()
+        while time.perf_counter() < start_time + duration:
+            query = test_data[idx].tolist()
+            s = time.perf_counter()
+            try:
+                db.search_embedding(
+                    query,
+                    self.k,
+                    self.filters,
+                )
+            except Exception as e:
+                log.warning(f"VectorDB search_embedding error: {e}")
+                traceback.print_exc(chain=True)
+                raise e from None
 
-        with self.db.init():
-            num, idx = len(test_data), random.randint(0, len(test_data) - 1)
+            latencies.record(time.perf_counter() - s)
+            series.record(time.time())
+            count += 1
+            # loop through the test data
+            idx = idx + 1 if idx < num - 1 else 0
 
-            start_time = time.perf_counter()
-            count = 0
-            latencies = []
-            while time.perf_counter() < start_time + self.duration:
-                s = time.perf_counter()
-                try:
-                    self.db.search_embedding(
-                        test_data[idx],
-                        self.k,
-                        self.filters,
-                    )
-                except Exception as e:
-                    log.warning(f"VectorDB search_embedding error: {e}")
-                    traceback.print_exc(chain=True)
-                    raise e from None
-
-                latencies.append(time.perf_counter() - s)
-                count += 1
-                # loop through the test data
-                idx = idx + 1 if idx < num - 1 else 0
-
-                if count % 500 == 0:
-                    log.debug(
-                        f"({mp.current_process().name:16}) "
-                        f"search_count: {count}, latest_latency={time.perf_counter()-s}"
-                    )
+            if count % 500 == 0:
+                log.debug(
+                    f"({mp.current_process().name:16}) "
+                    f"search_count: {count}, latest_latency={time.perf_counter()-s}"
+                )
 
+        db.phase_timer = None
         total_dur = round(time.perf_counter() - start_time, 4)
-        log.info(
-            f"{mp.current_process().name:16} search {self.duration}s: "
+        log.debug(
+            f"{mp.current_process().name:16} search {duration}s: "
             f"actual_dur={total_dur}s, count={count}, qps in this process: {round(count / total_dur, 4):3}"
         )
 
-        return (count, total_dur, latencies)
+        return (count, total_dur, latencies, series, phases)
 
     @staticmethod
     def get_mp_context():
@@ -101,46 +336,157 @@ class MultiProcessingSearchRunner:
         log.debug(f"MultiProcessingSearchRunner get multiprocessing start method: {mp_start_method}")
         return mp.get_context(mp_start_method)
 
-    def _run_all_concurrencies_mem_efficient(self):
+    def _worker_pool(self) -> SearchWorkerPool:
+        return SearchWorkerPool(self, size=self._pool_size(), timeout=self.concurrency_timeout)
+
+    def _pool_size(self) -> int:
+        return max(self.concurrencies)
+
+    def _run_concurrency(self, pool: SearchWorkerPool, conc: int, duration: float) -> tuple[list, float]:
+        """Search with `conc` concurrent requests for `duration` seconds
+
+        Returns:
+            tuple[list, float]: (count, duration, latencies, throughput series, search phases, process usage)
+                of each worker, and the cost
+        """
+        return pool.run(conc, "search", duration=duration)
+
+    def _warm_up(self, pool: SearchWorkerPool, conc: int) -> tuple[float, float]:
+        """Search with the workers of this concurrency for warmup_duration, discarded from the measurement
+
+        Returns:
+            tuple[float, float]: qps and p99 latency of the warm-up
+        """
+        log.info(f"Start warm-up {self.warmup_duration}s in concurrency {conc}")
+        results, cost = self._run_concurrency(pool, conc, self.warmup_duration)
+        qps = round(sum([r[0] for r in results]) / cost, 4)
+        p99 = LatencyHistogram.merge_all([r[2] for r in results]).percentile(99)
+        log.info(f"End warm-up in concurrency {conc}: qps={qps}, p99={p99}")
+        return qps, p99
+
+    def _search_concurrency(
+        self,
+        pool: SearchWorkerPool,
+        conc: int,
+        duration: float,
+    ) -> tuple[float, LatencyHistogram, ThroughputSeries, api.PhaseTimer, float, float]:
+        """Search in concurrency `conc` and merge the results of all its workers
+
+        Returns:
+            tuple[float, LatencyHistogram, ThroughputSeries, api.PhaseTimer, float, float]: qps, latencies,
+                the per-second series, the search phases, the mean cpu% of the workers and the context
+                switches/s of all of them
+        """
+        log.info(f"Start search {duration}s in concurrency {conc}, filters: {self.filters}")
+        results, cost = self._run_concurrency(pool, conc, duration)
+
+        all_count = sum([r[0] for r in results])
+        latencies = LatencyHistogram.merge_all([r[2] for r in results])
+        series = ThroughputSeries.merge_all([r[3] for r in results])
+        qps = series.qps(cost)
+        phases = api.PhaseTimer.merge_all([r[4] for r in results])
+        usages = [r[5] for r in results]
+        client_cpu = round(sum([u.cpu_percent for u in usages]) / len(usages), 2)
+        client_ctx_switches = round(sum([u.ctx_switches_per_sec for u in usages]), 2)
+        log.info(
+            f"End search in concurrency {conc}: dur={cost}s, total_count={all_count}, qps={qps}, "
+            f"client cpu={client_cpu}%, client context switches={client_ctx_switches}/s"
+        )
+        if client_cpu >= self.client_cpu_threshold:
+            log.warning(
+                f"Client-bound in concurrency {conc}: the search workers are {client_cpu}% busy, "
+                f"the qps is limited by the client rather than the database"
+            )
+        return qps, latencies, series, phases, client_cpu, client_ctx_switches
+
+    def _within_latency_limit(self, p99: float) -> bool:
+        return self.saturation_latency_limit <= 0 or p99 <= self.saturation_latency_limit
+
+    def _saturation_concurrency(self, measured: dict[int, tuple[float, float]]) -> int:
+        """The lowest concurrency of the largest qps within the latency limit, or of the largest qps if none is"""
+        candidates = {c: m for c, m in measured.items() if self._within_latency_limit(m[1])} or measured
+        return max(candidates, key=lambda c: (candidates[c][0], -c), default=0)
+
+    def _adaptive_concurrencies(self, measured: dict[int, tuple[float, float]]) -> Iterator[int]:
+        """Concurrencies of the adaptive search, the (qps, p99) of each yielded one is read from `measured`"""
+        max_conc = max(self.concurrencies)
+        conc, last_qps = 1, 0.0
+        while True:
+            yield conc
+            qps, p99 = measured[conc]
+            if not self._within_latency_limit(p99):
+                log.info(f"Stop growing concurrency at {conc}: p99={p99} is over {self.saturation_latency_limit}")
+                break
+            if qps < last_qps * (1 + self.saturation_gain):
+                log.info(f"Stop growing concurrency at {conc}: qps={qps} gained less than {self.saturation_gain:.0%}")
+                break
+            if conc >= max_conc:
+                break
+            conc, last_qps = min(conc * SATURATION_GROWTH_FACTOR, max_conc), qps
+
+        for _ in range(SATURATION_REFINE_STEPS):
+            best = self._saturation_concurrency(measured)
+            lower = max([c for c in measured if c < best], default=None)
+            upper = min([c for c in measured if c > best], default=None)
+            candidates = {(c + best) // 2 for c in (lower, upper) if c is not None} - measured.keys()
+            if not candidates:
+                break
+            yield from sorted(candidates)
+
+    def _slo_qps_list(
+        self,
+        conc_num_list: list[int],
+        conc_qps_list: list[float],
+        conc_latencies: list[LatencyHistogram],
+    ) -> list[float]:
+        """The largest qps meeting each latency slo"""
+        slo_qps_list = []
+        for slo in self.latency_slos:
+            slo_latency_list = [h.percentile(slo.percentile) for h in conc_latencies]
+            slo_qps = calc_qps_under_latency(conc_num_list, conc_qps_list, slo_latency_list, slo.max_latency)
+            log.info(f"Largest qps under {slo}: {slo_qps}")
+            slo_qps_list.append(slo_qps)
+        return slo_qps_list
+
+    def _run_all_concurrencies_mem_efficient(self, duration: float | None = None) -> dict:
+        duration = self.duration if duration is None else duration
         max_qps = 0
         conc_num_list = []
         conc_qps_list = []
-        conc_latency_p99_list = []
-        conc_latency_avg_list = []
+        conc_latencies: list[LatencyHistogram] = []
+        conc_phases: list[api.PhaseTimer] = []
+        conc_warmup_qps_list = []
+        conc_warmup_latency_p99_list = []
+        conc_qps_timeline_list = []
+        conc_client_cpu_list = []
+        conc_client_ctx_switch_list = []
+        client_bound = False
+        measured: dict[int, tuple[float, float]] = {}
+        concurrencies = self._adaptive_concurrencies(measured) if self.adaptive else self.concurrencies
         try:
-            for conc in self.concurrencies:
-                with mp.Manager() as m:
-                    q, cond = m.Queue(), m.Condition()
-                    with concurrent.futures.ProcessPoolExecutor(
-                        mp_context=self.get_mp_context(),
-                        max_workers=conc,
-                    ) as executor:
-                        log.info(f"Start search {self.duration}s in concurrency {conc}, filters: {self.filters}")
-                        future_iter = [executor.submit(self.search, self.test_data, q, cond) for i in range(conc)]
-                        # Sync all processes
-                        self._wait_for_queue_fill(q, size=conc)
-
-                        with cond:
-                            cond.notify_all()
-                            log.info(f"Syncing all process and start concurrency search, concurrency={conc}")
-
-                        start = time.perf_counter()
-                        all_count = sum([r.result()[0] for r in future_iter])
-                        latencies = sum([r.result()[2] for r in future_iter], start=[])
-                        latency_p99 = np.percentile(latencies, 99)
-                        latency_avg = np.mean(latencies)
-                        cost = time.perf_counter() - start
-
-                        qps = round(all_count / cost, 4)
-                        conc_num_list.append(conc)
-                        conc_qps_list.append(qps)
-                        conc_latency_p99_list.append(latency_p99)
-                        conc_latency_avg_list.append(latency_avg)
-                        log.info(f"End search in concurrency {conc}: dur={cost}s, total_count={all_count}, qps={qps}")
-
-                if qps > max_qps:
-                    max_qps = qps
-                    log.info(f"Update largest qps with concurrency {conc}: current max_qps={max_qps}")
+            with self._worker_pool() as pool:
+                for conc in concurrencies:
+                    if self.warmup_duration > 0:
+                        warmup_qps, warmup_p99 = self._warm_up(pool, conc)
+                        conc_warmup_qps_list.append(warmup_qps)
+                        conc_warmup_latency_p99_list.append(warmup_p99)
+
+                    qps, latencies, series, phases, client_cpu, client_ctx_switches = self._search_concurrency(
+                        pool, conc, duration
+                    )
+                    conc_num_list.append(conc)
+                    conc_qps_list.append(qps)
+                    conc_latencies.append(latencies)
+                    conc_phases.append(phases)
+                    conc_qps_timeline_list.append(series.counts)
+                    conc_client_cpu_list.append(client_cpu)
+                    conc_client_ctx_switch_list.append(client_ctx_switches)
+                    measured[conc] = (qps, latencies.percentile(99))
+
+                    if qps > max_qps:
+                        max_qps = qps
+                        client_bound = client_cpu >= self.client_cpu_threshold
+                        log.info(f"Update largest qps with concurrency {conc}: current max_qps={max_qps}")
         except Exception as e:
             log.warning(
                 f"Fail to search, concurrencies: {self.concurrencies}, max_qps before failure={max_qps}, reason={e}"
@@ -154,128 +500,51 @@ class MultiProcessingSearchRunner:
         finally:
             self.stop()
 
-        return (
-            max_qps,
-            conc_num_list,
-            conc_qps_list,
+        (
+            conc_latency_p50_list,
+            conc_latency_p90_list,
+            conc_latency_p95_list,
             conc_latency_p99_list,
-            conc_latency_avg_list,
-        )
-
-    def _wait_for_queue_fill(self, q: Queue, size: int):
-        wait_t = 0
-        while q.qsize() < size:
-            sleep_t = size if size < 10 else 10
-            wait_t += sleep_t
-            if wait_t > self.concurrency_timeout > 0:
-                raise ConcurrencySlotTimeoutError
-            time.sleep(sleep_t)
-
-    def run(self) -> float:
+            conc_latency_p999_list,
+        ) = ([h.percentile(q) for h in conc_latencies] for q in (50, 90, 95, 99, 99.9))
+
+        return {
+            "qps": max_qps,
+            "conc_num_list": conc_num_list,
+            "conc_qps_list": conc_qps_list,
+            "conc_latency_p99_list": conc_latency_p99_list,
+            "conc_latency_avg_list": [h.mean for h in conc_latencies],
+            "conc_latency_p50_list": conc_latency_p50_list,
+            "conc_latency_p90_list": conc_latency_p90_list,
+            "conc_latency_p95_list": conc_latency_p95_list,
+            "conc_latency_p999_list": conc_latency_p999_list,
+            "conc_latency_max_list": [h.max for h in conc_latencies],
+            "conc_warmup_qps_list": conc_warmup_qps_list,
+            "conc_warmup_latency_p99_list": conc_warmup_latency_p99_list,
+            "conc_qps_timeline_list": conc_qps_timeline_list,
+            "saturation_concurrency": self._saturation_concurrency(measured),
+            "slo_qps_list": self._slo_qps_list(conc_num_list, conc_qps_list, conc_latencies),
+            "conc_client_cpu_list": conc_client_cpu_list,
+            "conc_client_ctx_switch_list": conc_client_ctx_switch_list,
+            "client_bound": client_bound,
+            "conc_phase_latency_list": api.PhaseTimer.merge_all(conc_phases).mean_latencies(
+                sum([h.count for h in conc_latencies])
+            ),
+        }
+
+    def run(self) -> dict:
         """
         Returns:
-            float: largest qps
+            dict: results keyed by their Metric field names, the largest qps in "qps", then the lists
+                of each concurrency
         """
         return self._run_all_concurrencies_mem_efficient()
 
     def stop(self) -> None:
-        pass
+        self._release_test_data()
 
     def run_by_dur(self, duration: int) -> float:
         return self._run_by_dur(duration)
 
     def _run_by_dur(self, duration: int) -> float:
-        max_qps = 0
-        try:
-            for conc in self.concurrencies:
-                with mp.Manager() as m:
-                    q, cond = m.Queue(), m.Condition()
-                    with concurrent.futures.ProcessPoolExecutor(
-                        mp_context=self.get_mp_context(),
-                        max_workers=conc,
-                    ) as executor:
-                        log.info(f"Start search_by_dur {duration}s in concurrency {conc}, filters: {self.filters}")
-                        future_iter = [
-                            executor.submit(self.search_by_dur, duration, self.test_data, q, cond) for i in range(conc)
-                        ]
-                        # Sync all processes
-                        while q.qsize() < conc:
-                            sleep_t = conc if conc < 10 else 10
-                            time.sleep(sleep_t)
-
-                        with cond:
-                            cond.notify_all()
-                            log.info(f"Syncing all process and start concurrency search, concurrency={conc}")
-
-                        start = time.perf_counter()
-                        all_count = sum([r.result() for r in future_iter])
-                        cost = time.perf_counter() - start
-
-                        qps = round(all_count / cost, 4)
-                        log.info(f"End search in concurrency {conc}: dur={cost}s, total_count={all_count}, qps={qps}")
-
-                if qps > max_qps:
-                    max_qps = qps
-                    log.info(f"Update largest qps with concurrency {conc}: current max_qps={max_qps}")
-        except Exception as e:
-            log.warning(
-                f"Fail to search all concurrencies: {self.concurrencies}, max_qps before failure={max_qps}, reason={e}",
-            )
-            traceback.print_exc()
-
-            # No results available, raise exception
-            if max_qps == 0.0:
-                raise e from None
-
-        finally:
-            self.stop()
-
-        return max_qps
-
-    def search_by_dur(
-        self,
-        dur: int,
-        test_data: list[list[float]],
-        q: mp.Queue,
-        cond: mp.Condition,
-    ) -> int:
-        # sync all process
-        q.put(1)
-        with cond:
-            cond.wait()
-
-        with self.db.init():
-            num, idx = len(test_data), random.randint(0, len(test_data) - 1)
-
-            start_time = time.perf_counter()
-            count = 0
-            while time.perf_counter() < start_time + dur:
-                s = time.perf_counter()
-                try:
-                    self.db.search_embedding(
-                        test_data[idx],
-                        self.k,
-                        self.filters,
-                    )
-                except Exception as e:
-                    log.warning(f"VectorDB search_embedding error: {e}")
-                    traceback.print_exc(chain=True)
-                    raise e from None
-
-                count += 1
-                # loop through the test data
-                idx = idx + 1 if idx < num - 1 else 0
-
-                if count % 500 == 0:
-                    log.debug(
-                        f"({mp.current_process().name:16}) search_count: {count}, "
-                        f"latest_latency={time.perf_counter()-s}"
-                    )
-
-        total_dur = round(time.perf_counter() - start_time, 4)
-        log.debug(
-            f"{mp.current_process().name:16} search {self.duration}s: "
-            f"actual_dur={total_dur}s, count={count}, qps in this process: {round(count / total_dur, 4):3}"
-        )
-
-        return count
+        return self._run_all_concurrencies_mem_efficient(duration)["qps"]
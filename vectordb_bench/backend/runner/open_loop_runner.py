@@ -0,0 +1,196 @@
+import logging
+import multiprocessing as mp
+import random
+import time
+import traceback
+from collections.abc import Iterable
+
+from ... import config
+from ...models import ArrivalDistribution
+from ..clients import api
+from .histogram import LatencyHistogram
+from .mp_runner import MultiProcessingSearchRunner, SearchWorkerPool
+from .util import SharedArray, ThroughputSeries
+
+# a query sent later than its scheduled time by more than this is counted as late
+LATE_THRESHOLD = 0.001
+
+log = logging.getLogger(__name__)
+
+
+class OpenLoopSearchRunner(MultiProcessingSearchRunner):
+    """Open-loop search runner, issues queries on a fixed arrival schedule for each target qps.
+
+    Unlike the closed-loop MultiProcessingSearchRunner, a worker doesn't wait for the previous
+    query to be answered before its next query is due. Latency is measured from the scheduled
+    send time, so the time a query spends queueing behind a slow one is counted
+    instead of being hidden (coordinated omission).
+
+    Args:
+        target_qps(Iterable[int]): target arrival rates to sweep, queries per second of all workers
+        num_workers(int): number of worker connections issuing the queries, default to max(concurrencies)
+        distribution(ArrivalDistribution): constant or poisson inter-arrival times
+        duration(int): duration for each target qps, default to 30s
+    """
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        test_data: list[list[float]],
+        target_qps: Iterable[int],
+        num_workers: int = max(config.NUM_CONCURRENCY),
+        distribution: ArrivalDistribution = ArrivalDistribution.CONSTANT,
+        k: int = config.K_DEFAULT,
+        filters: dict | None = None,
+        duration: int = config.CONCURRENCY_DURATION,
+        concurrency_timeout: int = config.CONCURRENCY_TIMEOUT,
+    ):
+        super().__init__(
+            db=db,
+            test_data=test_data,
+            k=k,
+            filters=filters,
+            concurrencies=[num_workers],
+            duration=duration,
+            concurrency_timeout=concurrency_timeout,
+        )
+        self.target_qps = target_qps
+        self.num_workers = num_workers
+        self.distribution = distribution
+
+    def search_open_loop(
+        self,
+        test_data: SharedArray,
+        worker_id: int,
+        rate: float,
+        duration: float,
+    ) -> tuple[int, float, LatencyHistogram, int, int, ThroughputSeries]:
+        """Issue this worker's share of `rate` for `duration` seconds
+
+        Returns:
+            tuple: (count, actual duration, latencies from the scheduled send time, late count, dropped count,
+                per-second series)
+        """
+        num, idx = len(test_data), random.randint(0, len(test_data) - 1)
+        interval = self.num_workers / rate
+
+        def next_interval() -> float:
+            if self.distribution == ArrivalDistribution.POISSON:
+                return random.expovariate(1 / interval)
+            return interval
+
+        start_time = time.perf_counter()
+        end_time = start_time + duration
+        # spread the first arrivals of the workers evenly within one interval
+        scheduled = start_time + interval * worker_id / self.num_workers
+
+        count, late, dropped = 0, 0, 0
+        latencies = LatencyHistogram()
+        series = ThroughputSeries()
+        while scheduled < end_time:
+            now = time.perf_counter()
+            if now >= end_time:
+                break
+            if now < scheduled:
+                time.sleep(scheduled - now)
+            elif now - scheduled > LATE_THRESHOLD:
+                late += 1
+
+            query = test_data[idx].tolist()
+            try:
+                self.db.search_embedding(
+                    query,
+                    self.k,
+                    self.filters,
+                )
+            except Exception as e:
+                log.warning(f"VectorDB search_embedding error: {e}")
+                traceback.print_exc(chain=True)
+                raise e from None
+
+            latencies.record(time.perf_counter() - scheduled)
+            series.record(time.time())
+            count += 1
+            idx = idx + 1 if idx < num - 1 else 0
+            scheduled += next_interval()
+
+        # queries scheduled within the window but never sent
+        while scheduled < end_time:
+            dropped += 1
+            scheduled += next_interval()
+
+        total_dur = round(time.perf_counter() - start_time, 4)
+        log.debug(
+            f"{mp.current_process().name:16} open-loop search {duration}s at {rate} qps: "
+            f"actual_dur={total_dur}s, count={count}, late={late}, dropped={dropped}"
+        )
+        return (count, total_dur, latencies, late, dropped, series)
+
+    def _run_all_target_rates(self) -> dict:
+        target_qps_list = []
+        qps_list = []
+        qps_timeline_list = []
+        p50_list, p95_list, p99_list, p999_list = [], [], [], []
+        late_list, dropped_list = [], []
+        try:
+            with SearchWorkerPool(self, size=self.num_workers, timeout=self.concurrency_timeout) as pool:
+                for rate in self.target_qps:
+                    log.info(
+                        f"Start open-loop search {self.duration}s at target qps {rate}, "
+                        f"workers={self.num_workers}, distribution={self.distribution}, filters: {self.filters}"
+                    )
+                    results, cost = pool.run(
+                        self.num_workers,
+                        "search_open_loop",
+                        rate=rate,
+                        duration=self.duration,
+                    )
+
+                    latencies = LatencyHistogram.merge_all([r[2] for r in results])
+                    p50, p95, p99, p999 = latencies.percentiles([50, 95, 99, 99.9])
+                    late, dropped = sum([r[3] for r in results]), sum([r[4] for r in results])
+                    series = ThroughputSeries.merge_all([r[5] for r in results])
+                    qps = series.qps(cost)
+
+                    target_qps_list.append(rate)
+                    qps_list.append(qps)
+                    qps_timeline_list.append(series.counts)
+                    p50_list.append(p50)
+                    p95_list.append(p95)
+                    p99_list.append(p99)
+                    p999_list.append(p999)
+                    late_list.append(late)
+                    dropped_list.append(dropped)
+                    log.info(
+                        f"End open-loop search at target qps {rate}: achieved qps={qps}, p99={p99:.4f}s, "
+                        f"p999={p999:.4f}s, late={late}, dropped={dropped}"
+                    )
+        except Exception as e:
+            log.warning(f"Fail to open-loop search, target qps: {self.target_qps}, reason={e}")
+            traceback.print_exc()
+
+            # No results available, raise exception
+            if len(qps_list) == 0:
+                raise e from None
+        finally:
+            self.stop()
+
+        return {
+            "open_loop_target_qps_list": target_qps_list,
+            "open_loop_qps_list": qps_list,
+            "open_loop_qps_timeline_list": qps_timeline_list,
+            "open_loop_latency_p50_list": p50_list,
+            "open_loop_latency_p95_list": p95_list,
+            "open_loop_latency_p99_list": p99_list,
+            "open_loop_latency_p999_list": p999_list,
+            "open_loop_late_list": late_list,
+            "open_loop_dropped_list": dropped_list,
+        }
+
+    def run(self) -> dict:
+        """
+        Returns:
+            dict: results keyed by their Metric field names, the target qps, achieved qps, per-second
+                completions, p50, p95, p99, p999 latency, late and dropped queries of each target rate
+        """
+        return self._run_all_target_rates()
@@ -0,0 +1,206 @@
+import concurrent
+import logging
+import multiprocessing as mp
+import pathlib
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_EXCEPTION
+from itertools import groupby, pairwise
+from queue import Empty
+
+import numpy as np
+import psutil
+from pyarrow.parquet import ParquetFile
+
+from vectordb_bench.backend.dataset import DatasetManager, record_batch_to_arrays
+
+from ... import config
+from ...models import PerformanceTimeoutError
+from .. import utils
+from ..clients import api
+from .serial_runner import LOAD_MAX_TRY_COUNT, WAITTING_TIME
+from .util import InsertTimeline
+
+PROGRESS_LOG_INTERVAL = 100_000
+
+log = logging.getLogger(__name__)
+
+# [(file_name, row group indexes of this file)], or the [start, end) row range of the cached train data
+Shard = list[tuple[str, list[int]]] | tuple[int, int]
+
+
+class ParallelInsertRunner:
+    """Load the train data with several processes, each one inserting its own shard
+    through its own `db.init()` connection.
+
+    The row groups of all train files are split into `concurrency` contiguous shards
+    of about the same number of rows, so a shard covers whole files when there are
+    many of them, or row group ranges of a single file otherwise. If the dataset is
+    cached, shards are even row ranges of the cached arrays.
+
+    Args:
+        concurrency(int): number of inserting processes
+        timeout(float | None): shared by all the shards, the whole load fails once it's exceeded
+    """
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        dataset: DatasetManager,
+        normalize: bool,
+        concurrency: int = config.LOAD_CONCURRENCY,
+        timeout: float | None = None,
+        batch_size: int = config.NUM_PER_BATCH,
+    ):
+        self.timeout = timeout if isinstance(timeout, int | float) else None
+        self.dataset = dataset
+        self.db = db
+        self.normalize = normalize
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.timeline: InsertTimeline | None = None
+
+    def _check_rows(self, num_rows: int):
+        if num_rows == 0:
+            msg = f"No train rows to load in {self.dataset.data_dir}, files: {self.dataset.train_files}"
+            raise ValueError(msg)
+
+    def _split_shards(self) -> list[Shard]:
+        if self.dataset.train_cache is not None:
+            num_rows = len(self.dataset.train_cache.load("ids"))
+            self._check_rows(num_rows)
+            bounds = np.linspace(0, num_rows, self.concurrency + 1, dtype=int)
+            return [(int(start), int(end)) for start, end in pairwise(bounds) if end > start]
+
+        units, rows = [], []
+        for file_name in self.dataset.train_files:
+            metadata = ParquetFile(pathlib.Path(self.dataset.data_dir, file_name)).metadata
+            for rg in range(metadata.num_row_groups):
+                units.append((file_name, rg))
+                rows.append(metadata.row_group(rg).num_rows)
+
+        total = sum(rows)
+        self._check_rows(total)
+        starts = np.cumsum([0, *rows[:-1]])
+        shard_ids = [min(int(start * self.concurrency / total), self.concurrency - 1) for start in starts]
+
+        shards = []
+        for _, shard_units in groupby(zip(shard_ids, units, strict=True), key=lambda x: x[0]):
+            shard = [
+                (file_name, [rg for _, (_, rg) in file_units])
+                for file_name, file_units in groupby(shard_units, key=lambda x: x[1][0])
+            ]
+            shards.append(shard)
+
+        if len(shards) < self.concurrency:
+            log.warning(f"Only {len(units)} row groups in the train data, load with {len(shards)} processes instead")
+        return shards
+
+    def _insert_with_retry(self, ids: np.ndarray, vectors: np.ndarray) -> int:
+        retry_count, already_insert_count = 0, 0
+        while True:
+            insert_count, error = self.db.insert_embeddings_array(
+                ids=ids[already_insert_count:],
+                vectors=vectors[already_insert_count:],
+            )
+            already_insert_count += insert_count
+            if error is None:
+                break
+
+            retry_count += 1
+            if retry_count >= LOAD_MAX_TRY_COUNT:
+                raise error
+            log.info(f"({mp.current_process().name:16}) Failed to insert data, try {retry_count} time")
+            time.sleep(WAITTING_TIME)
+
+        assert already_insert_count == len(ids)
+        return already_insert_count
+
+    def _iter_shard(self, shard: Shard) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        if self.dataset.train_cache is not None:
+            (start, end), cache = shard, self.dataset.train_cache
+            all_ids, all_emb = cache.load("ids"), cache.load("emb")
+            for i in range(start, end, self.batch_size):
+                j = min(i + self.batch_size, end)
+                yield np.asarray(all_ids[i:j]), all_emb[i:j]
+            return
+
+        for file_name, row_groups in shard:
+            p = pathlib.Path(self.dataset.data_dir, file_name)
+            batches = ParquetFile(p, memory_map=True, pre_buffer=True).iter_batches(
+                self.batch_size,
+                row_groups=row_groups,
+            )
+            for batch in batches:
+                yield record_batch_to_arrays(batch)
+
+    def task(self, shard_id: int, shard: Shard, progress_q: mp.Queue) -> int:
+        count = 0
+        with self.db.init():
+            log.info(f"({mp.current_process().name:16}) Start inserting shard {shard_id} in batch {self.batch_size}")
+            for ids, emb_np in self._iter_shard(shard):
+                vectors = emb_np / np.linalg.norm(emb_np, axis=1)[:, np.newaxis] if self.normalize else emb_np
+
+                s = time.perf_counter()
+                insert_count = self._insert_with_retry(ids, vectors)
+                progress_q.put((insert_count, time.perf_counter() - s))
+                count += insert_count
+
+            log.info(f"({mp.current_process().name:16}) Finish inserting shard {shard_id}, count={count}")
+        return count
+
+    def _wait_all_shards(self, futures: list[concurrent.futures.Future], progress_q: mp.Queue) -> int:
+        deadline = None if self.timeout is None else time.perf_counter() + self.timeout
+        progress, next_log = 0, PROGRESS_LOG_INTERVAL
+        self.timeline = InsertTimeline()
+        not_done = futures
+        while not_done:
+            done, not_done = concurrent.futures.wait(not_done, timeout=1, return_when=FIRST_EXCEPTION)
+            for f in done:
+                f.result()
+
+            try:
+                while True:
+                    rows, latency = progress_q.get_nowait()
+                    self.timeline.record(rows, latency)
+                    progress += rows
+            except Empty:
+                pass
+            self.timeline.tick()
+            if progress >= next_log:
+                log.info(f"Loaded {progress} embeddings into VectorDB with {len(futures)} processes")
+                next_log = (progress // PROGRESS_LOG_INTERVAL + 1) * PROGRESS_LOG_INTERVAL
+
+            if not_done and deadline is not None and time.perf_counter() > deadline:
+                log.warning(f"VectorDB load dataset timeout in {self.timeout}")
+                raise PerformanceTimeoutError
+
+        self.timeline.finish()
+        return sum([f.result() for f in futures])
+
+    @utils.time_it
+    def _insert_all_shards(self) -> int:
+        shards = self._split_shards()
+        log.info(f"Start loading the dataset with {len(shards)} processes")
+        with (
+            mp.Manager() as manager,
+            concurrent.futures.ProcessPoolExecutor(
+                mp_context=mp.get_context("spawn"),
+                max_workers=len(shards),
+            ) as executor,
+        ):
+            progress_q = manager.Queue()
+            futures = [executor.submit(self.task, i, shard, progress_q) for i, shard in enumerate(shards)]
+            try:
+                count = self._wait_all_shards(futures, progress_q)
+            except Exception as e:
+                log.warning(f"VectorDB load dataset error: {e}")
+                for pid, _ in executor._processes.items():
+                    psutil.Process(pid).kill()
+                raise e from e
+            else:
+                return count
+
+    def run(self) -> int:
+        count, _ = self._insert_all_shards()
+        return count
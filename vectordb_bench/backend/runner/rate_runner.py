@@ -1,6 +1,8 @@
 import concurrent
+import contextlib
 import logging
 import multiprocessing as mp
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 
@@ -9,12 +11,25 @@ from vectordb_bench.backend.clients import api
 from vectordb_bench.backend.dataset import DataSetIterator
 from vectordb_bench.backend.utils import time_it
 
-from .util import get_data
+from .histogram import LatencyHistogram
+from .util import TokenBucket, get_data
+
+BACKLOG_SAMPLE_INTERVAL = 1.0  # seconds between two samples of the insert backlog
 
 log = logging.getLogger(__name__)
 
 
 class RatedMultiThreadingInsertRunner:
+    """Insert the dataset at `rate` rows/s from a thread pool.
+
+    Each batch is submitted as soon as a TokenBucket holds its rows, so the load is spread evenly
+    over every second, and rates below one batch per second work too. The insert latency of each
+    batch and the backlog of submitted but unfinished batches are recorded along the way.
+
+    Like ThreadedSearchRunner, every thread opens `db.init()` on its own `db.thread_copy()`, so the
+    inserts run on parallel connections instead of sharing one that may not be thread-safe.
+    """
+
     def __init__(
         self,
         rate: int,  # numRows per second
@@ -22,86 +37,107 @@ class RatedMultiThreadingInsertRunner:
         dataset_iter: DataSetIterator,
         normalize: bool = False,
         timeout: float | None = None,
+        batch_size: int = config.NUM_PER_BATCH,
+        num_threads: int | None = None,  # insert threads, each with its own connection, default to the cpu count
     ):
         self.timeout = timeout if isinstance(timeout, int | float) else None
         self.dataset = dataset_iter
         self.db = db
         self.normalize = normalize
         self.insert_rate = rate
-        self.batch_rate = rate // config.NUM_PER_BATCH
+        self.batch_size = batch_size
+        self.num_threads = num_threads or mp.cpu_count()
 
     def send_insert_task(self, db: api.VectorDB, emb: list[list[float]], metadata: list[str]):
-        db.insert_embeddings(emb, metadata)
+        _, error = db.insert_embeddings(emb, metadata)
+        if error is not None:
+            raise error
+
+    def _connect_thread(self, thread_local: threading.local, connections: contextlib.ExitStack, lock: threading.Lock):
+        """Open the connection of this insert thread on its own copy of the db, kept until the pool closes"""
+        db = self.db.thread_copy()
+        connection = db.init()
+        connection.__enter__()
+        with lock:
+            connections.push(connection)
+        thread_local.db = db
 
     @time_it
-    def run_with_rate(self, q: mp.Queue):
-        with ThreadPoolExecutor(max_workers=mp.cpu_count()) as executor:
-            executing_futures = []
+    def run_with_rate(self, q: mp.Queue) -> dict:
+        """Insert the whole dataset at insert_rate, and put False into q every insert_rate rows submitted,
+        True at the end of the dataset, None on errors
 
-            @time_it
-            def submit_by_rate() -> bool:
-                rate = self.batch_rate
+        Returns:
+            dict: results keyed by their Metric field names, the target and achieved rows/s, insert batch
+                latency p50 and p99, then the seconds since start and the backlog of unfinished batches of
+                every BACKLOG_SAMPLE_INTERVAL
+        """
+        bucket = TokenBucket(self.insert_rate, capacity=self.batch_size)
+        latencies, lock = LatencyHistogram(), threading.Lock()
+        backlog_time_list, backlog_list = [], []
+        thread_local = threading.local()
+
+        def timed_insert(emb: list[list[float]], metadata: list[str]):
+            s = time.perf_counter()
+            self.send_insert_task(thread_local.db, emb, metadata)
+            with lock:
+                latencies.record(time.perf_counter() - s)
+
+        # connections are closed after the executor has joined the threads using them
+        with (
+            contextlib.ExitStack() as connections,
+            ThreadPoolExecutor(
+                max_workers=self.num_threads,
+                initializer=self._connect_thread,
+                initargs=(thread_local, connections, lock),
+            ) as executor,
+        ):
+            executing_futures = []
+            submitted, signaled = 0, 0
+            start_time = next_sample = time.perf_counter()
+            try:
                 for data in self.dataset:
                     emb, metadata = get_data(data, self.normalize)
-                    executing_futures.append(
-                        executor.submit(self.send_insert_task, self.db, emb, metadata),
-                    )
-                    rate -= 1
-
-                    if rate == 0:
-                        return False
-                return rate == self.batch_rate
-
-            with self.db.init():
-                while True:
-                    start_time = time.perf_counter()
-                    finished, elapsed_time = submit_by_rate()
-                    if finished is True:
-                        q.put(True, block=True)
-                        log.info(f"End of dataset, left unfinished={len(executing_futures)}")
-                        break
-
-                    q.put(False, block=False)
-                    wait_interval = 1 - elapsed_time if elapsed_time < 1 else 0.001
-
-                    try:
-                        done, not_done = concurrent.futures.wait(
-                            executing_futures,
-                            timeout=wait_interval,
-                            return_when=concurrent.futures.FIRST_EXCEPTION,
-                        )
-
-                        if len(not_done) > 0:
-                            log.warning(
-                                f"Failed to finish all tasks in 1s, [{len(not_done)}/{len(executing_futures)}] "
-                                f"tasks are not done, waited={wait_interval:.2f}, trying to wait in the next round"
-                            )
-                            executing_futures = list(not_done)
-                        else:
-                            log.debug(
-                                f"Finished {len(executing_futures)} insert-{config.NUM_PER_BATCH} "
-                                f"task in 1s, wait_interval={wait_interval:.2f}"
-                            )
-                            executing_futures = []
-                    except Exception as e:
-                        log.warning(f"task error, terminating, err={e}")
-                        q.put(None, block=True)
-                        executor.shutdown(wait=True, cancel_futures=True)
-                        raise e from e
-
-                    dur = time.perf_counter() - start_time
-                    if dur < 1:
-                        time.sleep(1 - dur)
+                    bucket.acquire(len(metadata))
+                    executing_futures.append(executor.submit(timed_insert, emb, metadata))
+                    submitted += len(metadata)
 
+                    for f in [f for f in executing_futures if f.done()]:
+                        f.result()
+                    executing_futures = [f for f in executing_futures if not f.done()]
+
+                    now = time.perf_counter()
+                    if now >= next_sample:
+                        backlog_time_list.append(round(now - start_time, 4))
+                        backlog_list.append(len(executing_futures))
+                        next_sample = now + BACKLOG_SAMPLE_INTERVAL
+                    while submitted >= (signaled + 1) * self.insert_rate:
+                        q.put(False, block=False)
+                        signaled += 1
+
+                q.put(True, block=True)
+                log.info(f"End of dataset, left unfinished={len(executing_futures)}")
                 # wait for all tasks in executing_futures to complete
-                if len(executing_futures) > 0:
-                    try:
-                        done, _ = concurrent.futures.wait(
-                            executing_futures,
-                            return_when=concurrent.futures.FIRST_EXCEPTION,
-                        )
-                    except Exception as e:
-                        log.warning(f"task error, terminating, err={e}")
-                        q.put(None, block=True)
-                        executor.shutdown(wait=True, cancel_futures=True)
-                        raise e from e
+                for f in concurrent.futures.as_completed(executing_futures):
+                    f.result()
+            except Exception as e:
+                log.warning(f"task error, terminating, err={e}")
+                q.put(None, block=True)
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise e from e
+
+        dur = time.perf_counter() - start_time
+        achieved_rate = round(submitted / dur, 4)
+        p50, p99 = latencies.percentiles([50, 99])
+        log.info(
+            f"Inserted {submitted} rows at target {self.insert_rate} rows/s: achieved={achieved_rate} rows/s, "
+            f"p50={p50:.4f}s, p99={p99:.4f}s, max_backlog={max(backlog_list, default=0)}"
+        )
+        return {
+            "insert_target_rows_per_sec": self.insert_rate,
+            "insert_rows_per_sec": achieved_rate,
+            "insert_latency_p50": p50,
+            "insert_latency_p99": p99,
+            "insert_backlog_time_list": backlog_time_list,
+            "insert_backlog_list": backlog_list,
+        }
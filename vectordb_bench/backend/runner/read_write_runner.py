@@ -6,13 +6,16 @@ from collections.abc import Iterable
 
 import numpy as np
 
+from vectordb_bench import config
 from vectordb_bench.backend.clients import api
-from vectordb_bench.backend.dataset import DatasetManager
+from vectordb_bench.backend.dataset import DataSetIterator, DatasetManager
 
 from .mp_runner import MultiProcessingSearchRunner
 from .rate_runner import RatedMultiThreadingInsertRunner
 from .serial_runner import SerialSearchRunner
 
+MIN_STAGE_SEARCH_DURATION = 1  # seconds, the shortest concurrent search of each concurrency in a search stage
+
 log = logging.getLogger(__name__)
 
 
@@ -35,6 +38,7 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
         ),  # search from insert portion, 0.0 means search from the start
         read_dur_after_write: int = 300,  # seconds, search duration when insertion is done
         timeout: float | None = None,
+        batch_size: int = config.NUM_PER_BATCH,
     ):
         self.insert_rate = insert_rate
         self.data_volume = dataset.data.size
@@ -49,7 +53,7 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
             f"stage_search_dur={read_dur_after_write}"
         )
 
-        test_emb = np.stack(dataset.test_data["emb"])
+        test_emb = dataset.get_test_emb()
         if normalize:
             test_emb = test_emb / np.linalg.norm(test_emb, axis=1)[:, np.newaxis]
         test_emb = test_emb.tolist()
@@ -66,13 +70,15 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
             self,
             rate=insert_rate,
             db=db,
-            dataset_iter=iter(dataset),
+            dataset_iter=DataSetIterator(dataset, batch_size),
             normalize=normalize,
+            timeout=timeout,
+            batch_size=batch_size,
         )
         self.serial_search_runner = SerialSearchRunner(
             db=db,
             test_data=test_emb,
-            ground_truth=dataset.gt_data,
+            ground_truth=dataset.get_ground_truth(),
             k=k,
         )
 
@@ -86,7 +92,7 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
     def run_search(self):
         log.info("Search after write - Serial search start")
         res, ssearch_dur = self.serial_search_runner.run()
-        recall, ndcg, p99_latency = res
+        recall, ndcg, p99_latency, *_ = res
         log.info(
             f"Search after write - Serial search - recall={recall}, ndcg={ndcg}, p99={p99_latency}, "
             f"dur={ssearch_dur:.4f}",
@@ -97,7 +103,14 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
 
         return (max_qps, recall, ndcg, p99_latency)
 
-    def run_read_write(self):
+    def run_read_write(self) -> dict:
+        """Insert the dataset at insert_rate while searching at each search stage, then optimize and search
+
+        Returns:
+            dict: results keyed by their Metric field names, the insert results of run_with_rate and its
+                duration, the max_qps, recall, ndcg and p99 of each search stage, then of the search after
+                optimize in qps, recall, ndcg and serial_latency_p99
+        """
         with mp.Manager() as m:
             q = m.Queue()
             with concurrent.futures.ProcessPoolExecutor(
@@ -112,6 +125,8 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
                     for f in concurrent.futures.as_completed(read_write_futures):
                         res = f.result()
                         log.info(f"Result = {res}")
+                    insert_res, insert_dur = read_write_futures[0].result()
+                    stage_res = read_write_futures[1].result() or []
 
                     # Wait for read_write_futures finishing and do optimize and search
                     op_future = executor.submit(self.run_optimize)
@@ -126,6 +141,20 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
                     executor.shutdown(wait=True, cancel_futures=True)
                     raise e from e
         log.info("Concurrent read write all done")
+        max_qps, recall, ndcg, p99_latency = last_res
+        return {
+            **insert_res,
+            "insert_duration": round(insert_dur, 4),
+            "read_write_stage_list": [r[0] for r in stage_res],
+            "read_write_qps_list": [r[1] for r in stage_res],
+            "read_write_recall_list": [r[2] for r in stage_res],
+            "read_write_ndcg_list": [r[3] for r in stage_res],
+            "read_write_latency_p99_list": [r[4] for r in stage_res],
+            "qps": max_qps,
+            "recall": recall,
+            "ndcg": ndcg,
+            "serial_latency_p99": p99_latency,
+        }
 
     def run_search_by_sig(self, q: mp.Queue):
         """
@@ -161,7 +190,7 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
             log.info(f"Insert {perc}% done, total batch={total_batch}")
             log.info(f"[{target_batch}/{total_batch}] Serial search - {perc}% start")
             res, ssearch_dur = self.serial_search_runner.run()
-            recall, ndcg, p99_latency = res
+            recall, ndcg, p99_latency, *_ = res
             log.info(
                 f"[{target_batch}/{total_batch}] Serial search - {perc}% done, recall={recall}, "
                 f"ndcg={ndcg}, p99={p99_latency}, dur={ssearch_dur:.4f}"
@@ -183,6 +212,8 @@ class ReadWriteRunner(MultiProcessingSearchRunner, RatedMultiThreadingInsertRunn
                         f"total available dur={total_dur_between_stages}, serial_search_cost={ssearch_dur}."
                     )
                     log.warning(warning_msg)
+                    # still search each concurrency for a moment, a search of no duration has no qps
+                    each_conc_search_dur = max(each_conc_search_dur, MIN_STAGE_SEARCH_DURATION)
 
             # The last stage
             else:
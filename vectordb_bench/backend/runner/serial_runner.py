@@ -12,13 +12,16 @@ import psutil
 from vectordb_bench.backend.dataset import DatasetManager
 
 from ... import config
-from ...metric import calc_ndcg, calc_recall, get_ideal_dcg
+from ...metric import calc_mrr_batch, calc_ndcg_batch, calc_recall_batch, get_ideal_dcg, ground_truth_array
 from ...models import LoadTimeoutError, PerformanceTimeoutError
 from .. import utils
 from ..clients import api
+from .histogram import LatencyHistogram
+from .util import ArrayBatcher, InsertTimeline
 
 NUM_PER_BATCH = config.NUM_PER_BATCH
 LOAD_MAX_TRY_COUNT = 10
+BATCH_SIZE_PROBE_COUNT = 3  # batches inserted with each candidate size while auto-tuning
 WAITTING_TIME = 60
 
 log = logging.getLogger(__name__)
@@ -31,63 +34,118 @@ class SerialInsertRunner:
         dataset: DatasetManager,
         normalize: bool,
         timeout: float | None = None,
+        batch_size: int = NUM_PER_BATCH,
+        auto_tune_batch_size: bool = False,
     ):
         self.timeout = timeout if isinstance(timeout, int | float) else None
         self.dataset = dataset
         self.db = db
         self.normalize = normalize
+        self.batch_size = batch_size
+        self.auto_tune_batch_size = auto_tune_batch_size
+        self.timeline: InsertTimeline | None = None
+
+    def _insert_batch(self, ids: np.ndarray, emb_np: np.ndarray) -> int:
+        if self.normalize:
+            log.debug("normalize the 100k train data")
+            vectors = emb_np / np.linalg.norm(emb_np, axis=1)[:, np.newaxis]
+        else:
+            vectors = emb_np
+        log.debug(f"batch dataset size: {len(vectors)}, {len(ids)}")
+
+        insert_count, error = self.db.insert_embeddings_array(
+            ids=ids,
+            vectors=vectors,
+        )
+        if error is not None:
+            raise error
+
+        assert insert_count == len(ids)
+        return insert_count
 
-    def task(self) -> int:
+    def _tune_batch_size(self, batcher: ArrayBatcher, timeline: InsertTimeline) -> tuple[int, int]:
+        """Insert the head of the dataset with each candidate batch size, and pick the one with
+        the best rows/s whose slowest batch stays under config.LOAD_BATCH_LATENCY_CAP.
+
+        Returns:
+            tuple[int, int]: the chosen batch size, count of the rows inserted while probing
+        """
+        candidates = sorted(config.LOAD_BATCH_SIZE_CANDIDATES)
+        best_size, best_rate, count = candidates[0], 0.0, 0
+        for size in candidates:
+            rows, cost, max_latency = 0, 0.0, 0.0
+            for _ in range(BATCH_SIZE_PROBE_COUNT):
+                batch = batcher.take(size)
+                if batch is None:
+                    break
+                s = time.perf_counter()
+                insert_count = self._insert_batch(*batch)
+                latency = time.perf_counter() - s
+                timeline.record(insert_count, latency)
+                rows += insert_count
+                cost += latency
+                max_latency = max(max_latency, latency)
+            if rows == 0:
+                break
+
+            count += rows
+            rate = rows / cost
+            log.info(
+                f"({mp.current_process().name:16}) Probe insert batch size {size}: "
+                f"rows/s={rate:.2f}, max_latency={max_latency:.4f}s"
+            )
+            if max_latency <= config.LOAD_BATCH_LATENCY_CAP and rate > best_rate:
+                best_size, best_rate = size, rate
+
+        log.info(f"({mp.current_process().name:16}) Choose insert batch size {best_size}")
+        return best_size, count
+
+    def task(self) -> tuple[int, int, InsertTimeline]:
         count = 0
         with self.db.init():
-            log.info(f"({mp.current_process().name:16}) Start inserting embeddings in batch {config.NUM_PER_BATCH}")
             start = time.perf_counter()
-            for data_df in self.dataset:
-                all_metadata = data_df["id"].tolist()
-
-                emb_np = np.stack(data_df["emb"])
-                if self.normalize:
-                    log.debug("normalize the 100k train data")
-                    all_embeddings = (emb_np / np.linalg.norm(emb_np, axis=1)[:, np.newaxis]).tolist()
-                else:
-                    all_embeddings = emb_np.tolist()
-                del emb_np
-                log.debug(f"batch dataset size: {len(all_embeddings)}, {len(all_metadata)}")
-
-                insert_count, error = self.db.insert_embeddings(
-                    embeddings=all_embeddings,
-                    metadata=all_metadata,
-                )
-                if error is not None:
-                    raise error
+            timeline = InsertTimeline()
+            batch_size = self.batch_size
+            if self.auto_tune_batch_size:
+                batcher = ArrayBatcher(self.dataset.iter_arrays(max(config.LOAD_BATCH_SIZE_CANDIDATES)))
+                batch_size, count = self._tune_batch_size(batcher, timeline)
+                batches = batcher.batches(batch_size)
+            else:
+                batches = self.dataset.iter_arrays(batch_size)
 
-                assert insert_count == len(all_metadata)
-                count += insert_count
-                if count % 100_000 == 0:
+            log.info(f"({mp.current_process().name:16}) Start inserting embeddings in batch {batch_size}")
+            for ids, emb_np in batches:
+                s = time.perf_counter()
+                insert_count = self._insert_batch(ids, emb_np)
+                timeline.record(insert_count, time.perf_counter() - s)
+                prev_count, count = count, count + insert_count
+                # batch sizes that don't divide 100k, or a probe before, never land on a multiple of it
+                if count // 100_000 > prev_count // 100_000:
                     log.info(f"({mp.current_process().name:16}) Loaded {count} embeddings into VectorDB")
 
+            timeline.finish()
             log.info(
                 f"({mp.current_process().name:16}) Finish loading all dataset into VectorDB, "
                 f"dur={time.perf_counter() - start}"
             )
-            return count
+            return count, batch_size, timeline
 
     def endless_insert_data(self, all_embeddings: list, all_metadata: list, left_id: int = 0) -> int:
         with self.db.init():
             # unique id for endlessness insertion
             all_metadata = [i + left_id for i in all_metadata]
 
-            num_batches = math.ceil(len(all_embeddings) / NUM_PER_BATCH)
+            num_batches = math.ceil(len(all_embeddings) / self.batch_size)
             log.info(
                 f"({mp.current_process().name:16}) Start inserting {len(all_embeddings)} "
-                f"embeddings in batch {NUM_PER_BATCH}"
+                f"embeddings in batch {self.batch_size}"
             )
             count = 0
             for batch_id in range(num_batches):
                 retry_count = 0
                 already_insert_count = 0
-                metadata = all_metadata[batch_id * NUM_PER_BATCH : (batch_id + 1) * NUM_PER_BATCH]
-                embeddings = all_embeddings[batch_id * NUM_PER_BATCH : (batch_id + 1) * NUM_PER_BATCH]
+                metadata = all_metadata[batch_id * self.batch_size : (batch_id + 1) * self.batch_size]
+                embeddings = all_embeddings[batch_id * self.batch_size : (batch_id + 1) * self.batch_size]
 
                 log.debug(
                     f"({mp.current_process().name:16}) batch [{batch_id:3}/{num_batches}], "
@@ -117,7 +175,7 @@ class SerialInsertRunner:
                 count += already_insert_count
             log.info(
                 f"({mp.current_process().name:16}) Finish inserting {len(all_embeddings)} embeddings in "
-                f"batch {NUM_PER_BATCH}"
+                f"batch {self.batch_size}"
             )
         return count
 
@@ -130,7 +188,7 @@ class SerialInsertRunner:
         ) as executor:
             future = executor.submit(self.task)
             try:
-                count = future.result(timeout=self.timeout)
+                count, self.batch_size, self.timeline = future.result(timeout=self.timeout)
             except TimeoutError as e:
                 msg = f"VectorDB load dataset timeout in {self.timeout}"
                 log.warning(msg)
@@ -183,12 +241,73 @@ class SerialInsertRunner:
         return count
 
 
+class SerialDeleteRunner:
+    """Delete the ids from the loaded collection in batches, in a subprocess bounded by the timeout like the load"""
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        ids: np.ndarray,
+        timeout: float | None = None,
+        batch_size: int = NUM_PER_BATCH,
+    ):
+        self.timeout = timeout if isinstance(timeout, int | float) else None
+        self.db = db
+        self.ids = ids
+        self.batch_size = batch_size
+
+    def task(self) -> tuple[int, LatencyHistogram]:
+        count = 0
+        latencies = LatencyHistogram()
+        with self.db.init():
+            log.info(f"({mp.current_process().name:16}) Start deleting {len(self.ids)} ids in batch {self.batch_size}")
+            for start in range(0, len(self.ids), self.batch_size):
+                s = time.perf_counter()
+                delete_count, error = self.db.delete_embeddings(self.ids[start : start + self.batch_size].tolist())
+                if error is not None:
+                    raise error
+                latencies.record(time.perf_counter() - s)
+                count += delete_count
+                if latencies.count % 1000 == 0:
+                    log.info(f"({mp.current_process().name:16}) Deleted {count} embeddings from VectorDB")
+
+        log.info(f"({mp.current_process().name:16}) Finish deleting {count} embeddings from VectorDB")
+        return count, latencies
+
+    @utils.time_it
+    def _delete_all_batches(self) -> tuple[int, LatencyHistogram]:
+        with concurrent.futures.ProcessPoolExecutor(
+            mp_context=mp.get_context("spawn"),
+            max_workers=1,
+        ) as executor:
+            future = executor.submit(self.task)
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError as e:
+                msg = f"VectorDB delete timeout in {self.timeout}"
+                log.warning(msg)
+                for pid, _ in executor._processes.items():
+                    psutil.Process(pid).kill()
+                raise PerformanceTimeoutError(msg) from e
+            except Exception as e:
+                log.warning(f"VectorDB delete error: {e}")
+                raise e from e
+
+    def run(self) -> tuple[int, float, float]:
+        """
+        Returns:
+            tuple[int, float, float]: deleted count, delete_duration, delete batch latency p99
+        """
+        (count, latencies), dur = self._delete_all_batches()
+        return count, dur, latencies.percentile(99)
+
+
 class SerialSearchRunner:
     def __init__(
         self,
         db: api.VectorDB,
         test_data: list[list[float]],
-        ground_truth: pd.DataFrame,
+        ground_truth: pd.DataFrame | np.ndarray,
         k: int = 100,
         filters: dict | None = None,
     ):
@@ -202,7 +321,7 @@ class SerialSearchRunner:
             self.test_data = test_data
         self.ground_truth = ground_truth
 
-    def search(self, args: tuple[list, pd.DataFrame]) -> tuple[float, float, float]:
+    def search(self, args: tuple[list, pd.DataFrame | np.ndarray]) -> tuple[float, float, float, float, list[float]]:
         log.info(f"{mp.current_process().name:14} start search the entire test_data to get recall and latency")
         with self.db.init():
             test_data, ground_truth = args
@@ -210,9 +329,12 @@ class SerialSearchRunner:
 
             log.debug(f"test dataset size: {len(test_data)}")
             if ground_truth is not None:
-                log.debug(f"ground truth size: {ground_truth.columns}, shape: {ground_truth.shape}")
+                log.debug(f"ground truth shape: {ground_truth.shape}")
 
-            latencies, recalls, ndcgs = [], [], []
+            latencies = LatencyHistogram()
+            phases = self.db.phase_timer = api.PhaseTimer()
+            # result ids are only collected in the timed loop, and scored as a whole afterwards
+            got = np.full((len(test_data), self.k), -1, dtype=np.int64)
             for idx, emb in enumerate(test_data):
                 s = time.perf_counter()
                 try:
@@ -227,48 +349,65 @@ class SerialSearchRunner:
                     traceback.print_exc(chain=True)
                     raise e from None
 
-                latencies.append(time.perf_counter() - s)
+                latency = time.perf_counter() - s
+                latencies.record(latency)
 
-                if ground_truth is not None:
-                    gt = ground_truth["neighbors_id"][idx]
-                    recalls.append(calc_recall(self.k, gt[: self.k], results))
-                    ndcgs.append(calc_ndcg(gt[: self.k], results, ideal_dcg))
-                else:
-                    recalls.append(0)
-                    ndcgs.append(0)
+                results = results[: self.k]
+                got[idx, : len(results)] = results
 
-                if len(latencies) % 100 == 0:
+                if latencies.count % 100 == 0:
                     log.debug(
-                        f"({mp.current_process().name:14}) search_count={len(latencies):3}, "
-                        f"latest_latency={latencies[-1]}, latest recall={recalls[-1]}"
+                        f"({mp.current_process().name:14}) search_count={latencies.count:3}, latest_latency={latency}"
                     )
+            self.db.phase_timer = None
+
+        if ground_truth is not None:
+            neighbors = ground_truth if isinstance(ground_truth, np.ndarray) else ground_truth["neighbors_id"]
+            gt = ground_truth_array(neighbors[: len(test_data)], self.k)
+            recalls = calc_recall_batch(self.k, gt, got)
+            ndcgs = calc_ndcg_batch(gt, got, ideal_dcg)
+            mrrs = calc_mrr_batch(gt, got)
+        else:
+            recalls = ndcgs = mrrs = np.zeros(len(test_data))
 
-        avg_latency = round(np.mean(latencies), 4)
+        avg_latency = round(latencies.mean, 4)
         avg_recall = round(np.mean(recalls), 4)
         avg_ndcg = round(np.mean(ndcgs), 4)
-        cost = round(np.sum(latencies), 4)
-        p99 = round(np.percentile(latencies, 99), 4)
+        avg_mrr = round(np.mean(mrrs), 4)
+        cost = round(latencies.sum, 4)
+        p99 = round(latencies.percentile(99), 4)
+        phase_latencies = phases.mean_latencies(latencies.count)
         log.info(
             f"{mp.current_process().name:14} search entire test_data: "
             f"cost={cost}s, "
-            f"queries={len(latencies)}, "
+            f"queries={latencies.count}, "
             f"avg_recall={avg_recall}, "
-            f"avg_ndcg={avg_ndcg},"
+            f"avg_ndcg={avg_ndcg}, "
+            f"avg_mrr={avg_mrr}, "
             f"avg_latency={avg_latency}, "
             f"p99={p99}"
         )
-        return (avg_recall, avg_ndcg, p99)
+        if phase_latencies:
+            phases_str = ", ".join(
+                [f"{p.value}={t:.6f}s" for p, t in zip(api.SearchPhase, phase_latencies, strict=True)]
+            )
+            log.info(
+                f"{mp.current_process().name:14} mean search phases: {phases_str}, "
+                f"unmarked={latencies.mean - sum(phase_latencies):.6f}s"
+            )
+        return (avg_recall, avg_ndcg, p99, avg_mrr, phase_latencies)
 
-    def _run_in_subprocess(self) -> tuple[float, float]:
+    def _run_in_subprocess(self) -> tuple[float, float, float, float, list[float]]:
         with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
             future = executor.submit(self.search, (self.test_data, self.ground_truth))
             return future.result()
 
     @utils.time_it
-    def run(self) -> tuple[float, float, float]:
+    def run(self) -> tuple[float, float, float, float, list[float]]:
         """
         Returns:
-            tuple[tuple[float, float, float], float]: (avg_recall, avg_ndcg, p99_latency), cost
+            tuple[tuple[float, float, float, float, list[float]], float]: (avg_recall, avg_ndcg, p99_latency,
+                avg_mrr, mean seconds of each SearchPhase marked by the client), cost
 
         """
         return self._run_in_subprocess()
@@ -0,0 +1,143 @@
+import logging
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+from collections.abc import Iterable
+
+from ... import config
+from ...models import LatencySLO
+from ..clients import api
+from .histogram import LatencyHistogram
+from .mp_runner import MultiProcessingSearchRunner, SearchWorkerPool
+from .util import SharedArray, ThroughputSeries
+
+log = logging.getLogger(__name__)
+
+
+class ThreadedSearchRunner(MultiProcessingSearchRunner):
+    """processes x threads search runner, each search process hosts `threads_per_process` threads.
+
+    Most client SDKs release the GIL while waiting for the server, so a few threads per process
+    can keep high concurrencies in flight without one interpreter for each request. Every thread
+    opens its own `db.init()` on its own `db.thread_copy()` and records its own latencies, which are
+    merged within the process. The outputs are the same as MultiProcessingSearchRunner's.
+
+    Args:
+        threads_per_process(int): maximum search threads of one process, default to 1
+        concurrency(Iterable): concurrencies, default [1, 5, 10, 15, 20, 25, 30, 35]
+        duration(int): duration for each concurency, default to 30s
+    """
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        test_data: list[list[float]],
+        k: int = config.K_DEFAULT,
+        filters: dict | None = None,
+        concurrencies: Iterable[int] = config.NUM_CONCURRENCY,
+        duration: int = config.CONCURRENCY_DURATION,
+        concurrency_timeout: int = config.CONCURRENCY_TIMEOUT,
+        warmup_duration: int = config.CONCURRENCY_WARMUP_DURATION,
+        adaptive: bool = False,
+        saturation_gain: float = config.SATURATION_QPS_GAIN,
+        saturation_latency_limit: float = 0.0,
+        latency_slos: Iterable[LatencySLO] = (),
+        pin_workers: bool = False,
+        client_cpu_threshold: float = config.CLIENT_BOUND_CPU_PERCENT,
+        threads_per_process: int = 1,
+    ):
+        super().__init__(
+            db=db,
+            test_data=test_data,
+            k=k,
+            filters=filters,
+            concurrencies=concurrencies,
+            duration=duration,
+            concurrency_timeout=concurrency_timeout,
+            warmup_duration=warmup_duration,
+            adaptive=adaptive,
+            saturation_gain=saturation_gain,
+            saturation_latency_limit=saturation_latency_limit,
+            latency_slos=latency_slos,
+            pin_workers=pin_workers,
+            client_cpu_threshold=client_cpu_threshold,
+        )
+        self.threads_per_process = threads_per_process
+
+    def _search_worker(
+        self,
+        test_data: SharedArray,
+        task_q: mp.Queue,
+        ready_q: mp.Queue,
+        result_q: mp.Queue,
+    ) -> None:
+        """Start the connected search threads of this process, then run the tasks of every concurrency level"""
+        self._thread_qs = [queue.Queue() for _ in range(self.threads_per_process)]
+        self._thread_result_q = queue.Queue()
+        threads = [
+            threading.Thread(target=self._search_thread, args=(test_data, q), daemon=True) for q in self._thread_qs
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            for _ in threads:
+                if isinstance(res := self._thread_result_q.get(), Exception):
+                    raise res
+            ready_q.put(os.getpid())
+            self._serve_tasks(test_data, task_q, result_q)
+        finally:
+            for q in self._thread_qs:
+                q.put(None)
+            for t in threads:
+                t.join()
+
+    def _search_thread(self, test_data: SharedArray, task_q: queue.Queue) -> None:
+        """Keep one connection of its own db copy, and search for every duration put into task_q"""
+        try:
+            db = self.db.thread_copy()
+            with db.init():
+                self._thread_result_q.put(None)
+                while (duration := task_q.get()) is not None:
+                    self._thread_result_q.put(self._search_loop(db, test_data, duration))
+        except Exception as e:
+            self._thread_result_q.put(e)
+
+    def search_threads(
+        self,
+        test_data: SharedArray,
+        worker_id: int,
+        duration: float,
+        threads: int,
+    ) -> tuple[int, float, LatencyHistogram, ThroughputSeries, api.PhaseTimer]:
+        """Search with the first `threads` threads of this process for `duration` seconds"""
+        for q in self._thread_qs[:threads]:
+            q.put(duration)
+
+        results = [self._thread_result_q.get() for _ in range(threads)]
+        for res in results:
+            if isinstance(res, Exception):
+                raise res
+
+        count = sum([r[0] for r in results])
+        total_dur = max([r[1] for r in results])
+        return (
+            count,
+            total_dur,
+            LatencyHistogram.merge_all([r[2] for r in results]),
+            ThroughputSeries.merge_all([r[3] for r in results]),
+            api.PhaseTimer.merge_all([r[4] for r in results]),
+        )
+
+    def _pool_size(self) -> int:
+        return math.ceil(max(self.concurrencies) / self.threads_per_process)
+
+    def _run_concurrency(self, pool: SearchWorkerPool, conc: int, duration: float) -> tuple[list, float]:
+        num_workers = math.ceil(conc / self.threads_per_process)
+        per_worker, remainder = divmod(conc, num_workers)
+        return pool.run_each(
+            "search_threads",
+            [{"duration": duration, "threads": per_worker + (i < remainder)} for i in range(num_workers)],
+        )
@@ -0,0 +1,215 @@
+import logging
+import multiprocessing as mp
+import pathlib
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from ... import config
+from ..clients import api
+from .histogram import LatencyHistogram
+from .mp_runner import MultiProcessingSearchRunner, SearchWorkerPool
+from .open_loop_runner import LATE_THRESHOLD
+from .util import SharedArray, ThroughputSeries
+
+log = logging.getLogger(__name__)
+
+
+class TraceReplayRunner(MultiProcessingSearchRunner):
+    """Replay a query trace, such as one recorded from production traffic, with its own arrival times.
+
+    The trace is a Parquet file of one query per row:
+        timestamp: arrival time, in seconds or a datetime
+        query_index | query: row of the test data to search, or the query vector itself
+        k (optional): top k of the query, default to the k of the case
+        filter (optional): id filter of the query as in the filter cases, null for the filters of the case
+
+    The rows are dealt round robin to the workers, each one issues its queries at the trace offsets
+    divided by `speed`, open-loop like OpenLoopSearchRunner, and the latency is measured from the
+    scheduled send time. With speed 0 the workers replay their queries back-to-back instead.
+
+    Args:
+        trace_file(str): path of the Parquet trace
+        speed(float): 1 for the recorded pace, N for N times faster, 0 for as fast as possible
+        num_workers(int): number of worker connections replaying the trace
+        window(float): latency percentiles are also reported for every `window` seconds of the replay
+        normalize(bool): L2 normalize the query vectors of the trace, as the test data is for the cosine metric
+    """
+
+    def __init__(
+        self,
+        db: api.VectorDB,
+        test_data: list[list[float]],
+        trace_file: str,
+        speed: float = 1.0,
+        num_workers: int = max(config.NUM_CONCURRENCY),
+        window: float = config.TRACE_WINDOW,
+        normalize: bool = False,
+        k: int = config.K_DEFAULT,
+        filters: dict | None = None,
+        concurrency_timeout: int = config.CONCURRENCY_TIMEOUT,
+    ):
+        trace = self._read_trace(trace_file, test_data, k)
+        vectors = trace["vectors"]
+        if vectors is not None and normalize:
+            vectors = vectors / np.linalg.norm(vectors, axis=1)[:, np.newaxis]
+        super().__init__(
+            db=db,
+            test_data=vectors if vectors is not None else test_data,
+            k=k,
+            filters=filters,
+            concurrencies=[num_workers],
+            concurrency_timeout=concurrency_timeout,
+        )
+        self.trace_file = trace_file
+        self.speed = speed
+        self.num_workers = num_workers
+        self.window = window
+        self.offsets: np.ndarray = trace["offsets"]
+        self.query_ids: np.ndarray = trace["query_ids"]
+        self.ks: np.ndarray = trace["ks"]
+        self.filter_ids: np.ndarray = trace["filter_ids"]
+
+    @staticmethod
+    def _read_trace(trace_file: str, test_data: list[list[float]], k: int) -> dict:
+        df = pd.read_parquet(pathlib.Path(trace_file))
+        if "timestamp" not in df.columns or not {"query_index", "query"} & set(df.columns):
+            msg = f"trace {trace_file} needs a timestamp and a query_index or query column, got {list(df.columns)}"
+            raise ValueError(msg)
+
+        df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+        timestamps = df["timestamp"]
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            offsets = (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy()
+        else:
+            offsets = (timestamps - timestamps.iloc[0]).to_numpy(dtype=np.float64)
+
+        if "query" in df.columns:
+            vectors = np.stack(df["query"].to_numpy()).astype(np.float32)
+            query_ids = np.arange(len(df), dtype=np.int64)
+        else:
+            vectors = None
+            query_ids = df["query_index"].to_numpy(dtype=np.int64)
+            if len(query_ids) > 0 and (query_ids.min() < 0 or query_ids.max() >= len(test_data)):
+                msg = f"query_index of trace {trace_file} is out of the {len(test_data)} test queries"
+                raise ValueError(msg)
+
+        ks = df["k"].fillna(k).to_numpy(dtype=np.int64) if "k" in df.columns else np.full(len(df), k)
+        filter_ids = df["filter"].fillna(-1).to_numpy(dtype=np.int64) if "filter" in df.columns else None
+        log.info(f"Read {len(df)} queries over {offsets[-1] if len(offsets) else 0:.1f}s from trace {trace_file}")
+        return {
+            "offsets": offsets,
+            "query_ids": query_ids,
+            "ks": ks,
+            "filter_ids": filter_ids if filter_ids is not None else np.full(len(df), -1),
+            "vectors": vectors,
+        }
+
+    def _query_filters(self, row: int) -> dict | None:
+        filter_id = int(self.filter_ids[row])
+        if filter_id < 0:
+            return self.filters
+        return {"metadata": f">={filter_id}", "id": filter_id}
+
+    def replay(
+        self,
+        test_data: SharedArray,
+        worker_id: int,
+    ) -> tuple[int, float, dict[int, LatencyHistogram], int, ThroughputSeries]:
+        """Replay every num_workers-th query of the trace from the worker_id-th one
+
+        Returns:
+            tuple: (count, actual duration, latencies of each window, late count, per-second series)
+        """
+        start_time = time.perf_counter()
+        count, late = 0, 0
+        windows: dict[int, LatencyHistogram] = {}
+        series = ThroughputSeries()
+        for row in range(worker_id, len(self.offsets), self.num_workers):
+            now = time.perf_counter()
+            if self.speed > 0:
+                scheduled = start_time + self.offsets[row] / self.speed
+                if now < scheduled:
+                    time.sleep(scheduled - now)
+                elif now - scheduled > LATE_THRESHOLD:
+                    late += 1
+            else:
+                scheduled = now
+
+            query = test_data[self.query_ids[row]].tolist()
+            try:
+                self.db.search_embedding(
+                    query,
+                    int(self.ks[row]),
+                    self._query_filters(row),
+                )
+            except Exception as e:
+                log.warning(f"VectorDB search_embedding error: {e}")
+                traceback.print_exc(chain=True)
+                raise e from None
+
+            window = int((scheduled - start_time) / self.window)
+            windows.setdefault(window, LatencyHistogram()).record(time.perf_counter() - scheduled)
+            series.record(time.time())
+            count += 1
+
+        total_dur = round(time.perf_counter() - start_time, 4)
+        log.debug(
+            f"{mp.current_process().name:16} replayed {count} queries at speed {self.speed}: "
+            f"actual_dur={total_dur}s, late={late}"
+        )
+        return (count, total_dur, windows, late, series)
+
+    def _replay(self) -> dict:
+        try:
+            with SearchWorkerPool(self, size=self.num_workers, timeout=self.concurrency_timeout) as pool:
+                log.info(
+                    f"Start replaying trace {self.trace_file} at speed {self.speed or 'max'}, "
+                    f"queries={len(self.offsets)}, workers={self.num_workers}"
+                )
+                results, cost = pool.run(self.num_workers, "replay")
+        except Exception as e:
+            log.warning(f"Fail to replay trace {self.trace_file}, reason={e}")
+            traceback.print_exc()
+            raise e from None
+        finally:
+            self.stop()
+
+        windows: dict[int, LatencyHistogram] = {}
+        for r in results:
+            for window, latencies in r[2].items():
+                windows.setdefault(window, LatencyHistogram()).merge(latencies)
+        latencies = LatencyHistogram.merge_all(windows.values())
+        p50, p99, p999 = latencies.percentiles([50, 99, 99.9])
+        late = sum([r[3] for r in results])
+        series = ThroughputSeries.merge_all([r[4] for r in results])
+        qps = series.qps(cost)
+        log.info(
+            f"End replaying trace: dur={cost}s, count={latencies.count}, qps={qps}, "
+            f"p99={p99:.4f}s, p999={p999:.4f}s, late={late}"
+        )
+
+        window_list = sorted(windows)
+        return {
+            "trace_qps": qps,
+            "trace_latency_p50": p50,
+            "trace_latency_p99": p99,
+            "trace_latency_p999": p999,
+            "trace_late": late,
+            "trace_qps_timeline": series.counts,
+            "trace_window_start_list": [w * self.window for w in window_list],
+            "trace_window_qps_list": [round(windows[w].count / self.window, 4) for w in window_list],
+            "trace_window_latency_p50_list": [windows[w].percentile(50) for w in window_list],
+            "trace_window_latency_p99_list": [windows[w].percentile(99) for w in window_list],
+        }
+
+    def run(self) -> dict:
+        """
+        Returns:
+            dict: results keyed by their Metric field names, the qps, p50, p99, p999 latency, late queries
+                and per-second completions of the whole replay, then the start second, qps, p50 and p99
+                latency of each window
+        """
+        return self._replay()
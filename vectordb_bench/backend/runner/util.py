@@ -1,8 +1,17 @@
 import logging
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from typing import Self
 
 import numpy as np
+import psutil
 from pandas import DataFrame
 
+from ... import config
+from .histogram import LatencyHistogram
+
 log = logging.getLogger(__name__)
 
 
@@ -15,3 +24,309 @@ def get_data(data_df: DataFrame, normalize: bool) -> tuple[list[list[float]], li
     else:
         all_embeddings = emb_np.tolist()
     return all_embeddings, all_metadata
+
+
+class ArrayBatcher:
+    """Re-slice a stream of (ids, vectors) arrays into batches of any size, the size can change between batches.
+
+    Examples:
+        >>> batcher = ArrayBatcher(dataset.iter_arrays())
+        >>> ids, vectors = batcher.take(500)
+        >>> for ids, vectors in batcher.batches(1000):
+        >>>     ...
+    """
+
+    def __init__(self, arrays: Iterator[tuple[np.ndarray, np.ndarray]]):
+        self._arrays = arrays
+        self._ids: list[np.ndarray] = []
+        self._vectors: list[np.ndarray] = []
+        self._buffered = 0
+
+    def take(self, n: int) -> tuple[np.ndarray, np.ndarray] | None:
+        """Next n rows, fewer at the end of the stream, None if nothing is left"""
+        while self._buffered < n:
+            try:
+                ids, vectors = next(self._arrays)
+            except StopIteration:
+                break
+            self._ids.append(ids)
+            self._vectors.append(vectors)
+            self._buffered += len(ids)
+
+        if self._buffered == 0:
+            return None
+        if len(self._ids) == 1 and self._buffered <= n:
+            ids, vectors = self._ids[0], self._vectors[0]
+        else:
+            ids, vectors = np.concatenate(self._ids), np.concatenate(self._vectors)
+
+        self._ids, self._vectors = [ids[n:]], [vectors[n:]]
+        self._buffered = len(ids[n:])
+        return ids[:n], vectors[:n]
+
+    def batches(self, n: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        while (batch := self.take(n)) is not None:
+            yield batch
+
+
+class InsertTimeline:
+    """Ingest rows/s and insert batch latency percentiles, sampled every `interval` seconds of the load.
+
+    Examples:
+        >>> timeline = InsertTimeline()
+        >>> for batch in batches:
+        >>>     s = time.perf_counter()
+        >>>     db.insert_embeddings_array(*batch)
+        >>>     timeline.record(len(batch[0]), time.perf_counter() - s)
+        >>> timeline.finish()
+        >>> time_list, rows_per_sec_list, latency_p50_list, latency_p99_list = timeline.to_tuple()
+    """
+
+    def __init__(self, interval: float = config.LOAD_TIMELINE_INTERVAL):
+        self.interval = interval
+        self.start = self._window_start = time.perf_counter()
+        self._rows = 0
+        self._latencies = LatencyHistogram()
+
+        self.time_list: list[float] = []
+        self.rows_per_sec_list: list[float] = []
+        self.latency_p50_list: list[float] = []
+        self.latency_p99_list: list[float] = []
+
+    def record(self, rows: int, latency: float):
+        self._rows += rows
+        self._latencies.record(latency)
+        self.tick()
+
+    def tick(self):
+        """Close the current window once the interval has passed, even if no batch finished in it"""
+        if time.perf_counter() - self._window_start >= self.interval:
+            self._sample()
+
+    def _sample(self):
+        now = time.perf_counter()
+        p50, p99 = self._latencies.percentiles([50, 99])
+        self.time_list.append(round(now - self.start, 4))
+        self.rows_per_sec_list.append(round(self._rows / (now - self._window_start), 4))
+        self.latency_p50_list.append(p50)
+        self.latency_p99_list.append(p99)
+
+        self._window_start, self._rows = now, 0
+        self._latencies = LatencyHistogram()
+
+    def finish(self):
+        if self._rows > 0:
+            self._sample()
+
+    def to_tuple(self) -> tuple[list[float], list[float], list[float], list[float]]:
+        return (self.time_list, self.rows_per_sec_list, self.latency_p50_list, self.latency_p99_list)
+
+
+class TokenBucket:
+    """Pace a stream of batches at `rate` rows/s.
+
+    Tokens refill continuously, and a batch waits only for the tokens it lacks, so batches go out
+    evenly spaced instead of in bursts at the start of each second. At most `capacity` tokens are
+    kept while idle, which bounds the burst after a stall.
+
+    Examples:
+        >>> bucket = TokenBucket(rate=1000, capacity=100)
+        >>> for ids, vectors in batches:
+        >>>     bucket.acquire(len(ids))
+        >>>     executor.submit(insert, ids, vectors)
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.perf_counter()
+
+    def _refill(self):
+        now = time.perf_counter()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, n: int) -> float:
+        """Wait until n tokens are there and take them, n can be larger than the capacity
+
+        Returns:
+            float: seconds waited
+        """
+        start = time.perf_counter()
+        self._refill()
+        if self.tokens < n:
+            time.sleep((n - self.tokens) / self.rate)
+            # not capped, so that oversleeping is made up by the next batch
+            now = time.perf_counter()
+            self.tokens += (now - self._updated) * self.rate
+            self._updated = now
+        self.tokens -= n
+        return time.perf_counter() - start
+
+
+class ThroughputSeries:
+    """Completed requests bucketed by wall-clock second.
+
+    All the workers of one concurrency level share the wall clock, so their merged series is the
+    throughput of the level second by second, showing the stalls an average qps would hide.
+
+    Examples:
+        >>> series = ThroughputSeries()
+        >>> series.record(time.time())
+        >>> merged = ThroughputSeries.merge_all(worker_series)
+        >>> merged.counts, merged.qps(cost)
+    """
+
+    def __init__(self):
+        self.start: int | None = None  # epoch second of counts[0]
+        self.counts: list[int] = []
+
+    def record(self, t: float):
+        sec = int(t)
+        if self.start is None:
+            self.start = sec
+        idx = sec - self.start
+        if idx >= len(self.counts):
+            self.counts.extend([0] * (idx - len(self.counts) + 1))
+        self.counts[idx] += 1
+
+    def merge(self, other: Self):
+        if other.start is None:
+            return
+        if self.start is None:
+            self.start, self.counts = other.start, list(other.counts)
+            return
+
+        start = min(self.start, other.start)
+        end = max(self.start + len(self.counts), other.start + len(other.counts))
+        counts = [0] * (end - start)
+        for series in (self, other):
+            offset = series.start - start
+            for i, c in enumerate(series.counts):
+                counts[offset + i] += c
+        self.start, self.counts = start, counts
+
+    @classmethod
+    def merge_all(cls, series: Iterable[Self]) -> Self:
+        merged = cls()
+        for s in series:
+            merged.merge(s)
+        return merged
+
+    def steady_qps(self) -> float | None:
+        """Mean qps of the whole seconds, leaving out the partial first and last ones.
+        None if there are less than 3 seconds."""
+        if len(self.counts) < 3:
+            return None
+        return sum(self.counts[1:-1]) / (len(self.counts) - 2)
+
+    def qps(self, cost: float) -> float:
+        """steady_qps, or the whole count over `cost` if the series is too short for it.
+        The cost also covers collecting the results of the workers, so it's only the fallback."""
+        steady_qps = self.steady_qps()
+        return round(steady_qps if steady_qps is not None else sum(self.counts) / cost, 4)
+
+
+class ProcessUsage:
+    """CPU time and context switches of the current process, all its threads included, over a window.
+
+    A worker busy near 100% cpu can't issue requests any faster, so the qps it measures is the
+    limit of the client rather than of the database.
+
+    Examples:
+        >>> with ProcessUsage.measure() as usage:
+        >>>     search()
+        >>> usage.cpu_percent, usage.ctx_switches_per_sec
+    """
+
+    def __init__(self):
+        self.duration = 0.0
+        self.cpu_time = 0.0  # user + system seconds
+        self.ctx_switches = 0  # voluntary + involuntary
+
+    @staticmethod
+    def _snapshot(process: psutil.Process) -> tuple[float, float, int]:
+        cpu, ctx = process.cpu_times(), process.num_ctx_switches()
+        return time.perf_counter(), cpu.user + cpu.system, ctx.voluntary + ctx.involuntary
+
+    @classmethod
+    @contextmanager
+    def measure(cls) -> Iterator[Self]:
+        process = psutil.Process()
+        usage = cls()
+        start, cpu_time, ctx_switches = cls._snapshot(process)
+        try:
+            yield usage
+        finally:
+            end, end_cpu_time, end_ctx_switches = cls._snapshot(process)
+            usage.duration = end - start
+            usage.cpu_time = end_cpu_time - cpu_time
+            usage.ctx_switches = end_ctx_switches - ctx_switches
+
+    @property
+    def cpu_percent(self) -> float:
+        """100 for one fully busy core"""
+        return 100 * self.cpu_time / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def ctx_switches_per_sec(self) -> float:
+        return self.ctx_switches / self.duration if self.duration > 0 else 0.0
+
+
+class SharedArray:
+    """A numpy array placed once in a `multiprocessing.shared_memory` block.
+
+    Pickling a SharedArray only ships the block name, shape and dtype, so every
+    process it is sent to attaches to the same memory zero-copy instead of
+    unpickling its own copy of the data.
+
+    Only the creator owns the block, call `close()` in the creator to release it.
+
+    Examples:
+        >>> shared = SharedArray(np.zeros((10, 4)))
+        >>> executor.submit(func, shared)  # func reads shared.array[i]
+        >>> shared.close()
+    """
+
+    def __init__(self, data: np.ndarray, dtype: np.dtype = np.float32):
+        data = np.ascontiguousarray(data, dtype=dtype)
+        self._shm = SharedMemory(create=True, size=max(data.nbytes, 1))
+        self._owner = True
+        self.shape, self.dtype = data.shape, data.dtype
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+        self.array[:] = data
+        log.debug(f"Created shared memory block {self._shm.name}, shape={self.shape}, nbytes={data.nbytes}")
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        return self.array[idx]
+
+    def __getstate__(self) -> dict:
+        return {"name": self._shm.name, "shape": self.shape, "dtype": self.dtype.str}
+
+    def __setstate__(self, state: dict):
+        self._shm = SharedMemory(name=state["name"])
+        self._owner = False
+        self.shape, self.dtype = state["shape"], np.dtype(state["dtype"])
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    def close(self):
+        """Detach from the block, and release it if this is the creator process"""
+        if self._shm is None:
+            return
+        self.array = None
+        try:
+            self._shm.close()
+        except BufferError:
+            log.debug(f"Shared memory block {self._shm.name} still has exported views, leave it to gc")
+        if self._owner:
+            self._shm.unlink()
+            log.debug(f"Released shared memory block {self._shm.name}")
+        self._shm = None
@@ -1,20 +1,37 @@
 import concurrent
+import functools
 import logging
 import traceback
 from enum import Enum, auto
 
 import numpy as np
+import pandas as pd
 import psutil
 
 from vectordb_bench.base import BaseModel
 from vectordb_bench.metric import Metric
-from vectordb_bench.models import PerformanceTimeoutError, TaskConfig, TaskStage
+from vectordb_bench.models import PerformanceTimeoutError, TaskConfig, TaskStage, WorkloadOp
 
 from . import utils
 from .cases import Case, CaseLabel
 from .clients import MetricType, api
 from .data_source import DatasetSource
-from .runner import MultiProcessingSearchRunner, SerialInsertRunner, SerialSearchRunner
+from .runner import (
+    AsyncSearchRunner,
+    BatchSearchRunner,
+    DistributedSearchRunner,
+    MixedWorkloadRunner,
+    MultiProcessingSearchRunner,
+    OpenLoopSearchRunner,
+    ParallelInsertRunner,
+    ReadWriteRunner,
+    SerialDeleteRunner,
+    SerialInsertRunner,
+    SerialSearchRunner,
+    ThreadedSearchRunner,
+    TraceReplayRunner,
+)
+from .runner.util import InsertTimeline
 
 log = logging.getLogger(__name__)
 
@@ -45,9 +62,14 @@ class CaseRunner(BaseModel):
 
     db: api.VectorDB | None = None
     test_emb: list[list[float]] | None = None
+    deleted_ids: np.ndarray | None = None
     serial_search_runner: SerialSearchRunner | None = None
+    batch_search_runner: BatchSearchRunner | None = None
     search_runner: MultiProcessingSearchRunner | None = None
     final_search_runner: MultiProcessingSearchRunner | None = None
+    open_loop_runner: OpenLoopSearchRunner | None = None
+    trace_runner: TraceReplayRunner | None = None
+    mixed_runner: MixedWorkloadRunner | None = None
 
     def __eq__(self, obj: any):
         if isinstance(obj, CaseRunner):
@@ -128,6 +150,7 @@ class CaseRunner(BaseModel):
                 self.ca.dataset,
                 self.normalize,
                 self.ca.load_timeout,
+                batch_size=self.config.case_config.load_batch_size,
             )
             count = runner.run_endlessness()
         except Exception as e:
@@ -146,37 +169,45 @@ class CaseRunner(BaseModel):
 
         log.info("Start performance case")
         try:
-            m = Metric()
+            m = Metric(load_concurrency=self.config.case_config.load_concurrency)
             if drop_old:
                 if TaskStage.LOAD in self.config.stages:
-                    _, load_dur = self._load_train_data()
-                    build_dur = self._optimize()
-                    m.load_duration = round(load_dur + build_dur, 4)
-                    log.info(
-                        f"Finish loading the entire dataset into VectorDB,"
-                        f" insert_duration={load_dur}, optimize_duration={build_dur}"
-                        f" load_duration(insert + optimize) = {m.load_duration}"
-                    )
+                    self._load(m)
+                    if self.ca.delete_rate:
+                        self._delete(m)
                 else:
                     log.info("Data loading skipped")
-            if TaskStage.SEARCH_SERIAL in self.config.stages or TaskStage.SEARCH_CONCURRENT in self.config.stages:
+            if any(
+                stage in self.config.stages
+                for stage in (TaskStage.SEARCH_SERIAL, TaskStage.SEARCH_CONCURRENT, TaskStage.SEARCH_BATCH)
+            ):
                 self._init_search_runner()
                 if TaskStage.SEARCH_CONCURRENT in self.config.stages:
-                    search_results = self._conc_search()
-                    (
-                        m.qps,
-                        m.conc_num_list,
-                        m.conc_qps_list,
-                        m.conc_latency_p99_list,
-                        m.conc_latency_avg_list,
-                    ) = search_results
+                    m.update(self._conc_search())
+                    m.slo_list = [str(slo) for slo in self.config.case_config.concurrency_search_config.latency_slos]
+                    if self.open_loop_runner is not None:
+                        m.update(self._open_loop_search())
+                    if self.trace_runner is not None:
+                        m.update(self._trace_replay())
                 if TaskStage.SEARCH_SERIAL in self.config.stages:
                     search_results = self._serial_search()
                     """
                     m.recall = search_results.recall
                     m.serial_latencies = search_results.serial_latencies
                     """
-                    m.recall, m.ndcg, m.serial_latency_p99 = search_results
+                    m.recall, m.ndcg, m.serial_latency_p99, m.mrr, m.serial_phase_latency_list = search_results
+                if TaskStage.SEARCH_BATCH in self.config.stages:
+                    (
+                        m.batch_size_list,
+                        m.batch_vps_list,
+                        m.batch_latency_p50_list,
+                        m.batch_latency_p99_list,
+                        m.batch_recall_list,
+                    ) = self._batch_search()
+                if self.mixed_runner is not None:
+                    m.update(self._mixed_workload())
+                if m.serial_phase_latency_list or m.conc_phase_latency_list:
+                    m.search_phase_list = [phase.value for phase in api.SearchPhase]
 
         except Exception as e:
             log.warning(f"Failed to run performance case, reason = {e}")
@@ -186,28 +217,163 @@ class CaseRunner(BaseModel):
             log.info(f"Performance case got result: {m}")
             return m
 
+    def _load(self, m: Metric) -> None:
+        """Load the entire dataset into VectorDB and optimize it, at load_insert_rate while searching if set"""
+        if self.config.case_config.load_insert_rate > 0:
+            m.load_batch_size = self.config.case_config.load_batch_size
+            m.update(self._read_write())
+            log.info(
+                f"Finish inserting the entire dataset at {m.insert_target_rows_per_sec} rows/s while"
+                f" searching, insert_duration={m.insert_duration}, rows/s={m.insert_rows_per_sec}"
+            )
+            return
+
+        (m.load_batch_size, timeline), load_dur = self._load_train_data()
+        (
+            m.load_time_list,
+            m.load_rows_per_sec_list,
+            m.load_latency_p50_list,
+            m.load_latency_p99_list,
+        ) = timeline.to_tuple()
+        build_dur = self._optimize()
+        m.insert_duration = round(load_dur, 4)
+        m.optimize_duration = round(build_dur, 4)
+        m.load_duration = round(load_dur + build_dur, 4)
+        log.info(
+            f"Finish loading the entire dataset into VectorDB,"
+            f" insert_duration={load_dur}, optimize_duration={build_dur}"
+            f" load_duration(insert + optimize) = {m.load_duration}"
+        )
+
+    def _delete(self, m: Metric) -> None:
+        """Delete the delete_rate of the loaded rows, then optimize again if optimize_after_delete"""
+        m.delete_count, delete_dur, m.delete_latency_p99 = self._delete_train_data()
+        m.delete_duration = round(delete_dur, 4)
+        m.delete_rows_per_sec = round(m.delete_count / delete_dur, 4) if delete_dur > 0 else 0.0
+        if self.ca.optimize_after_delete:
+            m.delete_optimize_duration = round(self._optimize(), 4)
+        log.info(
+            f"Finish deleting {m.delete_count} rows, delete_duration={m.delete_duration},"
+            f" rows/s={m.delete_rows_per_sec}, optimize_duration={m.delete_optimize_duration}"
+        )
+
+    def _delete_train_data(self) -> tuple[int, float, float]:
+        """Delete the delete_rate of the loaded rows in batches
+
+        Returns:
+            tuple[int, float, float]: deleted count, delete_duration, delete batch latency p99
+        """
+        if not self.db.support_delete():
+            msg = f"{self.config.db.value} doesn't support delete, can't run the delete case: {self.ca.name}"
+            raise ValueError(msg)
+
+        self.deleted_ids = self.ca.delete_ids()
+        runner = SerialDeleteRunner(
+            self.db,
+            self.deleted_ids,
+            self.ca.load_timeout,
+            batch_size=self.config.case_config.load_batch_size,
+        )
+        return runner.run()
+
+    def _ground_truth(self, test_emb: np.ndarray) -> pd.DataFrame | np.ndarray:
+        """Ground truth of the dataset, recomputed without the deleted rows for the delete cases"""
+        if not self.ca.delete_rate:
+            return self.ca.dataset.get_ground_truth()
+
+        deleted_ids = self.deleted_ids if self.deleted_ids is not None else self.ca.delete_ids()
+        k = self.config.case_config.k
+        log.info(f"Compute the top {k} ground truth of the test data without the {len(deleted_ids)} deleted rows")
+        filters = self.ca.filters
+        return self.ca.dataset.compute_ground_truth(
+            test_emb,
+            k,
+            excluded_ids=deleted_ids,
+            min_id=filters["id"] if filters else None,
+        )
+
     @utils.time_it
-    def _load_train_data(self):
-        """Insert train data and get the insert_duration"""
+    def _load_train_data(self) -> tuple[int, InsertTimeline]:
+        """Insert train data and get the insert batch size, ingest timeline and the insert_duration"""
         try:
-            runner = SerialInsertRunner(
-                self.db,
-                self.ca.dataset,
-                self.normalize,
-                self.ca.load_timeout,
-            )
+            case_config = self.config.case_config
+            if case_config.load_concurrency > 1:
+                if case_config.auto_tune_batch_size:
+                    log.warning("Batch size auto-tuning only works with the serial load, ignored")
+                runner = ParallelInsertRunner(
+                    self.db,
+                    self.ca.dataset,
+                    self.normalize,
+                    case_config.load_concurrency,
+                    self.ca.load_timeout,
+                    batch_size=case_config.load_batch_size,
+                )
+            else:
+                runner = SerialInsertRunner(
+                    self.db,
+                    self.ca.dataset,
+                    self.normalize,
+                    self.ca.load_timeout,
+                    batch_size=case_config.load_batch_size,
+                    auto_tune_batch_size=case_config.auto_tune_batch_size,
+                )
             runner.run()
         except Exception as e:
             raise e from None
+        else:
+            return runner.batch_size, runner.timeline
         finally:
             runner = None
 
-    def _serial_search(self) -> tuple[float, float, float]:
+    def _read_write(self) -> dict:
+        """Insert the dataset at load_insert_rate while searching it at each search stage, then optimize
+        and search the entire dataset
+
+        Returns:
+            dict: insert, per search stage and after optimize results, keyed by their Metric field names
+        """
+        case_config = self.config.case_config
+        conc_search_config = case_config.concurrency_search_config
+        runner = ReadWriteRunner(
+            db=self.db,
+            dataset=self.ca.dataset,
+            insert_rate=case_config.load_insert_rate,
+            normalize=self.normalize,
+            k=case_config.k,
+            filters=self.ca.filters,
+            concurrencies=conc_search_config.num_concurrency,
+            read_dur_after_write=conc_search_config.concurrency_duration,
+            timeout=self.ca.load_timeout,
+            batch_size=case_config.load_batch_size,
+        )
+        try:
+            return runner.run_read_write()
+        except Exception as e:
+            log.warning(f"read write error: {e!s}, {e}")
+            raise e from None
+
+    def _batch_search(self) -> tuple[list[int], list[float], list[float], list[float], list[float]]:
+        """Search the entire test data with each batch size, get the vectors/s, batch latencies and recall
+
+        Returns:
+            tuple[list, list, list, list, list]: batch sizes, vectors/s, batch latency p50 and p99, recall
+        """
+        try:
+            results, _ = self.batch_search_runner.run()
+        except Exception as e:
+            log.warning(f"batch search error: {e!s}, {e}")
+            self.stop()
+            raise e from e
+        else:
+            return results
+
+    def _serial_search(self) -> tuple[float, float, float, float, list[float]]:
         """Performance serial tests, search the entire test data once,
         calculate the recall, serial_latency_p99
 
         Returns:
-            tuple[float, float]: recall, serial_latency_p99
+            tuple[float, float, float, float, list[float]]: recall, ndcg, serial_latency_p99, mrr,
+                mean seconds of each search phase
         """
         try:
             results, _ = self.serial_search_runner.run()
@@ -218,12 +384,12 @@ class CaseRunner(BaseModel):
         else:
             return results
 
-    def _conc_search(self):
+    def _conc_search(self) -> dict:
         """Performance concurrency tests, search the test data endlessness
         for 30s in several concurrencies
 
         Returns:
-            float: the largest qps in all concurrencies
+            dict: results keyed by their Metric field names, the largest qps in all concurrencies in "qps"
         """
         try:
             return self.search_runner.run()
@@ -233,6 +399,49 @@ class CaseRunner(BaseModel):
         finally:
             self.stop()
 
+    def _open_loop_search(self) -> dict:
+        """Performance open-loop tests, search at each target qps for 30s,
+        latency is measured from the scheduled send time
+
+        Returns:
+            dict: per target qps results, keyed by their Metric field names
+        """
+        try:
+            return self.open_loop_runner.run()
+        except Exception as e:
+            log.warning(f"open-loop search error: {e!s}, {e}")
+            raise e from None
+        finally:
+            self.stop()
+
+    def _mixed_workload(self) -> dict:
+        """Run the mixed search/upsert/delete workload last, as it rewrites part of the loaded data
+
+        Returns:
+            dict: whole workload, per operation and per recall window results, keyed by their Metric field names
+        """
+        try:
+            return self.mixed_runner.run()
+        except Exception as e:
+            log.warning(f"mixed workload error: {e!s}, {e}")
+            raise e from None
+        finally:
+            self.stop()
+
+    def _trace_replay(self) -> dict:
+        """Replay the query trace at its own arrival times, latency is measured from the scheduled send time
+
+        Returns:
+            dict: whole replay and per window results, keyed by their Metric field names
+        """
+        try:
+            return self.trace_runner.run()
+        except Exception as e:
+            log.warning(f"trace replay error: {e!s}, {e}")
+            raise e from None
+        finally:
+            self.stop()
+
     @utils.time_it
     def _optimize_task(self) -> None:
         with self.db.init():
@@ -253,35 +462,131 @@ class CaseRunner(BaseModel):
                 raise e from None
 
     def _init_search_runner(self):
-        test_emb = np.stack(self.ca.dataset.test_data["emb"])
+        test_emb = self.ca.dataset.get_test_emb()
         if self.normalize:
             test_emb = test_emb / np.linalg.norm(test_emb, axis=1)[:, np.newaxis]
         self.test_emb = test_emb.tolist()
 
-        gt_df = self.ca.dataset.gt_data
+        @functools.cache
+        def ground_truth() -> pd.DataFrame | np.ndarray:
+            """read, or recomputed for the delete cases, only once a stage measuring the recall needs it"""
+            return self._ground_truth(test_emb)
 
-        if TaskStage.SEARCH_SERIAL in self.config.stages:
-            self.serial_search_runner = SerialSearchRunner(
+        if TaskStage.SEARCH_BATCH in self.config.stages:
+            self.batch_search_runner = BatchSearchRunner(
                 db=self.db,
-                test_data=self.test_emb,
-                ground_truth=gt_df,
+                test_data=test_emb,
+                ground_truth=ground_truth(),
+                batch_sizes=self.config.case_config.batch_search_sizes,
                 filters=self.ca.filters,
                 k=self.config.case_config.k,
             )
-        if TaskStage.SEARCH_CONCURRENT in self.config.stages:
-            self.search_runner = MultiProcessingSearchRunner(
+
+        if TaskStage.SEARCH_SERIAL in self.config.stages:
+            self.serial_search_runner = SerialSearchRunner(
                 db=self.db,
                 test_data=self.test_emb,
+                ground_truth=ground_truth(),
                 filters=self.ca.filters,
-                concurrencies=self.config.case_config.concurrency_search_config.num_concurrency,
-                duration=self.config.case_config.concurrency_search_config.concurrency_duration,
-                concurrency_timeout=self.config.case_config.concurrency_search_config.concurrency_timeout,
                 k=self.config.case_config.k,
             )
+        if TaskStage.SEARCH_CONCURRENT in self.config.stages:
+            conc_search_config = self.config.case_config.concurrency_search_config
+            if conc_search_config.async_search and not self.db.support_async_search():
+                log.warning(f"{self.config.db.value} doesn't support async search, use the multiprocessing runner")
+            search_kwargs = {
+                "db": self.db,
+                "test_data": self.test_emb,
+                "filters": self.ca.filters,
+                "concurrencies": conc_search_config.num_concurrency,
+                "duration": conc_search_config.concurrency_duration,
+                "concurrency_timeout": conc_search_config.concurrency_timeout,
+                "warmup_duration": conc_search_config.warmup_duration,
+                "adaptive": conc_search_config.adaptive_concurrency,
+                "saturation_gain": conc_search_config.saturation_gain,
+                "saturation_latency_limit": conc_search_config.saturation_latency_limit,
+                "latency_slos": conc_search_config.latency_slos,
+                "pin_workers": conc_search_config.pin_workers,
+                "client_cpu_threshold": conc_search_config.client_cpu_threshold,
+                "k": self.config.case_config.k,
+            }
+            if conc_search_config.async_search and self.db.support_async_search():
+                self.search_runner = AsyncSearchRunner(
+                    **search_kwargs, num_processes=conc_search_config.async_search_processes
+                )
+            elif conc_search_config.threads_per_process > 1:
+                self.search_runner = ThreadedSearchRunner(
+                    **search_kwargs, threads_per_process=conc_search_config.threads_per_process
+                )
+            else:
+                self.search_runner = MultiProcessingSearchRunner(**search_kwargs)
+            if len(conc_search_config.agents) > 0:
+                self.search_runner = DistributedSearchRunner(self.search_runner, agents=conc_search_config.agents)
+            if len(conc_search_config.target_qps) > 0:
+                self.open_loop_runner = OpenLoopSearchRunner(
+                    db=self.db,
+                    test_data=self.test_emb,
+                    target_qps=conc_search_config.target_qps,
+                    num_workers=max(conc_search_config.num_concurrency),
+                    distribution=conc_search_config.arrival_distribution,
+                    filters=self.ca.filters,
+                    duration=conc_search_config.concurrency_duration,
+                    concurrency_timeout=conc_search_config.concurrency_timeout,
+                    k=self.config.case_config.k,
+                )
+            if conc_search_config.trace_file:
+                self.trace_runner = TraceReplayRunner(
+                    db=self.db,
+                    test_data=self.test_emb,
+                    trace_file=conc_search_config.trace_file,
+                    speed=conc_search_config.trace_speed,
+                    num_workers=max(conc_search_config.num_concurrency),
+                    window=conc_search_config.trace_window,
+                    normalize=self.normalize,
+                    filters=self.ca.filters,
+                    concurrency_timeout=conc_search_config.concurrency_timeout,
+                    k=self.config.case_config.k,
+                )
+            ratios = self._supported_workload_ratios(conc_search_config.mixed_workload)
+            if ratios:
+                self.mixed_runner = MixedWorkloadRunner(
+                    db=self.db,
+                    test_data=self.test_emb,
+                    ground_truth=ground_truth(),
+                    dataset=self.ca.dataset,
+                    ratios=ratios,
+                    rate=conc_search_config.mixed_workload_rate,
+                    num_workers=max(conc_search_config.num_concurrency),
+                    normalize=self.normalize,
+                    filters=self.ca.filters,
+                    duration=conc_search_config.concurrency_duration,
+                    concurrency_timeout=conc_search_config.concurrency_timeout,
+                    k=self.config.case_config.k,
+                )
+
+    def _supported_workload_ratios(self, ratios: dict[WorkloadOp, float]) -> dict[WorkloadOp, float]:
+        """Drop the operations the db doesn't implement from the mixed workload"""
+        supported = {
+            WorkloadOp.SEARCH: True,
+            WorkloadOp.UPSERT: self.db.support_upsert(),
+            WorkloadOp.DELETE: self.db.support_delete(),
+        }
+        unsupported = [op.value for op in ratios if not supported[op]]
+        if unsupported:
+            log.warning(f"{self.config.db.value} doesn't support {unsupported}, skip them in the mixed workload")
+        ratios = {op: share for op, share in ratios.items() if supported[op]}
+        total = sum(ratios.values())
+        return {op: share / total for op, share in ratios.items()}
 
     def stop(self):
         if self.search_runner:
             self.search_runner.stop()
+        if self.open_loop_runner:
+            self.open_loop_runner.stop()
+        if self.trace_runner:
+            self.trace_runner.stop()
+        if self.mixed_runner:
+            self.mixed_runner.stop()
 
 
 DATA_FORMAT = " %-14s | %-12s %-20s %7s | %-10s"
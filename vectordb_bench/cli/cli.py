@@ -18,17 +18,22 @@ import click
 from yaml import load
 
 from .. import config
+from ..backend.cases import DeletePattern, DeletePerformanceCase, type2case
 from ..backend.clients import DB
 from ..backend.clients.api import MetricType
+from ..backend.runner.distributed_runner import serve_agent
 from ..interface import benchmark_runner, global_result_future
 from ..models import (
+    ArrivalDistribution,
     CaseConfig,
     CaseType,
     ConcurrencySearchConfig,
     DBCaseConfig,
     DBConfig,
+    LatencySLO,
     TaskConfig,
     TaskStage,
+    WorkloadOp,
 )
 
 try:
@@ -127,11 +132,28 @@ def click_arg_split(ctx: click.Context, param: click.core.Option, value):  # noq
     return [c.strip() for c in value.split(",") if c.strip()]
 
 
+def parse_latency_slos(ctx: click.Context, param: click.core.Option, value: str) -> list[LatencySLO]:
+    try:
+        return [LatencySLO.parse(spec) for spec in click_arg_split(ctx, param, value)]
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
+def parse_workload_ratios(ctx: click.Context, param: click.core.Option, value):  # noqa: ANN001, ARG001
+    if not value:
+        return {}
+    try:
+        return WorkloadOp.parse_ratios(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
 def parse_task_stages(
     drop_old: bool,
     load: bool,
     search_serial: bool,
     search_concurrent: bool,
+    search_batch: bool = False,
 ) -> list[TaskStage]:
     stages = []
     if load and not drop_old:
@@ -146,6 +168,8 @@ def parse_task_stages(
         stages.append(TaskStage.SEARCH_SERIAL)
     if search_concurrent:
         stages.append(TaskStage.SEARCH_CONCURRENT)
+    if search_batch:
+        stages.append(TaskStage.SEARCH_BATCH)
     return stages
 
 
@@ -183,6 +207,14 @@ def get_custom_case_config(parameters: dict) -> dict:
                 "with_gt": parameters["custom_dataset_with_gt"],
             },
         }
+    if issubclass(type2case[CaseType[parameters["case_type"]]], DeletePerformanceCase):
+        if parameters["delete_rate"] is not None:
+            custom_case_config["delete_rate"] = parameters["delete_rate"]
+        if parameters["delete_pattern"] is not None:
+            custom_case_config["delete_pattern"] = DeletePattern(parameters["delete_pattern"])
+        custom_case_config["optimize_after_delete"] = parameters["optimize_after_delete"]
+    elif parameters["delete_rate"] is not None:
+        log.warning(f"--delete-rate only applies to the delete cases, ignored for {parameters['case_type']}")
     return custom_case_config
 
 
@@ -241,6 +273,27 @@ class CommonTypedDict(TypedDict):
             show_default=True,
         ),
     ]
+    search_batch: Annotated[
+        bool,
+        click.option(
+            "--search-batch/--skip-search-batch",
+            type=bool,
+            default=False,
+            help="Search the test data with batched multi-query requests or skip",
+            show_default=True,
+        ),
+    ]
+    batch_search_sizes: Annotated[
+        list[str],
+        click.option(
+            "--batch-search-sizes",
+            type=str,
+            help="Comma-separated list of queries per request to test during batched search",
+            show_default=True,
+            default=",".join(map(str, config.BATCH_SEARCH_SIZES)),
+            callback=lambda *args: list(map(int, click_arg_split(*args))),
+        ),
+    ]
     case_type: Annotated[
         str,
         click.option(
@@ -281,6 +334,35 @@ class CommonTypedDict(TypedDict):
             help="K value for number of nearest neighbors to search",
         ),
     ]
+    delete_rate: Annotated[
+        float | None,
+        click.option(
+            "--delete-rate",
+            type=click.FloatRange(0, 1, max_open=True),
+            default=None,
+            help="Share of the loaded rows the delete cases delete in batches before searching, the recall is "
+            "against the ground truth recomputed without them, default to the rate of the case",
+        ),
+    ]
+    delete_pattern: Annotated[
+        str | None,
+        click.option(
+            "--delete-pattern",
+            type=click.Choice([p.value for p in DeletePattern]),
+            default=None,
+            help="Delete random rows, or contiguous id ranges, in the delete cases, default to the pattern of the case",
+        ),
+    ]
+    optimize_after_delete: Annotated[
+        bool,
+        click.option(
+            "--optimize-after-delete/--skip-optimize-after-delete",
+            type=bool,
+            default=True,
+            show_default=True,
+            help="Call optimize again after the deletes of the delete cases",
+        ),
+    ]
     concurrency_duration: Annotated[
         int,
         click.option(
@@ -302,6 +384,59 @@ class CommonTypedDict(TypedDict):
             callback=lambda *args: list(map(int, click_arg_split(*args))),
         ),
     ]
+    warmup_duration: Annotated[
+        int,
+        click.option(
+            "--warmup-duration",
+            type=int,
+            default=config.CONCURRENCY_WARMUP_DURATION,
+            show_default=True,
+            help="Seconds of search with the same workers before measuring each concurrency, "
+            "excluded from qps and latencies and reported apart",
+        ),
+    ]
+    adaptive_concurrency: Annotated[
+        bool,
+        click.option(
+            "--adaptive-concurrency/--fixed-concurrency",
+            type=bool,
+            default=False,
+            show_default=True,
+            help="Double the concurrency from 1 up to the largest --num-concurrency until the qps saturates, "
+            "then refine around the best one, instead of searching every --num-concurrency",
+        ),
+    ]
+    saturation_gain: Annotated[
+        float,
+        click.option(
+            "--saturation-gain",
+            type=float,
+            default=config.SATURATION_QPS_GAIN,
+            show_default=True,
+            help="Adaptive concurrency stops growing once the qps gains less than this ratio",
+        ),
+    ]
+    saturation_latency_limit: Annotated[
+        float,
+        click.option(
+            "--saturation-latency-limit",
+            type=float,
+            default=0.0,
+            show_default=True,
+            help="Adaptive concurrency stops growing once the p99 latency is over this many seconds, 0 for no limit",
+        ),
+    ]
+    latency_slo: Annotated[
+        list[LatencySLO],
+        click.option(
+            "--latency-slo",
+            type=str,
+            default="",
+            help="Comma-separated latency budgets like p99<=10ms,p95<=5ms, "
+            "report the largest qps of the concurrent search meeting each one",
+            callback=parse_latency_slos,
+        ),
+    ]
     concurrency_timeout: Annotated[
         int,
         click.option(
@@ -313,6 +448,186 @@ class CommonTypedDict(TypedDict):
             "Set to a negative value to wait indefinitely.",
         ),
     ]
+    target_qps: Annotated[
+        list[str],
+        click.option(
+            "--target-qps",
+            type=str,
+            help="Comma-separated list of target qps for open-loop search, "
+            "using max(--num-concurrency) workers. Skipped if empty",
+            show_default=True,
+            default="",
+            callback=lambda *args: list(map(int, click_arg_split(*args))),
+        ),
+    ]
+    arrival_distribution: Annotated[
+        str,
+        click.option(
+            "--arrival-distribution",
+            type=click.Choice([d.value for d in ArrivalDistribution]),
+            help="Inter-arrival distribution of the open-loop search",
+            show_default=True,
+            default=ArrivalDistribution.CONSTANT.value,
+        ),
+    ]
+    trace_file: Annotated[
+        str | None,
+        click.option(
+            "--trace-file",
+            type=click.Path(exists=True, dir_okay=False),
+            default=None,
+            help="Parquet query trace to replay after the concurrent search, with a timestamp column, "
+            "a query_index or query column, and optional k and filter columns",
+        ),
+    ]
+    trace_speed: Annotated[
+        float,
+        click.option(
+            "--trace-speed",
+            type=float,
+            default=1.0,
+            show_default=True,
+            help="Replay the trace N times faster than recorded, 0 for as fast as possible, "
+            "using max(--num-concurrency) workers",
+        ),
+    ]
+    trace_window: Annotated[
+        float,
+        click.option(
+            "--trace-window",
+            type=float,
+            default=config.TRACE_WINDOW,
+            show_default=True,
+            help="Seconds of each window of the trace replay to report the latency percentiles of",
+        ),
+    ]
+    mixed_workload: Annotated[
+        dict[WorkloadOp, float],
+        click.option(
+            "--mixed-workload",
+            type=str,
+            default="",
+            callback=parse_workload_ratios,
+            help="Shares of a mixed workload to run after the searches, e.g. search=0.8,upsert=0.15,delete=0.05, "
+            "using max(--num-concurrency) workers, the deleted rows are upserted back at the end",
+        ),
+    ]
+    mixed_workload_rate: Annotated[
+        int,
+        click.option(
+            "--mixed-workload-rate",
+            type=int,
+            default=config.MIXED_WORKLOAD_RATE,
+            show_default=True,
+            help="Total operations per second of the mixed workload",
+        ),
+    ]
+    async_search: Annotated[
+        bool,
+        click.option(
+            "--async-search/--skip-async-search",
+            type=bool,
+            default=False,
+            show_default=True,
+            help="Run the concurrent search with asyncio coroutines instead of one process per concurrency, "
+            "only for the clients implementing asearch_embedding",
+        ),
+    ]
+    async_search_processes: Annotated[
+        int,
+        click.option(
+            "--async-search-processes",
+            type=int,
+            default=1,
+            show_default=True,
+            help="Number of processes running an event loop for --async-search",
+        ),
+    ]
+    threads_per_process: Annotated[
+        int,
+        click.option(
+            "--threads-per-process",
+            type=int,
+            default=1,
+            show_default=True,
+            help="Search threads hosted by each process in the concurrent search, each one with its own connection. "
+            "Concurrency 200 with 8 threads per process runs 25 processes",
+        ),
+    ]
+    pin_workers: Annotated[
+        bool,
+        click.option(
+            "--pin-workers/--no-pin-workers",
+            type=bool,
+            default=False,
+            show_default=True,
+            help="Pin each process of the concurrent search to a core of its own",
+        ),
+    ]
+    client_cpu_threshold: Annotated[
+        float,
+        click.option(
+            "--client-cpu-threshold",
+            type=float,
+            default=config.CLIENT_BOUND_CPU_PERCENT,
+            show_default=True,
+            help="Flag the concurrent search as client-bound when its processes are busier than this cpu% on average",
+        ),
+    ]
+    agents: Annotated[
+        list[str],
+        click.option(
+            "--agents",
+            type=str,
+            default="",
+            help="Comma-separated host:port of the `vectordbbench agent`s to split each level of the concurrent "
+            "search over, they share the AGENT_AUTHKEY env of this host and should have synchronized clocks. "
+            "Searched locally if empty",
+            callback=click_arg_split,
+        ),
+    ]
+    load_concurrency: Annotated[
+        int,
+        click.option(
+            "--load-concurrency",
+            type=int,
+            default=config.LOAD_CONCURRENCY,
+            show_default=True,
+            help="Number of processes loading the dataset in parallel, each with its own connection",
+        ),
+    ]
+    load_batch_size: Annotated[
+        int,
+        click.option(
+            "--load-batch-size",
+            type=int,
+            default=config.NUM_PER_BATCH,
+            show_default=True,
+            help="Number of rows in each insert batch while loading the dataset",
+        ),
+    ]
+    auto_tune_batch_size: Annotated[
+        bool,
+        click.option(
+            "--auto-tune-batch-size/--skip-auto-tune-batch-size",
+            type=bool,
+            default=False,
+            show_default=True,
+            help="Probe the insert batch sizes in LOAD_BATCH_SIZE_CANDIDATES at the start of the load, "
+            "and use the one with the best rows/s under LOAD_BATCH_LATENCY_CAP seconds per batch",
+        ),
+    ]
+    load_insert_rate: Annotated[
+        int,
+        click.option(
+            "--load-insert-rate",
+            type=int,
+            default=0,
+            show_default=True,
+            help="Insert the dataset at this many rows/s while searching it at 50%, 60%, 70%, 80% and 90% "
+            "inserted, then optimize and search again. Loads as fast as possible if 0",
+        ),
+    ]
     custom_case_name: Annotated[
         str,
         click.option(
@@ -475,6 +790,22 @@ class IVFFlatTypedDictN(TypedDict):
 def cli(): ...
 
 
+@cli.command()
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    show_default=True,
+    help="Address to listen on, e.g. 0.0.0.0 to accept coordinators from other hosts",
+)
+@click.option("--port", type=int, default=config.AGENT_PORT, show_default=True, help="Port to listen on")
+def agent(host: str, port: int):
+    """Serve the concurrent search of a coordinator running with --agents, authenticated by the required
+    AGENT_AUTHKEY env. The hosts' clocks should be synchronized, the agents start each level at the
+    coordinator's wall-clock time"""
+    serve_agent(host, port)
+
+
 def run(
     db: DB,
     db_config: DBConfig,
@@ -497,10 +828,33 @@ def run(
         case_config=CaseConfig(
             case_id=CaseType[parameters["case_type"]],
             k=parameters["k"],
+            load_concurrency=parameters["load_concurrency"],
+            load_batch_size=parameters["load_batch_size"],
+            auto_tune_batch_size=parameters["auto_tune_batch_size"],
+            load_insert_rate=parameters["load_insert_rate"],
+            batch_search_sizes=parameters["batch_search_sizes"],
             concurrency_search_config=ConcurrencySearchConfig(
                 concurrency_duration=parameters["concurrency_duration"],
                 num_concurrency=[int(s) for s in parameters["num_concurrency"]],
                 concurrency_timeout=parameters["concurrency_timeout"],
+                warmup_duration=parameters["warmup_duration"],
+                adaptive_concurrency=parameters["adaptive_concurrency"],
+                saturation_gain=parameters["saturation_gain"],
+                saturation_latency_limit=parameters["saturation_latency_limit"],
+                latency_slos=parameters["latency_slo"],
+                target_qps=parameters["target_qps"],
+                arrival_distribution=ArrivalDistribution(parameters["arrival_distribution"]),
+                trace_file=parameters["trace_file"],
+                trace_speed=parameters["trace_speed"],
+                trace_window=parameters["trace_window"],
+                mixed_workload=parameters["mixed_workload"],
+                mixed_workload_rate=parameters["mixed_workload_rate"],
+                async_search=parameters["async_search"],
+                async_search_processes=parameters["async_search_processes"],
+                threads_per_process=parameters["threads_per_process"],
+                pin_workers=parameters["pin_workers"],
+                client_cpu_threshold=parameters["client_cpu_threshold"],
+                agents=parameters["agents"],
             ),
             custom_case=get_custom_case_config(parameters),
         ),
@@ -509,6 +863,7 @@ def run(
             parameters["load"],
             parameters["search_serial"],
             parameters["search_concurrent"],
+            parameters["search_batch"],
         ),
     )
     task_label = parameters["task_label"]
@@ -1,7 +1,14 @@
 from vectordb_bench.frontend.components.check_results.expanderStyle import (
     initMainExpanderStyle,
 )
-from vectordb_bench.metric import metric_order, isLowerIsBetterMetric, metric_unit_map
+from vectordb_bench.metric import (
+    LOAD_DURATION_METRIC,
+    SLO_QPS_METRIC,
+    SLO_QPS_METRIC_PREFIX,
+    metric_order,
+    isLowerIsBetterMetric,
+    metric_unit_map,
+)
 from vectordb_bench.frontend.config.styles import *
 from vectordb_bench.models import ResultLabel
 import plotly.express as px
@@ -38,12 +45,19 @@ def drawChart(data, st, key_prefix: str):
     metricsSet = set()
     for d in data:
         metricsSet = metricsSet.union(d["metricsSet"])
-    showMetrics = [metric for metric in metric_order if metric in metricsSet]
+    showMetrics = []
+    for metric in metric_order:
+        if metric == SLO_QPS_METRIC:
+            showMetrics += sorted([m for m in metricsSet if m.startswith(SLO_QPS_METRIC_PREFIX)])
+        elif metric in metricsSet:
+            showMetrics.append(metric)
 
     for i, metric in enumerate(showMetrics):
         container = st.container()
         key = f"{key_prefix}-{metric}"
         drawMetricChart(data, metric, container, key=key)
+        if metric == LOAD_DURATION_METRIC:
+            drawLoadTimelineChart(data, st.container(), key=f"{key_prefix}-load-timeline")
 
 
 def getLabelToShapeMap(data):
@@ -154,3 +168,57 @@ def drawMetricChart(data, metric, st, key: str):
     )
 
     chart.plotly_chart(fig, use_container_width=True, key=key)
+
+
+def drawLoadTimelineChart(data, st, key: str):
+    dataWithTimeline = [d for d in data if len(d.get("load_time_list", [])) > 0]
+    if len(dataWithTimeline) == 0:
+        return
+
+    lineData = [
+        {
+            "db_name": d["db_name"],
+            "time": t,
+            "rows_per_sec": rows_per_sec,
+            "latency_p50": latency_p50 * 1000,
+            "latency_p99": latency_p99 * 1000,
+        }
+        for d in dataWithTimeline
+        for t, rows_per_sec, latency_p50, latency_p99 in zip(
+            d["load_time_list"],
+            d["load_rows_per_sec_list"],
+            d["load_latency_p50_list"],
+            d["load_latency_p99_list"],
+        )
+    ]
+    fig = px.line(
+        lineData,
+        x="time",
+        y="rows_per_sec",
+        color="db_name",
+        markers=True,
+        hover_data={
+            "latency_p50": ":.2f",
+            "latency_p99": ":.2f",
+        },
+        labels={
+            "time": "Time since insert start (s)",
+            "rows_per_sec": "Rows/s",
+            "latency_p50": "Batch latency p50 (ms)",
+            "latency_p99": "Batch latency p99 (ms)",
+        },
+        title="Ingest throughput (more is better)",
+    )
+    fig.update_layout(
+        margin=dict(l=0, r=0, t=48, b=12, pad=8),
+        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="right", x=1, title=""),
+        title=dict(
+            font=dict(
+                size=16,
+                color="#666",
+            ),
+            pad=dict(l=16),
+        ),
+    )
+
+    st.plotly_chart(fig, use_container_width=True, key=key)
@@ -1,6 +1,6 @@
 from collections import defaultdict
 from dataclasses import asdict
-from vectordb_bench.metric import isLowerIsBetterMetric
+from vectordb_bench.metric import isLowerIsBetterMetric, slo_qps_metrics
 from vectordb_bench.models import CaseResult, ResultLabel
 
 
@@ -42,7 +42,10 @@ def mergeTasks(tasks: list[CaseResult]):
             "version": version,
             "metrics": mergeMetrics(
                 dbCaseMetricsMap[db_name][case.name].get("metrics", {}),
-                asdict(task.metrics),
+                {
+                    **asdict(task.metrics),
+                    **slo_qps_metrics(task.metrics.slo_list, task.metrics.slo_qps_list),
+                },
             ),
             "label": getBetterLabel(
                 dbCaseMetricsMap[db_name][case.name].get("label", ResultLabel.FAILED),
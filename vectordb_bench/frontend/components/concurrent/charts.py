@@ -5,6 +5,16 @@ import plotly.express as px
 
 from vectordb_bench.frontend.config.styles import COLOR_MAP
 
+LATENCY_TYPES = [
+    "latency_p99",
+    "latency_avg",
+    "latency_p50",
+    "latency_p90",
+    "latency_p95",
+    "latency_p999",
+    "latency_max",
+]
+
 
 def drawChartsByCase(allData, showCaseNames: list[str], st, latency_type: str):
     initMainExpanderStyle(st)
@@ -15,16 +25,14 @@ def drawChartsByCase(allData, showCaseNames: list[str], st, latency_type: str):
             {
                 "conc_num": caseData["conc_num_list"][i],
                 "qps": (caseData["conc_qps_list"][i] if 0 <= i < len(caseData["conc_qps_list"]) else 0),
-                "latency_p99": (
-                    caseData["conc_latency_p99_list"][i] * 1000
-                    if 0 <= i < len(caseData["conc_latency_p99_list"])
-                    else 0
-                ),
-                "latency_avg": (
-                    caseData["conc_latency_avg_list"][i] * 1000
-                    if 0 <= i < len(caseData["conc_latency_avg_list"])
-                    else 0
-                ),
+                **{
+                    latency_key: (
+                        caseData[f"conc_{latency_key}_list"][i] * 1000
+                        if 0 <= i < len(caseData.get(f"conc_{latency_key}_list", []))
+                        else 0
+                    )
+                    for latency_key in LATENCY_TYPES
+                },
                 "db_name": caseData["db_name"],
                 "db": caseData["db"],
             }
@@ -34,6 +42,42 @@ def drawChartsByCase(allData, showCaseNames: list[str], st, latency_type: str):
         drawChart(data, chartContainer, key=f"{caseName}-qps-p99", x_metric=latency_type)
 
 
+def drawQpsTimelineByCase(allData, showCaseNames: list[str], st):
+    for caseName in showCaseNames:
+        caseDataList = [
+            data
+            for data in allData
+            if data["case_name"] == caseName and len(data.get("conc_qps_timeline_list", [])) > 0
+        ]
+        if len(caseDataList) == 0:
+            continue
+        chartContainer = st.expander(f"{caseName} - QPS over time", False)
+        data = [
+            {
+                "second": second,
+                "qps": qps,
+                "conc_num": caseData["conc_num_list"][i],
+                "line": f"{caseData['db_name']} conc-{caseData['conc_num_list'][i]}",
+                "db_name": caseData["db_name"],
+            }
+            for caseData in caseDataList
+            for i, timeline in enumerate(caseData["conc_qps_timeline_list"])
+            for second, qps in enumerate(timeline)
+        ]
+        fig = px.line(
+            data,
+            x="second",
+            y="qps",
+            color="line",
+            hover_data={"db_name": True, "conc_num": True},
+            markers=True,
+            height=480,
+        )
+        fig.update_xaxes(title_text="Time (s)")
+        fig.update_yaxes(title_text="QPS")
+        chartContainer.plotly_chart(fig, use_container_width=True, key=f"{caseName}-qps-timeline")
+
+
 def getRange(metric, data, padding_multipliers):
     minV = min([d.get(metric, 0) for d in data])
     maxV = max([d.get(metric, 0) for d in data])
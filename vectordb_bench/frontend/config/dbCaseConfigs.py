@@ -106,6 +106,16 @@ UI_CASE_CLUSTERS: list[UICaseItemCluster] = [
             UICaseItem(case_id=CaseType.Performance1536D500K99P),
         ],
     ),
+    UICaseItemCluster(
+        label="Delete Performance Test",
+        uiCaseItems=[
+            UICaseItem(case_id=CaseType.Performance768D1MDelete10P),
+            UICaseItem(case_id=CaseType.Performance768D1MRangeDelete10P),
+            UICaseItem(isLine=True),
+            UICaseItem(case_id=CaseType.Performance1536D500KDelete10P),
+            UICaseItem(case_id=CaseType.Performance1536D500KRangeDelete10P),
+        ],
+    ),
     UICaseItemCluster(
         label="Capacity Test",
         uiCaseItems=[
@@ -131,6 +141,10 @@ DISPLAY_CASE_ORDER: list[CaseType] = [
     CaseType.Performance768D1M99P,
     CaseType.Performance1536D5M99P,
     CaseType.Performance1536D500K99P,
+    CaseType.Performance768D1MDelete10P,
+    CaseType.Performance768D1MRangeDelete10P,
+    CaseType.Performance1536D500KDelete10P,
+    CaseType.Performance1536D500KRangeDelete10P,
     CaseType.CapacityDim960,
     CaseType.CapacityDim128,
 ]
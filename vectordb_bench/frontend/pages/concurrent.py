@@ -6,7 +6,11 @@ from vectordb_bench.frontend.components.check_results.nav import (
     NavToRunTest,
 )
 from vectordb_bench.frontend.components.check_results.filters import getshownData
-from vectordb_bench.frontend.components.concurrent.charts import drawChartsByCase
+from vectordb_bench.frontend.components.concurrent.charts import (
+    LATENCY_TYPES,
+    drawChartsByCase,
+    drawQpsTimelineByCase,
+)
 from vectordb_bench.frontend.components.get_results.saveAsImage import getResults
 from vectordb_bench.frontend.config.styles import FAVICON
 from vectordb_bench.interface import benchmark_runner
@@ -56,9 +60,12 @@ def main():
     getResults(resultesContainer, "vectordb_bench_concurrent")
 
     # main
-    latency_type = st.radio("Latency Type", options=["latency_p99", "latency_avg"])
+    latency_type = st.radio("Latency Type", options=LATENCY_TYPES, horizontal=True)
     drawChartsByCase(shownData, showCaseNames, st.container(), latency_type=latency_type)
 
+    # qps of each second, the first and last seconds are partial
+    drawQpsTimelineByCase(shownData, showCaseNames, st.container())
+
     # footer
     footer(st.container())
 
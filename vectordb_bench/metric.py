@@ -1,5 +1,6 @@
 import logging
-from dataclasses import dataclass, field
+from collections.abc import Iterable
+from dataclasses import dataclass, field, fields
 
 import numpy as np
 
@@ -15,25 +16,133 @@ class Metric:
 
     # for performance cases
     load_duration: float = 0.0  # duration to load all dataset into DB
+    load_concurrency: int = 1  # number of processes loading the dataset
+    load_batch_size: int = 0  # rows of each insert batch, chosen by the probe if auto-tuned
+    insert_duration: float = 0.0
+    optimize_duration: float = 0.0
+    # for the load at a fixed insert rate while searching, the insert batch latency, the unfinished batches
+    # sampled every second since start, and the max qps, recall, ndcg and serial p99 of each search stage,
+    # by percent of the dataset inserted
+    insert_target_rows_per_sec: int = 0
+    insert_rows_per_sec: float = 0.0
+    insert_latency_p50: float = 0.0
+    insert_latency_p99: float = 0.0
+    insert_backlog_time_list: list[float] = field(default_factory=list)
+    insert_backlog_list: list[int] = field(default_factory=list)
+    read_write_stage_list: list[int] = field(default_factory=list)
+    read_write_qps_list: list[float] = field(default_factory=list)
+    read_write_recall_list: list[float] = field(default_factory=list)
+    read_write_ndcg_list: list[float] = field(default_factory=list)
+    read_write_latency_p99_list: list[float] = field(default_factory=list)
+    # for delete cases, rows deleted in batches after the load, and the optimize after the deletes
+    delete_count: int = 0
+    delete_duration: float = 0.0
+    delete_rows_per_sec: float = 0.0
+    delete_latency_p99: float = 0.0  # of one delete batch
+    delete_optimize_duration: float = 0.0
+    # ingest timeline sampled every config.LOAD_TIMELINE_INTERVAL during insert, time is seconds since start
+    load_time_list: list[float] = field(default_factory=list)
+    load_rows_per_sec_list: list[float] = field(default_factory=list)
+    load_latency_p50_list: list[float] = field(default_factory=list)
+    load_latency_p99_list: list[float] = field(default_factory=list)
     qps: float = 0.0
     serial_latency_p99: float = 0.0
     recall: float = 0.0
     ndcg: float = 0.0
+    mrr: float = 0.0
     conc_num_list: list[int] = field(default_factory=list)
     conc_qps_list: list[float] = field(default_factory=list)
     conc_latency_p99_list: list[float] = field(default_factory=list)
     conc_latency_avg_list: list[float] = field(default_factory=list)
+    conc_latency_p50_list: list[float] = field(default_factory=list)
+    conc_latency_p90_list: list[float] = field(default_factory=list)
+    conc_latency_p95_list: list[float] = field(default_factory=list)
+    conc_latency_p999_list: list[float] = field(default_factory=list)
+    conc_latency_max_list: list[float] = field(default_factory=list)
+    # completed requests in each wall-clock second of each concurrency, qps is the mean of the whole seconds
+    conc_qps_timeline_list: list[list[int]] = field(default_factory=list)
+    saturation_concurrency: int = 0  # concurrency of the max qps, within the p99 limit of the adaptive search
+    # largest qps meeting each latency slo, e.g. "p99<=10ms", interpolated between concurrencies
+    slo_list: list[str] = field(default_factory=list)
+    slo_qps_list: list[float] = field(default_factory=list)
+    # client-side load of each concurrency: mean cpu% of the search workers (100 is one busy core each)
+    # and context switches/s of all of them, client_bound if the workers of the max qps are too busy
+    conc_client_cpu_list: list[float] = field(default_factory=list)
+    conc_client_ctx_switch_list: list[float] = field(default_factory=list)
+    client_bound: bool = False
+    # mean seconds per query of each phase marked by the client, in the order of search_phase_list
+    # (request encode, server wait, response decode), empty if the client marks no phase
+    search_phase_list: list[str] = field(default_factory=list)
+    serial_phase_latency_list: list[float] = field(default_factory=list)
+    conc_phase_latency_list: list[float] = field(default_factory=list)
+    # warm-up before each concurrency, excluded from the lists above, empty if there's no warm-up
+    conc_warmup_qps_list: list[float] = field(default_factory=list)
+    conc_warmup_latency_p99_list: list[float] = field(default_factory=list)
+    open_loop_target_qps_list: list[int] = field(default_factory=list)
+    open_loop_qps_list: list[float] = field(default_factory=list)
+    open_loop_qps_timeline_list: list[list[int]] = field(default_factory=list)
+    open_loop_latency_p50_list: list[float] = field(default_factory=list)
+    open_loop_latency_p95_list: list[float] = field(default_factory=list)
+    open_loop_latency_p99_list: list[float] = field(default_factory=list)
+    open_loop_latency_p999_list: list[float] = field(default_factory=list)
+    open_loop_late_list: list[int] = field(default_factory=list)
+    open_loop_dropped_list: list[int] = field(default_factory=list)
+    # replay of a query trace, latency from the scheduled send time, also per window of the replay
+    trace_qps: float = 0.0
+    trace_latency_p50: float = 0.0
+    trace_latency_p99: float = 0.0
+    trace_latency_p999: float = 0.0
+    trace_late: int = 0
+    trace_qps_timeline: list[int] = field(default_factory=list)
+    trace_window_start_list: list[float] = field(default_factory=list)
+    trace_window_qps_list: list[float] = field(default_factory=list)
+    trace_window_latency_p50_list: list[float] = field(default_factory=list)
+    trace_window_latency_p99_list: list[float] = field(default_factory=list)
+    # mixed search/upsert/delete workload at a total ops/s, latency from the scheduled send time, and the
+    # recall of its searches against the ground truth without the deleted rows, also per recall window
+    mixed_qps: float = 0.0
+    mixed_qps_timeline: list[int] = field(default_factory=list)
+    mixed_late: int = 0
+    mixed_recall: float = 0.0
+    mixed_op_list: list[str] = field(default_factory=list)
+    mixed_op_count_list: list[int] = field(default_factory=list)
+    mixed_op_latency_p50_list: list[float] = field(default_factory=list)
+    mixed_op_latency_p99_list: list[float] = field(default_factory=list)
+    mixed_recall_window_start_list: list[float] = field(default_factory=list)
+    mixed_recall_list: list[float] = field(default_factory=list)
+    # batched search of the whole test data with each nq, throughput in query vectors/s
+    batch_size_list: list[int] = field(default_factory=list)
+    batch_vps_list: list[float] = field(default_factory=list)
+    batch_latency_p50_list: list[float] = field(default_factory=list)
+    batch_latency_p99_list: list[float] = field(default_factory=list)
+    batch_recall_list: list[float] = field(default_factory=list)
+
+    def update(self, results: dict) -> None:
+        """Set the fields named by the keys of `results`, as returned by the runners"""
+        unknown = results.keys() - {f.name for f in fields(self)}
+        if unknown:
+            msg = f"unknown metric fields: {sorted(unknown)}"
+            raise ValueError(msg)
+        for name, value in results.items():
+            setattr(self, name, value)
 
 
 QURIES_PER_DOLLAR_METRIC = "QP$ (Quries per Dollar)"
 LOAD_DURATION_METRIC = "load_duration"
+INSERT_DURATION_METRIC = "insert_duration"
+OPTIMIZE_DURATION_METRIC = "optimize_duration"
 SERIAL_LATENCY_P99_METRIC = "serial_latency_p99"
 MAX_LOAD_COUNT_METRIC = "max_load_count"
 QPS_METRIC = "qps"
 RECALL_METRIC = "recall"
+# stands for the qps of every latency slo of the results, one metric each, see slo_qps_metrics
+SLO_QPS_METRIC = "qps_under_slo"
+SLO_QPS_METRIC_PREFIX = "qps@"
 
 metric_unit_map = {
     LOAD_DURATION_METRIC: "s",
+    INSERT_DURATION_METRIC: "s",
+    OPTIMIZE_DURATION_METRIC: "s",
     SERIAL_LATENCY_P99_METRIC: "ms",
     MAX_LOAD_COUNT_METRIC: "K",
     QURIES_PER_DOLLAR_METRIC: "K",
@@ -41,13 +150,18 @@ metric_unit_map = {
 
 lower_is_better_metrics = [
     LOAD_DURATION_METRIC,
+    INSERT_DURATION_METRIC,
+    OPTIMIZE_DURATION_METRIC,
     SERIAL_LATENCY_P99_METRIC,
 ]
 
 metric_order = [
     QPS_METRIC,
+    SLO_QPS_METRIC,
     RECALL_METRIC,
     LOAD_DURATION_METRIC,
+    INSERT_DURATION_METRIC,
+    OPTIMIZE_DURATION_METRIC,
     SERIAL_LATENCY_P99_METRIC,
     MAX_LOAD_COUNT_METRIC,
 ]
@@ -57,6 +171,35 @@ def isLowerIsBetterMetric(metric: str) -> bool:
     return metric in lower_is_better_metrics
 
 
+def slo_qps_metrics(slo_list: list[str], slo_qps_list: list[float]) -> dict[str, float]:
+    """Name the qps of each latency slo as a metric of its own, such as `qps@p99<=10ms`"""
+    return {f"{SLO_QPS_METRIC_PREFIX}{slo}": qps for slo, qps in zip(slo_list, slo_qps_list, strict=False)}
+
+
+def calc_qps_under_latency(
+    conc_list: list[int],
+    qps_list: list[float],
+    latency_list: list[float],
+    max_latency: float,
+) -> float:
+    """The largest qps whose latency is within max_latency.
+
+    Between two adjacent concurrencies where the latency crosses max_latency, the qps is linearly
+    interpolated at max_latency. 0 if even the lowest concurrency is over it.
+    """
+    levels = sorted(zip(conc_list, qps_list, latency_list, strict=True))
+    best = 0.0
+    for i, (_, qps, latency) in enumerate(levels):
+        if latency > max_latency:
+            continue
+        best = max(best, qps)
+        if i + 1 < len(levels) and levels[i + 1][2] > max_latency:
+            _, next_qps, next_latency = levels[i + 1]
+            ratio = (max_latency - latency) / (next_latency - latency)
+            best = max(best, qps + (next_qps - qps) * ratio)
+    return round(best, 4)
+
+
 def calc_recall(count: int, ground_truth: list[int], got: list[int]) -> float:
     recalls = np.zeros(count)
     for i, result in enumerate(got):
@@ -82,3 +225,61 @@ def calc_ndcg(ground_truth: list[int], got: list[int], ideal_dcg: float) -> floa
             idx = ground_truth.index(got_id)
             dcg += 1 / np.log2(idx + 2)
     return dcg / ideal_dcg
+
+
+def ground_truth_array(neighbors: Iterable[Iterable[int]], k: int) -> np.ndarray:
+    """Stack the ground truth neighbor ids of each query into a (nq, k) int64 array, padded with -1"""
+    rows = [np.asarray(n, dtype=np.int64)[:k] for n in neighbors]
+    gt = np.full((len(rows), k), -1, dtype=np.int64)
+    for i, row in enumerate(rows):
+        gt[i, : len(row)] = row
+    return gt
+
+
+def _batch_hits(ground_truth: np.ndarray, got: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise membership of two (nq, *) id arrays, -1 is padding and never hits.
+
+    Ids are shifted by a per-row offset so that one flat sort + searchsorted
+    answers the membership of every row at once.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: mask of got ids found in the same ground truth row,
+            mask of ground truth ids found in the same got row
+    """
+    nq = ground_truth.shape[0]
+    if nq == 0:
+        return np.zeros(got.shape, dtype=bool), np.zeros(ground_truth.shape, dtype=bool)
+    offset = max(int(ground_truth.max(initial=-1)), int(got.max(initial=-1))) + 2
+    row_base = np.arange(nq, dtype=np.int64)[:, np.newaxis] * offset
+    gt_keys = ground_truth + 1 + row_base
+    got_keys = got + 1 + row_base
+
+    def isin_rows(keys: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        sorted_candidates = np.sort(candidates, axis=None)
+        pos = np.searchsorted(sorted_candidates, keys).clip(max=sorted_candidates.size - 1)
+        return sorted_candidates[pos] == keys
+
+    got_in_gt = isin_rows(got_keys, gt_keys) & (got >= 0)
+    gt_in_got = isin_rows(gt_keys, got_keys) & (ground_truth >= 0)
+    return got_in_gt, gt_in_got
+
+
+def calc_recall_batch(k: int, ground_truth: np.ndarray, got: np.ndarray) -> np.ndarray:
+    """recall@k of each query, same as calc_recall for every row of (nq, k) id arrays"""
+    got_in_gt, _ = _batch_hits(ground_truth, got)
+    return got_in_gt.sum(axis=1) / k
+
+
+def calc_ndcg_batch(ground_truth: np.ndarray, got: np.ndarray, ideal_dcg: float) -> np.ndarray:
+    """ndcg@k of each query, same as calc_ndcg for every row of (nq, k) id arrays"""
+    _, gt_in_got = _batch_hits(ground_truth, got)
+    discounts = 1 / np.log2(np.arange(ground_truth.shape[1]) + 2)
+    return (gt_in_got * discounts).sum(axis=1) / ideal_dcg
+
+
+def calc_mrr_batch(ground_truth: np.ndarray, got: np.ndarray) -> np.ndarray:
+    """Reciprocal rank of the true nearest neighbor in the results of each query, 0 if it's missing"""
+    matches = (got == ground_truth[:, :1]) & (ground_truth[:, :1] >= 0)
+    found = matches.any(axis=1)
+    ranks = matches.argmax(axis=1) + 1
+    return np.where(found, 1 / ranks, 0.0)
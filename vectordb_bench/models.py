@@ -1,5 +1,6 @@
 import logging
 import pathlib
+import re
 from datetime import date, datetime
 from enum import Enum, StrEnum, auto
 from typing import Self
@@ -115,10 +116,93 @@ class CustomizedCase(BaseModel):
     pass
 
 
+class ArrivalDistribution(StrEnum):
+    """Inter-arrival distribution of the open-loop search load"""
+
+    CONSTANT = auto()
+    POISSON = auto()
+
+
+class WorkloadOp(StrEnum):
+    """Operations of the mixed read/write/delete workload"""
+
+    SEARCH = auto()
+    UPSERT = auto()
+    DELETE = auto()
+
+    @classmethod
+    def parse_ratios(cls, spec: str) -> dict[Self, float]:
+        """Parse comma-separated `<op>=<share>`, e.g. search=0.8,upsert=0.15,delete=0.05, normalized to sum 1"""
+        ratios = {}
+        for item in filter(None, (s.strip() for s in spec.split(","))):
+            op, _, share = item.partition("=")
+            try:
+                ratios[cls(op.strip().lower())] = float(share)
+            except ValueError:
+                msg = f"invalid workload ratio: {item}, should be like search=0.8 with op in {[o.value for o in cls]}"
+                raise ValueError(msg) from None
+        total = sum(ratios.values())
+        if ratios and (total <= 0 or min(ratios.values()) < 0):
+            msg = f"workload ratios should be non-negative and not all 0, got {spec}"
+            raise ValueError(msg)
+        return {op: share / total for op, share in ratios.items() if share > 0}
+
+
+class LatencySLO(BaseModel):
+    """A latency budget of the concurrent search, such as p99<=10ms"""
+
+    percentile: float
+    max_latency: float  # seconds
+
+    @classmethod
+    def parse(cls, spec: str) -> Self:
+        """Parse `p<percentile><=<latency><us|ms|s>`, e.g. p99<=10ms, p99.9<=0.5s"""
+        m = re.fullmatch(r"p(\d+(?:\.\d+)?)\s*<=\s*(\d+(?:\.\d+)?)\s*(us|ms|s)", spec.strip())
+        if m is None:
+            msg = f"invalid latency slo: {spec}, should be like p99<=10ms"
+            raise ValueError(msg)
+        percentile, latency, unit = float(m.group(1)), float(m.group(2)), m.group(3)
+        return cls(percentile=percentile, max_latency=latency * {"us": 1e-6, "ms": 1e-3, "s": 1.0}[unit])
+
+    def __str__(self) -> str:
+        return f"p{self.percentile:g}<={self.max_latency * 1000:g}ms"
+
+
 class ConcurrencySearchConfig(BaseModel):
     num_concurrency: list[int] = config.NUM_CONCURRENCY
     concurrency_duration: int = config.CONCURRENCY_DURATION
     concurrency_timeout: int = config.CONCURRENCY_TIMEOUT
+    warmup_duration: int = config.CONCURRENCY_WARMUP_DURATION
+    # grow the concurrency geometrically up to max(num_concurrency) until the qps saturates
+    adaptive_concurrency: bool = False
+    saturation_gain: float = config.SATURATION_QPS_GAIN
+    saturation_latency_limit: float = 0.0  # p99 seconds, 0 for no limit
+    # report the largest qps meeting each latency budget
+    latency_slos: list[LatencySLO] = []
+
+    # open-loop search, issue queries at fixed arrival rates instead of back-to-back
+    target_qps: list[int] = []
+    arrival_distribution: ArrivalDistribution = ArrivalDistribution.CONSTANT
+
+    # replay a Parquet query trace with its arrival times, speed 0 for as fast as possible, skipped if None
+    trace_file: str | None = None
+    trace_speed: float = 1.0
+    trace_window: float = config.TRACE_WINDOW
+
+    # mixed search/upsert/delete workload at a total ops/s, skipped if empty, it changes the loaded data
+    mixed_workload: dict[WorkloadOp, float] = {}
+    mixed_workload_rate: int = config.MIXED_WORKLOAD_RATE
+
+    # drive the concurrency with coroutines in a few processes, for the dbs implementing asearch_embedding
+    async_search: bool = False
+    async_search_processes: int = 1
+    # search threads hosted by each process of the multiprocessing runner, each with its own connection
+    threads_per_process: int = 1
+    # pin each search worker to a core, flag the concurrencies whose workers are busier than this cpu%
+    pin_workers: bool = False
+    client_cpu_threshold: float = config.CLIENT_BOUND_CPU_PERCENT
+    # host:port of the `vectordbbench agent`s splitting each concurrency level, searched locally if empty
+    agents: list[str] = []
 
 
 class CaseConfig(BaseModel):
@@ -127,6 +211,11 @@ class CaseConfig(BaseModel):
     case_id: CaseType
     custom_case: dict | None = None
     k: int | None = config.K_DEFAULT
+    load_concurrency: int = config.LOAD_CONCURRENCY
+    load_batch_size: int = config.NUM_PER_BATCH
+    auto_tune_batch_size: bool = False
+    load_insert_rate: int = 0  # rows/s to insert at while searching, 0 to load as fast as possible
+    batch_search_sizes: list[int] = config.BATCH_SEARCH_SIZES
     concurrency_search_config: ConcurrencySearchConfig = ConcurrencySearchConfig()
 
     '''
@@ -152,6 +241,7 @@ class TaskStage(StrEnum):
     LOAD = auto()
     SEARCH_SERIAL = auto()
     SEARCH_CONCURRENT = auto()
+    SEARCH_BATCH = auto()
 
     def __repr__(self) -> str:
         return str.__repr__(self.value)